@@ -1,36 +1,72 @@
+from time import perf_counter
+
+start = perf_counter()
+
 import json
 import logging
 import os
+import threading
 from argparse import Namespace
-from time import perf_counter
+from contextlib import contextmanager
 
-from ariadne import (
-    gql,
-    graphql_sync,
-)
+from ariadne import graphql_sync
 
-from dataall.api.Objects import bootstrap as bootstrap_schema, get_executable_schema
+from dataall.api import instrumentation
+from dataall.api.Objects import executable_schema as load_schema
+from dataall.api.dataloader import DataLoaders
 from dataall.aws.handlers.service_handlers import Worker
 from dataall.aws.handlers.sqs import SqsQueue
 from dataall.db import init_permissions, get_engine, api, permissions
-from dataall.searchproxy import connect
+from dataall.searchproxy import LazyConnection
 
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 log = logging.getLogger(__name__)
 
-start = perf_counter()
 for name in ['boto3', 's3transfer', 'botocore', 'boto']:
     logging.getLogger(name).setLevel(logging.ERROR)
 
-SCHEMA = bootstrap_schema()
-TYPE_DEFS = gql(SCHEMA.gql(with_directives=False))
+# seconds spent in each initialization step of the container
+TIMINGS = {'imports': round(perf_counter() - start, 3)}
+
+
+@contextmanager
+def timed(step):
+    step_start = perf_counter()
+    try:
+        yield
+    finally:
+        TIMINGS[step] = round(perf_counter() - step_start, 3)
+
+
 ENVNAME = os.getenv('envname', 'local')
-ENGINE = get_engine(envname=ENVNAME)
-ES = connect(envname=ENVNAME)
+with timed('schema'):
+    # built from the snapshot of the image when there is one, resolver
+    # modules are then imported by their first query
+    executable_schema = load_schema()
+with timed('engine'):
+    ENGINE = get_engine(envname=ENVNAME)
+# connects on the first request using search
+ES = LazyConnection(envname=ENVNAME)
+# per request resolver, SQL and AWS call metrics when GRAPHQL_INSTRUMENTATION is set
+EXTENSIONS = instrumentation.extensions()
 Worker.queue = SqsQueue.send
 
-init_permissions(ENGINE)
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def initialize():
+    """Runs the initialization deferred to the first request"""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if not _initialized:
+            with timed('permissions'):
+                init_permissions(ENGINE)
+            _initialized = True
+            log.info(f'Lambda Context deferred initialization: {TIMINGS}')
 
 
 def resolver_adapter(resolver):
@@ -43,6 +79,7 @@ def resolver_adapter(resolver):
                 groups=info.context['groups'],
                 schema=info.context['schema'],
                 cdkproxyurl=info.context['cdkproxyurl'],
+                loaders=info.context['loaders'],
             ),
             source=obj or None,
             **kwargs,
@@ -51,9 +88,8 @@ def resolver_adapter(resolver):
     return adapted
 
 
-executable_schema = get_executable_schema()
-end = perf_counter()
-print(f'Lambda Context ' f'Initialization took: {end - start:.3f} sec')
+TIMINGS['total'] = round(perf_counter() - start, 3)
+print(f'Lambda Context Initialization took: {TIMINGS["total"]:.3f} sec {TIMINGS}')
 
 
 def get_groups(claims):
@@ -111,6 +147,8 @@ def handler(event, context):
             },
         }
 
+    initialize()
+
     if 'authorizer' in event['requestContext']:
         username = event['requestContext']['authorizer']['claims']['email']
         try:
@@ -140,16 +178,29 @@ def handler(event, context):
             'es': ES,
             'username': username,
             'groups': groups,
-            'schema': SCHEMA,
+            # the gql schema objects are not loaded with a snapshot schema
+            'schema': None,
             'cdkproxyurl': None,
+            'loaders': DataLoaders(ENGINE),
         }
     else:
         raise Exception(f'Could not initialize user context from event {event}')
 
     query = json.loads(event.get('body'))
-    success, response = graphql_sync(
-        schema=executable_schema, data=query, context_value=app_context
-    )
+    # tasks enqueued by the resolvers are sent in batches once the query is
+    # done, a send failure is reported without discarding the committed result
+    with SqsQueue.buffered(raise_errors=False) as send_errors:
+        success, response = graphql_sync(
+            schema=executable_schema,
+            data=query,
+            context_value=app_context,
+            extensions=EXTENSIONS,
+        )
+    if send_errors:
+        response.setdefault('errors', []).extend(
+            {'message': f'Background tasks were not started: {e}'}
+            for e in send_errors
+        )
     response = json.dumps(response)
 
     log.info('Lambda Response %s', response)
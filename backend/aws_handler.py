@@ -17,8 +17,13 @@ engine = get_engine(envname=ENVNAME)
 def handler(event, context=None):
     """Processes  messages received from sqs"""
     log.info(f'Received Event: {event}')
+    task_ids = []
     for record in event['Records']:
         log.info('Consumed record from queue: %s' % record)
         message = json.loads(record['body'])
         log.info(f'Extracted Message: {message}')
-        Worker.process(engine=engine, task_ids=message)
+        task_ids.extend(message)
+    # the tasks of all the records run as one concurrent batch, only a JSON
+    # safe summary is returned as the SQS event source ignores the result
+    responses = Worker.process(engine=engine, task_ids=task_ids)
+    return [{'taskUri': r['taskUri'], 'status': r['status']} for r in responses]
@@ -1,7 +1,7 @@
-from . import schema, helpers
+from . import schema, helpers, cache
 from .wrapper import (
     AthenaQueryResult,
     AthenaQueryResultStatus,
 )
 
-__all__ = ['schema', 'helpers', 'AthenaQueryResult', 'AthenaQueryResultStatus']
+__all__ = ['schema', 'helpers', 'cache', 'AthenaQueryResult', 'AthenaQueryResultStatus']
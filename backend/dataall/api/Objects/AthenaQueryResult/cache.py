@@ -0,0 +1,113 @@
+import hashlib
+import os
+import re
+
+from sqlalchemy import tuple_
+
+from ....db import models
+from ....utils import TTLCache
+
+TTL = int(os.getenv('ATHENA_RESULT_CACHE_TTL_SECONDS', 900))
+MAX_SIZE = int(os.getenv('ATHENA_RESULT_CACHE_SIZE', 500))
+
+_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_TABLE = re.compile(r'\b(?:from|join)\s+"?([\w-]+)"?\s*\.\s*"?([\w-]+)"?', re.I)
+# tables without database can't be matched with the catalog
+_UNQUALIFIED = re.compile(r'\b(?:from|join)\s+"?[\w-]+(?![\w-])"?(?!"?\s*\.)', re.I)
+# results of these calls change between executions
+_VOLATILE = re.compile(
+    r'\b(?:now|rand|random|uuid|current_date|current_time|current_timestamp|'
+    r'localtime|localtimestamp)\b',
+    re.I,
+)
+
+results = TTLCache(ttl=TTL, maxsize=MAX_SIZE)
+# key and data version of the queries still running, by AthenaQueryId
+running = TTLCache(ttl=TTL, maxsize=MAX_SIZE)
+
+
+def normalize_sql(sql: str) -> str:
+    """Lower cases the SQL and drops comments, extra spaces and the trailing
+    semicolon, leaving string literals untouched"""
+    parts = _LITERAL.split(sql or '')
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r'\s+', ' ', _COMMENT.sub(' ', parts[i]).lower())
+    return ''.join(parts).strip().rstrip(';').strip()
+
+
+def referenced_tables(sql: str) -> set:
+    """(database, table) pairs read by the query, in lower case"""
+    return {
+        (database.lower(), table.lower())
+        for database, table in _TABLE.findall(_COMMENT.sub(' ', sql or ''))
+    }
+
+
+def data_version(session, environment: models.Environment, sql: str):
+    """Returns the sync state of the catalog tables read by `sql`, or None
+    when the query can't be cached: not a read, volatile functions, or tables
+    that are not synchronized in the catalog"""
+    normalized = normalize_sql(sql)
+    if not normalized.startswith(('select', 'with')) or _VOLATILE.search(
+        _LITERAL.sub("''", normalized)
+    ):
+        return None
+    tables = referenced_tables(normalized)
+    if not tables or _UNQUALIFIED.search(normalized):
+        return None
+    rows = (
+        session.query(
+            models.DatasetTable.GlueDatabaseName,
+            models.DatasetTable.GlueTableName,
+            models.DatasetTable.updated,
+            models.DatasetTable.GlueTableSchemaHash,
+            models.DatasetTable.LastGlueTableStatus,
+        )
+        .filter(
+            models.DatasetTable.region == environment.region,
+            tuple_(
+                models.DatasetTable.GlueDatabaseName,
+                models.DatasetTable.GlueTableName,
+            ).in_(list(tables)),
+        )
+        .all()
+    )
+    if {(row[0].lower(), row[1].lower()) for row in rows} != tables:
+        return None
+    return hashlib.sha256(
+        repr(sorted((tuple(str(value) for value in row) for row in rows))).encode()
+    ).hexdigest()
+
+
+def cache_key(environment: models.Environment, work_group: str, sql: str) -> tuple:
+    return environment.environmentUri, work_group, normalize_sql(sql)
+
+
+def get(key, version):
+    """Returns the cached execution of `key` if it read the same data version"""
+    if not version:
+        return None
+    entry = results.get(key)
+    if entry and entry['version'] == version:
+        return entry
+    return None
+
+
+def put(key, version, query_id: str):
+    if version:
+        results.set(key, {'version': version, 'AthenaQueryId': query_id})
+
+
+def put_running(key, version, query_id: str):
+    """Remembers a query started before its results exist, see `complete`"""
+    if version:
+        running.set(query_id, (key, version))
+
+
+def complete(query_id: str):
+    """Caches a query that was running once its results are available"""
+    entry = running.get(query_id)
+    if entry:
+        running.invalidate(query_id)
+        put(*entry, query_id)
@@ -1,83 +1,192 @@
+import logging
+import os
+import time
+
 import nanoid
-from pyathena import connect
 
 from ....db import models
 from ....aws.handlers.sts import SessionHelper
+from .wrapper import AthenaQueryResultStatus
+
+log = logging.getLogger(__name__)
+
+# rows returned per page, get_query_results returns at most 1000 rows per call
+PAGE_SIZE = int(os.getenv('ATHENA_RESULT_PAGE_SIZE', 500))
+MAX_PAGE_SIZE = 1000
+POLL_INTERVAL = 0.2
+MAX_POLL_INTERVAL = 2
+# queries still running after this many seconds are returned unfinished and
+# their results are fetched later with their AthenaQueryId, which keeps API
+# calls under the 29 seconds API Gateway limit
+SYNC_THRESHOLD = float(os.getenv('ATHENA_SYNC_THRESHOLD_SECONDS', 20))
+
+FINISHED = [
+    AthenaQueryResultStatus.SUCCEEDED.value,
+    AthenaQueryResultStatus.FAILED.value,
+    AthenaQueryResultStatus.CANCELLED.value,
+]
 
 
 def random_key():
     return nanoid.generate()
 
 
-def run_query(environment: models.Environment, sql=None):
+def athena_client(
+    environment: models.Environment, environment_group: models.EnvironmentGroup = None
+):
+    """Athena client of the environment pivot role, or of the team role"""
+    session = SessionHelper.remote_session(accountid=environment.AwsAccountId)
+    if environment_group:
+        session = SessionHelper.get_session(
+            base_session=session, role_arn=environment_group.environmentIAMRoleArn
+        )
+    return session.client('athena', region_name=environment.region)
 
-    boto3_session = SessionHelper.remote_session(accountid=environment.AwsAccountId)
-    creds = boto3_session.get_credentials()
-    connection = connect(
-        aws_access_key_id=creds.access_key,
-        aws_secret_access_key=creds.secret_key,
-        aws_session_token=creds.token,
-        work_group='primary',
-        s3_staging_dir=f's3://{environment.EnvironmentDefaultBucketName}/preview/',
-        region_name=environment.region,
-    )
-    cursor = connection.cursor()
-    cursor.execute(sql)
-    columns = []
-    for f in cursor.description:
-        columns.append({'columnName': f[0], 'typeName': 'String'})
-
-    rows = []
-    for row in cursor:
-        record = {'cells': []}
-        for col_position, column in enumerate(columns):
-            cell = {}
-            cell['columnName'] = column['columnName']
-            cell['typeName'] = column['typeName']
-            cell['value'] = str(row[col_position])
-            record['cells'].append(cell)
-        rows.append(record)
+
+def start_query(client, sql: str, work_group: str, output_location: str) -> str:
+    return client.start_query_execution(
+        QueryString=sql,
+        WorkGroup=work_group,
+        ResultConfiguration={'OutputLocation': output_location},
+    )['QueryExecutionId']
+
+
+def get_query_execution(client, query_id: str) -> dict:
+    """Returns the status and statistics of a query, in AthenaQueryResult fields"""
+    execution = client.get_query_execution(QueryExecutionId=query_id)[
+        'QueryExecution'
+    ]
+    status = execution.get('Status', {})
+    statistics = execution.get('Statistics', {})
     return {
-        'error': None,
-        'AthenaQueryId': cursor.query_id,
-        'ElapsedTime': cursor.total_execution_time_in_millis,
-        'rows': rows,
-        'columns': columns,
+        'AthenaQueryId': query_id,
+        'Status': status.get('State'),
+        'Error': status.get('StateChangeReason')
+        if status.get('State') != AthenaQueryResultStatus.SUCCEEDED.value
+        else None,
+        'ElapsedTimeInMs': statistics.get(
+            'TotalExecutionTimeInMillis', statistics.get('EngineExecutionTimeInMillis')
+        ),
+        'DataScannedInBytes': statistics.get('DataScannedInBytes'),
+        'OutputLocation': execution.get('ResultConfiguration', {}).get(
+            'OutputLocation'
+        ),
     }
 
 
-def run_query_with_role(environment: models.Environment, environment_group: models.EnvironmentGroup, sql=None):
-    base_session = SessionHelper.remote_session(accountid=environment.AwsAccountId)
-    boto3_session = SessionHelper.get_session(base_session=base_session, role_arn=environment_group.environmentIAMRoleArn)
-    creds = boto3_session.get_credentials()
-    connection = connect(
-        aws_access_key_id=creds.access_key,
-        aws_secret_access_key=creds.secret_key,
-        aws_session_token=creds.token,
-        work_group=environment_group.environmentAthenaWorkGroup,
-        s3_staging_dir=f's3://{environment.EnvironmentDefaultBucketName}/athenaqueries/{environment_group.environmentAthenaWorkGroup}/',
-        region_name=environment.region,
-    )
-    cursor = connection.cursor()
-    cursor.execute(sql)
-    columns = []
-    for f in cursor.description:
-        columns.append({'columnName': f[0], 'typeName': 'String'})
-
-    rows = []
-    for row in cursor:
-        record = {'cells': []}
-        for col_position, column in enumerate(columns):
-            cell = {}
-            cell['columnName'] = column['columnName']
-            cell['typeName'] = column['typeName']
-            cell['value'] = str(row[col_position])
-            record['cells'].append(cell)
-        rows.append(record)
+def wait_for_query(client, query_id: str, timeout: float = SYNC_THRESHOLD) -> dict:
+    """Polls the query with a growing interval until it finishes or `timeout`"""
+    deadline = time.monotonic() + timeout
+    interval = POLL_INTERVAL
+    while True:
+        execution = get_query_execution(client, query_id)
+        if execution['Status'] in FINISHED or time.monotonic() > deadline:
+            return execution
+        time.sleep(interval)
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+
+def fetch_results(
+    client, query_id: str, page_size: int = PAGE_SIZE, next_token: str = None
+) -> dict:
+    """Fetches one page of results as columns and row value lists.
+
+    Column types come from the result metadata, values are kept as returned
+    by Athena with NULL as None. `nextToken` is set when more rows remain.
+    """
+    page_size = max(1, min(page_size or PAGE_SIZE, MAX_PAGE_SIZE))
+    params = {'QueryExecutionId': query_id, 'MaxResults': page_size}
+    if next_token:
+        params['NextToken'] = next_token
+    else:
+        # the header row of the first page counts in MaxResults
+        params['MaxResults'] = min(page_size + 1, MAX_PAGE_SIZE)
+    response = client.get_query_results(**params)
+    result_set = response.get('ResultSet', {})
+    columns = [
+        {'columnName': column['Name'], 'typeName': column['Type']}
+        for column in result_set.get('ResultSetMetadata', {}).get('ColumnInfo', [])
+    ]
+    records = [
+        [datum.get('VarCharValue') for datum in row.get('Data', [])]
+        for row in result_set.get('Rows', [])
+    ]
+    # the first page of a SELECT starts with the column names
+    if not next_token and records and records[0] == [c['columnName'] for c in columns]:
+        records = records[1:]
     return {
-        'error': None,
-        'AthenaQueryId': cursor.query_id,
-        'ElapsedTime': cursor.total_execution_time_in_millis,
-        'rows': rows,
         'columns': columns,
+        'records': records,
+        'nextToken': response.get('NextToken'),
     }
+
+
+def query_results(
+    client, query_id: str, page_size: int = PAGE_SIZE, next_token: str = None
+) -> dict:
+    """Returns the status of a query and, once it succeeded, a page of results"""
+    result = get_query_execution(client, query_id)
+    if result['Status'] == AthenaQueryResultStatus.SUCCEEDED.value:
+        result.update(fetch_results(client, query_id, page_size, next_token))
+    return result
+
+
+def execute(
+    client, sql, work_group, output_location, page_size=PAGE_SIZE, wait=SYNC_THRESHOLD
+) -> dict:
+    """Starts a query and waits at most `wait` seconds for its first page of
+    results, a query still running is returned with its status only"""
+    query_id = start_query(client, sql, work_group, output_location)
+    if not wait:
+        return get_query_execution(client, query_id)
+    result = wait_for_query(client, query_id, timeout=wait)
+    if result['Status'] == AthenaQueryResultStatus.SUCCEEDED.value:
+        result.update(fetch_results(client, query_id, page_size))
+    return result
+
+
+def run_query(
+    environment: models.Environment, sql=None, page_size=PAGE_SIZE, wait=SYNC_THRESHOLD
+):
+    return execute(
+        athena_client(environment),
+        sql,
+        work_group='primary',
+        output_location=f's3://{environment.EnvironmentDefaultBucketName}/preview/',
+        page_size=page_size,
+        wait=wait,
+    )
+
+
+def run_query_with_role(
+    environment: models.Environment,
+    environment_group: models.EnvironmentGroup,
+    sql=None,
+    page_size=PAGE_SIZE,
+    wait=SYNC_THRESHOLD,
+):
+    return execute(
+        athena_client(environment, environment_group),
+        sql,
+        work_group=environment_group.environmentAthenaWorkGroup,
+        output_location=f's3://{environment.EnvironmentDefaultBucketName}/athenaqueries/{environment_group.environmentAthenaWorkGroup}/',
+        page_size=page_size,
+        wait=wait,
+    )
+
+
+def to_rows(columns: [dict], records: [list]) -> [dict]:
+    """Expands records into the cell per value format of the `rows` field"""
+    return [
+        {
+            'cells': [
+                {
+                    'columnName': column['columnName'],
+                    'typeName': column['typeName'],
+                    'value': value,
+                }
+                for column, value in zip(columns, record)
+            ]
+        }
+        for record in records
+    ]
@@ -0,0 +1,10 @@
+from . import helpers
+
+
+def resolve_rows(context, source, **kwargs):
+    """Rows in the cell per value format, built from the columnar records"""
+    if not source:
+        return None
+    if source.get('rows') is not None:
+        return source['rows']
+    return helpers.to_rows(source.get('columns') or [], source.get('records') or [])
@@ -1,4 +1,5 @@
 from ... import gql
+from .resolvers import resolve_rows
 
 AthenaResultColumnDescriptor = gql.ObjectType(
     name='AthenaResultColumnDescriptor',
@@ -35,11 +36,18 @@ AthenaQueryResult = gql.ObjectType(
         gql.Field(name='AwsAccountId', type=gql.String),
         gql.Field(name='region', type=gql.String),
         gql.Field(name='ElapsedTimeInMs', type=gql.Integer),
-        gql.Field(name='DataScannedInBytes', type=gql.Integer),
+        gql.Field(name='DataScannedInBytes', type=gql.String),
         gql.Field(name='Status', type=gql.String),
         gql.Field(
             name='columns', type=gql.ArrayType(gql.Ref('AthenaResultColumnDescriptor'))
         ),
-        gql.Field(name='rows', type=gql.ArrayType(gql.Ref('AthenaResultRecord'))),
+        gql.Field(
+            name='rows',
+            type=gql.ArrayType(gql.Ref('AthenaResultRecord')),
+            resolver=resolve_rows,
+        ),
+        gql.Field(name='records', type=gql.ArrayType(gql.ArrayType(gql.String))),
+        gql.Field(name='nextToken', type=gql.String),
+        gql.Field(name='cached', type=gql.Boolean),
     ],
 )
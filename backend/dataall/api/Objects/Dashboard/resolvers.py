@@ -172,15 +172,11 @@ def resolve_user_role(context: Context, source: models.Dashboard):
 
 
 def get_dashboard_organization(context: Context, source: models.Dashboard, **kwargs):
-    with context.engine.scoped_session() as session:
-        org = session.query(models.Organization).get(source.organizationUri)
-    return org
+    return context.loaders.organization.load(source.organizationUri)
 
 
 def get_dashboard_environment(context: Context, source: models.Dashboard, **kwargs):
-    with context.engine.scoped_session() as session:
-        env = session.query(models.Environment).get(source.environmentUri)
-    return env
+    return context.loaders.environment.load(source.environmentUri)
 
 
 def request_dashboard_share(
@@ -91,18 +91,14 @@ def resolve_user_role(context: Context, source: models.DataPipeline):
 def get_pipeline_env(context: Context, source: models.DataPipeline, **kwargs):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        env = session.query(models.Environment).get(source.environmentUri)
-    return env
+    return context.loaders.environment.load(source.environmentUri)
 
 
 def get_pipeline_org(context: Context, source: models.DataPipeline, **kwargs):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        env = session.query(models.Environment).get(source.environmentUri)
-        org = session.query(models.Organization).get(env.organizationUri)
-    return org
+    env = context.loaders.environment.load(source.environmentUri)
+    return context.loaders.organization.load(env.organizationUri)
 
 
 def get_clone_url_http(context: Context, source: models.DataPipeline, **kwargs):
@@ -246,7 +242,9 @@ def get_creds(context: Context, source, DataPipelineUri: str = None):
 def _get_creds_from_aws(pipeline, env_role_arn):
     aws_account_id = pipeline.AwsAccountId
     aws_session = SessionHelper.remote_session(aws_account_id)
-    env_session = SessionHelper.get_session(aws_session, role_arn=env_role_arn)
+    env_session = SessionHelper.get_session(
+        aws_session, role_arn=env_role_arn, use_cache=False
+    )
     c = env_session.get_credentials()
     body = json.dumps(
         {
@@ -28,7 +28,7 @@ updateDataset = gql.MutationField(
 syncTables = gql.MutationField(
     name='syncTables',
     args=[gql.Argument(name='datasetUri', type=gql.NonNullableType(gql.String))],
-    type=gql.Ref('DatasetTableSearchResult'),
+    type=gql.Ref('DatasetTablesSyncTask'),
     resolver=sync_tables,
 )
 
@@ -48,6 +48,17 @@ getDatasetSummary = gql.QueryField(
 )
 
 
+getDatasetTablesSyncTask = gql.QueryField(
+    name='getDatasetTablesSyncTask',
+    args=[
+        gql.Argument(name='datasetUri', type=gql.NonNullableType(gql.String)),
+        gql.Argument(name='taskUri', type=gql.NonNullableType(gql.String)),
+    ],
+    type=gql.Ref('DatasetTablesSyncTask'),
+    resolver=get_sync_tables_task,
+)
+
+
 getDatasetPresignedUrl = gql.QueryField(
     name='getDatasetPresignedUrl',
     args=[
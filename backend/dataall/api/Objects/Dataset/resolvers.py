@@ -21,6 +21,14 @@ from ....searchproxy import indexers
 
 log = logging.getLogger(__name__)
 
+SYNC_TABLES_ACTION = 'glue.dataset.database.tables'
+SYNC_TABLES_COUNTERS = [
+    'tablesDiscovered',
+    'tablesAdded',
+    'tablesUpdated',
+    'tablesDeleted',
+]
+
 
 def create_dataset(context: Context, source, input=None):
     with context.engine.scoped_session() as session:
@@ -106,16 +114,12 @@ def resolve_user_role(context: Context, source: models.Dataset, **kwargs):
     elif source.stewards in context.groups:
         return DatasetRole.DataSteward.value
     else:
-        with context.engine.scoped_session() as session:
-            share = (
-                session.query(models.ShareObject)
-                .filter(models.ShareObject.datasetUri == source.datasetUri)
-                .first()
-            )
-            if share and (
-                share.owner == context.username or share.principalId in context.groups
-            ):
-                return DatasetRole.Shared.value
+        shares = context.loaders.dataset_shares.load(source.datasetUri)
+        share = shares[0] if shares else None
+        if share and (
+            share.owner == context.username or share.principalId in context.groups
+        ):
+            return DatasetRole.Shared.value
     return DatasetRole.NoPermission.value
 
 
@@ -187,15 +191,13 @@ def list_tables(context, source: models.Dataset, filter: dict = None):
 def get_dataset_organization(context, source: models.Dataset, **kwargs):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        return Organization.get_organization_by_uri(session, source.organizationUri)
+    return context.loaders.organization.load(source.organizationUri)
 
 
 def get_dataset_environment(context, source: models.Dataset, **kwargs):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        return Environment.get_environment_by_uri(session, source.environmentUri)
+    return context.loaders.environment.load(source.environmentUri)
 
 
 def get_dataset_owners_group(context, source: models.Dataset, **kwargs):
@@ -230,19 +232,10 @@ def update_dataset(context, source, datasetUri: str = None, input: dict = None):
 def get_dataset_statistics(context: Context, source: models.Dataset, **kwargs):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        count_tables = db.api.Dataset.count_dataset_tables(session, source.datasetUri)
-        count_locations = db.api.Dataset.count_dataset_locations(
-            session, source.datasetUri
-        )
-        count_upvotes = db.api.Vote.count_upvotes(
-            session, None, None, source.datasetUri, {'targetType': 'dataset'}
-        )
-    return {
-        'tables': count_tables or 0,
-        'locations': count_locations or 0,
-        'upvotes': count_upvotes or 0,
-    }
+    # the counters of a page of datasets are read at once by the loader
+    return db.api.DatasetStatistics.to_dict(
+        context.loaders.dataset_statistics.load(source.datasetUri)
+    )
 
 
 def get_dataset_etl_credentials(context: Context, source, datasetUri: str = None):
@@ -295,7 +288,7 @@ def get_dataset_assume_role_url(context: Context, source, datasetUri: str = None
 
     pivot_session = SessionHelper.remote_session(account_id)
     aws_session = SessionHelper.get_session(
-        base_session=pivot_session, role_arn=role_arn
+        base_session=pivot_session, role_arn=role_arn, use_cache=False
     )
     url = SessionHelper.get_console_access_url(
         aws_session,
@@ -317,26 +310,54 @@ def sync_tables(context: Context, source, datasetUri: str = None):
         dataset = Dataset.get_dataset_by_uri(session, datasetUri)
 
         task = models.Task(
-            action='glue.dataset.database.tables',
+            action=SYNC_TABLES_ACTION,
             targetUri=dataset.datasetUri,
         )
         session.add(task)
-    Worker.process(engine=context.engine, task_ids=[task.taskUri], save_response=False)
+        session.commit()
+        sync_task = sync_tables_task(session, task)
+    Worker.queue(engine=context.engine, task_ids=[sync_task['taskUri']])
+    return sync_task
+
+
+def get_sync_tables_task(
+    context: Context, source, datasetUri: str = None, taskUri: str = None
+):
     with context.engine.scoped_session() as session:
-        indexers.upsert_dataset_tables(
-            session=session, es=context.es, datasetUri=dataset.datasetUri
-        )
-        indexers.remove_deleted_tables(
-            session=session, es=context.es, datasetUri=dataset.datasetUri
-        )
-        return Dataset.paginated_dataset_tables(
+        ResourcePolicy.check_user_resource_permission(
             session=session,
             username=context.username,
             groups=context.groups,
-            uri=datasetUri,
-            data={'page': 1, 'pageSize': 10},
-            check_perm=None,
+            resource_uri=datasetUri,
+            permission_name=permissions.SYNC_DATASET,
         )
+        task: models.Task = session.query(models.Task).get(taskUri)
+        if (
+            not task
+            or task.targetUri != datasetUri
+            or task.action != SYNC_TABLES_ACTION
+        ):
+            raise db.exceptions.ObjectNotFound('Task', taskUri)
+        return sync_tables_task(session, task)
+
+
+def sync_tables_task(session, task: models.Task) -> dict:
+    """Status and progress counters of a tables synchronization task, or of
+    the task it was coalesced with when an identical one was already queued"""
+    response = task.response if isinstance(task.response, dict) else {}
+    if response.get('coalescedWith'):
+        task = session.query(models.Task).get(response['coalescedWith']) or task
+    progress = task.response if isinstance(task.response, dict) else {}
+    error = task.error if isinstance(task.error, dict) else {}
+    return {
+        'taskUri': task.taskUri,
+        'datasetUri': task.targetUri,
+        'status': task.status,
+        'created': task.created,
+        'updated': task.updated,
+        'error': error.get('message'),
+        **{counter: progress.get(counter) for counter in SYNC_TABLES_COUNTERS},
+    }
 
 
 def start_crawler(context: Context, source, datasetUri: str, input: dict = None):
@@ -417,7 +438,9 @@ def generate_dataset_access_token(context, source, datasetUri: str = None):
 
     pivot_session = SessionHelper.remote_session(dataset.AwsAccountId)
     aws_session = SessionHelper.get_session(
-        base_session=pivot_session, role_arn=dataset.IAMDatasetAdminRoleArn
+        base_session=pivot_session,
+        role_arn=dataset.IAMDatasetAdminRoleArn,
+        use_cache=False,
     )
     c = aws_session.get_credentials()
     credentials = {
@@ -180,3 +180,19 @@ GlueCrawler = gql.ObjectType(
         gql.Field(name='status', type=gql.String),
     ],
 )
+
+DatasetTablesSyncTask = gql.ObjectType(
+    name='DatasetTablesSyncTask',
+    fields=[
+        gql.Field(name='taskUri', type=gql.ID),
+        gql.Field(name='datasetUri', type=gql.String),
+        gql.Field(name='status', type=gql.String),
+        gql.Field(name='created', type=gql.String),
+        gql.Field(name='updated', type=gql.String),
+        gql.Field(name='error', type=gql.String),
+        gql.Field(name='tablesDiscovered', type=gql.Integer),
+        gql.Field(name='tablesAdded', type=gql.Integer),
+        gql.Field(name='tablesUpdated', type=gql.Integer),
+        gql.Field(name='tablesDeleted', type=gql.Integer),
+    ],
+)
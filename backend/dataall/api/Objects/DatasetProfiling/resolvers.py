@@ -13,10 +13,7 @@ log = logging.getLogger(__name__)
 def resolve_dataset(context, source: models.DatasetProfilingRun):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        return api.Dataset.get_dataset_by_uri(
-            session=session, dataset_uri=source.datasetUri
-        )
+    return context.loaders.dataset.load(source.datasetUri)
 
 
 def start_profiling_run(context: Context, source, input: dict = None):
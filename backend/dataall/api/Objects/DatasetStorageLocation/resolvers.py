@@ -95,9 +95,7 @@ def remove_storage_location(context, source, locationUri: str = None):
 def resolve_dataset(context, source: models.DatasetStorageLocation, **kwargs):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        d = session.query(models.Dataset).get(source.datasetUri)
-    return d
+    return context.loaders.dataset.load(source.datasetUri)
 
 
 def publish_location_update(context: Context, source, locationUri: str = None):
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import os
+from urllib.parse import urlparse
+
+from botocore.exceptions import ClientError
+
+from ..AthenaQueryResult import helpers as athena_helpers
+from ..AthenaQueryResult.wrapper import AthenaQueryResultStatus
+from ....aws.handlers.sts import SessionHelper
+from ....db import exceptions, models
+from ....utils import TTLCache
+
+log = logging.getLogger(__name__)
+
+ROWS = int(os.getenv('TABLE_PREVIEW_ROWS', 50))
+TTL = int(os.getenv('TABLE_PREVIEW_CACHE_TTL_SECONDS', 3600))
+MAX_SIZE = int(os.getenv('TABLE_PREVIEW_CACHE_SIZE', 200))
+# samples csv and parquet tables with S3 Select instead of an Athena query
+SAMPLE_FROM_S3 = os.getenv('TABLE_PREVIEW_FROM_S3', 'false').lower() == 'true'
+# objects listed under the table prefix to find a data file to sample
+SAMPLE_MAX_KEYS = 100
+# seconds a preview request waits for its Athena query, within the 29 seconds
+# API Gateway limit. A query still running is picked up again by the next
+# request instead of starting a new one
+WAIT = float(os.getenv('TABLE_PREVIEW_WAIT_SECONDS', 24))
+
+previews = TTLCache(ttl=TTL, maxsize=MAX_SIZE)
+work_groups = TTLCache(ttl=TTL, maxsize=MAX_SIZE)
+running_queries = TTLCache(ttl=TTL, maxsize=MAX_SIZE)
+
+
+def table_version(table: models.DatasetTable) -> str:
+    """Sync state of the table, a preview is reused while it is unchanged"""
+    state = (
+        table.updated,
+        table.GlueTableSchemaHash,
+        table.LastGlueTableStatus,
+        table.S3Prefix,
+    )
+    return hashlib.sha256(repr(tuple(str(value) for value in state)).encode()).hexdigest()
+
+
+def get_preview(
+    session, table: models.DatasetTable, environment: models.Environment
+) -> dict:
+    """Returns the first rows of the table as columns and records, from the
+    cache when the table did not change since they were read"""
+    version = table_version(table)
+    entry = previews.get(table.tableUri)
+    if entry and entry['version'] == version:
+        return {**entry['preview'], 'cached': True}
+
+    preview = None
+    if SAMPLE_FROM_S3:
+        preview = s3_preview(session, table)
+    if preview is None:
+        preview = athena_preview(table, environment)
+    previews.set(table.tableUri, {'version': version, 'preview': preview})
+    return {**preview, 'cached': False}
+
+
+def work_group(client, environment: models.Environment) -> str:
+    """Default Athena work group of the environment, `primary` when missing"""
+
+    def lookup():
+        try:
+            return client.get_work_group(
+                WorkGroup=environment.EnvironmentDefaultAthenaWorkGroup
+            )['WorkGroup']['Name']
+        except ClientError as e:
+            log.info(
+                f'Workgroup {environment.EnvironmentDefaultAthenaWorkGroup} can not '
+                f'be found due to: {e}'
+            )
+            return 'primary'
+
+    return work_groups.get_or_set(environment.environmentUri, lookup)
+
+
+def athena_preview(table: models.DatasetTable, environment: models.Environment) -> dict:
+    client = athena_helpers.athena_client(environment)
+    version = table_version(table)
+    running = running_queries.get(table.tableUri)
+    if running and running['version'] == version:
+        result = athena_helpers.wait_for_query(client, running['queryId'], timeout=WAIT)
+        if result['Status'] == AthenaQueryResultStatus.SUCCEEDED.value:
+            result.update(
+                athena_helpers.fetch_results(client, running['queryId'], ROWS)
+            )
+    else:
+        sql = f'select * from "{table.GlueDatabaseName}"."{table.GlueTableName}" limit {ROWS}'  # nosec
+        result = athena_helpers.execute(
+            client,
+            sql,
+            work_group=work_group(client, environment),
+            output_location=(
+                f's3://{environment.EnvironmentDefaultBucketName}/preview/'
+                f'{table.datasetUri}/{table.tableUri}'
+            ),
+            page_size=ROWS,
+            wait=WAIT,
+        )
+    if result['Status'] in athena_helpers.FINISHED:
+        running_queries.invalidate(table.tableUri)
+    else:
+        running_queries.set(
+            table.tableUri, {'version': version, 'queryId': result['AthenaQueryId']}
+        )
+    if result['Status'] != AthenaQueryResultStatus.SUCCEEDED.value:
+        raise exceptions.AWSResourceNotAvailable(
+            action='PREVIEW_DATASET_TABLE',
+            message=result.get('Error')
+            or f'Preview query {result["AthenaQueryId"]} is {result["Status"]}, '
+            f'retry to get its results',
+        )
+    return {
+        'columns': result['columns'],
+        'records': result['records'],
+        'source': 'athena',
+    }
+
+
+def s3_preview(session, table: models.DatasetTable):
+    """Samples the first data file of the table with S3 Select, returns None
+    when the table can't be sampled and must be queried with Athena"""
+    properties = table.GlueTableProperties or {}
+    classification = str(properties.get('classification', '')).lower()
+    if classification == 'parquet':
+        serialization = {'Parquet': {}}
+    elif classification == 'csv' and str(
+        properties.get('skip.header.line.count', '0')
+    ) == '1':
+        # without header the CSV fields can't be matched with the columns
+        serialization = {
+            'CSV': {
+                'FileHeaderInfo': 'USE',
+                'FieldDelimiter': properties.get('delimiter', ','),
+            }
+        }
+    else:
+        return None
+
+    location = urlparse(table.S3Prefix or '')
+    bucket = location.netloc or table.S3BucketName
+    prefix = location.path.strip('/') if location.netloc else (table.S3Prefix or '')
+    s3 = SessionHelper.remote_session(accountid=table.AWSAccountId).client(
+        's3', region_name=table.region
+    )
+    try:
+        key = sample_key(s3, bucket, prefix)
+        if not key:
+            return None
+        if 'CSV' in serialization:
+            serialization['CompressionType'] = 'GZIP' if key.endswith('.gz') else 'NONE'
+        response = s3.select_object_content(
+            Bucket=bucket,
+            Key=key,
+            ExpressionType='SQL',
+            Expression=f'SELECT * FROM s3object s LIMIT {ROWS}',  # nosec
+            InputSerialization=serialization,
+            OutputSerialization={'JSON': {}},
+        )
+        payload = b''.join(
+            event['Records']['Payload']
+            for event in response['Payload']
+            if 'Records' in event
+        )
+    except ClientError as e:
+        log.info(f'Could not sample table {table.tableUri} from S3: {e}')
+        return None
+
+    rows = [json.loads(line) for line in payload.decode('utf-8').splitlines() if line]
+    partitions = dict(
+        part.split('=', 1) for part in key[len(prefix) :].split('/') if '=' in part
+    )
+    types = {
+        name: type_name
+        for name, type_name in session.query(
+            models.DatasetTableColumn.name, models.DatasetTableColumn.typeName
+        ).filter(models.DatasetTableColumn.tableUri == table.tableUri)
+    }
+    names = list(rows[0]) if rows else [n for n in types if n not in partitions]
+    names += [n for n in partitions if n not in names]
+    return {
+        'columns': [
+            {'columnName': name, 'typeName': types.get(name, 'string')}
+            for name in names
+        ],
+        'records': [
+            [_to_string(row.get(name, partitions.get(name))) for name in names]
+            for row in rows
+        ],
+        'source': 's3',
+    }
+
+
+def sample_key(s3, bucket: str, prefix: str):
+    """First data object under the table prefix, skipping markers and
+    hidden files"""
+    prefix = f'{prefix}/' if prefix else ''
+    response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix, MaxKeys=SAMPLE_MAX_KEYS)
+    for item in response.get('Contents', []):
+        name = item['Key'].rsplit('/', 1)[-1]
+        if (
+            item.get('Size')
+            and name
+            and not name.startswith(('_', '.'))
+            and not name.endswith('$folder$')
+        ):
+            return item['Key']
+    return None
+
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+
+def preview_fields(preview: dict) -> [str]:
+    """Column names in the former `fields` format"""
+    return [
+        json.dumps({'name': column['columnName']})
+        for column in preview.get('columns') or []
+    ]
+
+
+def preview_rows(preview: dict) -> [str]:
+    """Records in the former `rows` format, one JSON array per row"""
+    return [json.dumps(record) for record in preview.get('records') or []]
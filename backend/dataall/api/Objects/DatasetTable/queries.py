@@ -25,8 +25,20 @@ listDatasetTables = gql.QueryField(
 QueryPreviewResult = gql.ObjectType(
     name='QueryPreviewResult',
     fields=[
-        gql.Field(name='fields', type=gql.ArrayType(gql.String)),
-        gql.Field(name='rows', type=gql.ArrayType(gql.String)),
+        gql.Field(
+            name='columns', type=gql.ArrayType(gql.Ref('AthenaResultColumnDescriptor'))
+        ),
+        gql.Field(name='records', type=gql.ArrayType(gql.ArrayType(gql.String))),
+        gql.Field(name='source', type=gql.String),
+        gql.Field(name='cached', type=gql.Boolean),
+        gql.Field(
+            name='fields',
+            type=gql.ArrayType(gql.String),
+            resolver=resolve_preview_fields,
+        ),
+        gql.Field(
+            name='rows', type=gql.ArrayType(gql.String), resolver=resolve_preview_rows
+        ),
     ],
 )
 
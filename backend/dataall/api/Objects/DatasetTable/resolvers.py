@@ -1,14 +1,10 @@
-import json
 import logging
 
-from botocore.exceptions import ClientError
-from pyathena import connect
-
 from .... import db
+from . import preview as table_preview
 from ..Dataset.resolvers import get_dataset
 from ....api.context import Context
 from ....aws.handlers.service_handlers import Worker
-from ....aws.handlers.sts import SessionHelper
 from ....db import permissions, models
 from ....db.api import ResourcePolicy, Glossary
 from ....searchproxy import indexers
@@ -118,39 +114,19 @@ def preview(context, source, tableUri: str = None):
                 permission_name=permissions.PREVIEW_DATASET_TABLE,
             )
         env = db.api.Environment.get_environment_by_uri(session, dataset.environmentUri)
-        env_workgroup = {}
-        boto3_session = SessionHelper.remote_session(accountid=table.AWSAccountId)
-        creds = boto3_session.get_credentials()
-        try:
-            env_workgroup = boto3_session.client(
-                'athena', region_name=env.region
-            ).get_work_group(WorkGroup=env.EnvironmentDefaultAthenaWorkGroup)
-        except ClientError as e:
-            log.info(
-                f'Workgroup {env.EnvironmentDefaultAthenaWorkGroup} can not be found'
-                f'due to: {e}'
-            )
+        return table_preview.get_preview(session, table, env)
 
-        connection = connect(
-            aws_access_key_id=creds.access_key,
-            aws_secret_access_key=creds.secret_key,
-            aws_session_token=creds.token,
-            work_group=env_workgroup.get('WorkGroup', {}).get('Name', 'primary'),
-            s3_staging_dir=f's3://{env.EnvironmentDefaultBucketName}/preview/{dataset.datasetUri}/{table.tableUri}',
-            region_name=table.region,
-        )
-        cursor = connection.cursor()
-
-        SQL = f'select * from "{table.GlueDatabaseName}"."{table.GlueTableName}" limit 50'  # nosec
-        cursor.execute(SQL)
-        fields = []
-        for f in cursor.description:
-            fields.append(json.dumps({'name': f[0]}))
-        rows = []
-        for row in cursor:
-            rows.append(json.dumps(json_utils.to_json(list(row))))
-
-    return {'rows': rows, 'fields': fields}
+
+def resolve_preview_fields(context, source: dict, **kwargs):
+    if not source:
+        return None
+    return table_preview.preview_fields(source)
+
+
+def resolve_preview_rows(context, source: dict, **kwargs):
+    if not source:
+        return None
+    return table_preview.preview_rows(source)
 
 
 def get_glue_table_properties(context: Context, source: models.DatasetTable, **kwargs):
@@ -98,6 +98,8 @@ EnvironmentDataItemFilter = gql.InputType(
         gql.Argument('term', gql.String),
         gql.Argument('page', gql.Integer),
         gql.Argument('pageSize', gql.Integer),
+        gql.Argument('cursor', gql.String),
+        gql.Argument('countMode', gql.Ref('PaginationCountMode')),
     ],
 )
 
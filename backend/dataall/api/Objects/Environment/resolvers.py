@@ -5,7 +5,6 @@ import os
 import boto3
 from botocore.config import Config
 from botocore.exceptions import ClientError
-from sqlalchemy import and_
 
 from ..Organization.resolvers import *
 from ..Stack import stack_helper
@@ -301,18 +300,12 @@ def resolve_user_role(context: Context, source: models.Environment):
     elif source.SamlGroupName in context.groups:
         return EnvironmentPermission.Admin.value
     else:
+        # invited groups hold a policy on the environment, the permissions of
+        # listed environments are prefetched with the page
         with context.engine.scoped_session() as session:
-            env_group = (
-                session.query(models.EnvironmentGroup)
-                .filter(
-                    and_(
-                        models.EnvironmentGroup.environmentUri == source.environmentUri,
-                        models.EnvironmentGroup.groupUri.in_(context.groups),
-                    )
-                )
-                .first()
-            )
-            if env_group:
+            if ResourcePolicy.get_user_resource_permission_names(
+                session, context.groups, source.environmentUri
+            ):
                 return EnvironmentPermission.Invited.value
     return EnvironmentPermission.NotInvited.value
 
@@ -377,6 +370,7 @@ def _get_environment_group_aws_session(
             aws_session = SessionHelper.get_session(
                 base_session=pivot_session,
                 role_arn=environment.EnvironmentDefaultIAMRoleArn,
+                use_cache=False,
             )
         else:
             raise exceptions.UnauthorizedOperation(
@@ -401,6 +395,7 @@ def _get_environment_group_aws_session(
             aws_session = SessionHelper.get_session(
                 base_session=pivot_session,
                 role_arn=env_group.environmentIAMRoleArn,
+                use_cache=False,
             )
         if not aws_session:
             raise exceptions.AWSResourceNotFound(
@@ -87,6 +87,8 @@ TermFilter = gql.InputType(
         gql.Argument(name='term', type=gql.String),
         gql.Argument(name='page', type=gql.Integer),
         gql.Argument(name='pageSize', type=gql.Integer),
+        gql.Argument(name='cursor', type=gql.String),
+        gql.Argument(name='countMode', type=gql.Ref('PaginationCountMode')),
     ],
 )
 
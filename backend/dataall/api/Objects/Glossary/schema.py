@@ -20,6 +20,8 @@ GlossaryChildrenSearchResult = gql.ObjectType(
         gql.Field(name='pages', type=gql.Integer),
         gql.Field(name='hasNext', type=gql.Boolean),
         gql.Field(name='hasPrevious', type=gql.Boolean),
+        gql.Field(name='cursor', type=gql.String),
+        gql.Field(name='nextCursor', type=gql.String),
         gql.Field(name='nodes', type=gql.ArrayType(gql.Ref('GlossaryNode'))),
     ],
 )
@@ -219,16 +219,13 @@ def map_aws_details_to_model(aws_cluster_details, cluster):
 def get_cluster_organization(context: Context, source: models.RedshiftCluster):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        org = session.query(models.Organization).get(source.organizationUri)
-    return org
+    return context.loaders.organization.load(source.organizationUri)
 
 
 def get_cluster_environment(context: Context, source: models.RedshiftCluster):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        return db.api.Environment.get_environment_by_uri(session, source.environmentUri)
+    return context.loaders.environment.load(source.environmentUri)
 
 
 def delete(
@@ -358,6 +355,7 @@ def get_console_access(context: Context, source, clusterUri: str = None):
         aws_session = SessionHelper.get_session(
             base_session=pivot_session,
             role_arn=environment.EnvironmentDefaultIAMRoleArn,
+            use_cache=False,
         )
         url = SessionHelper.get_console_access_url(
             aws_session, region=cluster.region, redshiftcluster=cluster.name
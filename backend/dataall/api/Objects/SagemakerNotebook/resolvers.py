@@ -184,8 +184,7 @@ def delete_notebook(
 def resolve_environment(context, source, **kwargs):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        return session.query(models.Environment).get(source.environmentUri)
+    return context.loaders.environment.load(source.environmentUri)
 
 
 def resolve_organization(context, source, **kwargs):
@@ -214,38 +214,36 @@ def get_share_object(context, source, shareUri: str = None):
 def resolve_user_role(context: Context, source: models.ShareObject, **kwargs):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        dataset: models.Dataset = session.query(models.Dataset).get(source.datasetUri)
-        if dataset and dataset.stewards in context.groups:
-            return ShareObjectPermission.Approvers.value
-        if (
-            source.owner == context.username
-            or source.principalId in context.groups
-            or dataset.owner == context.username
-            or dataset.SamlAdminGroupName in context.groups
-        ):
-            return ShareObjectPermission.Requesters.value
-        else:
-            return ShareObjectPermission.NoPermission.value
+    dataset: models.Dataset = context.loaders.dataset.load(source.datasetUri)
+    if dataset and dataset.stewards in context.groups:
+        return ShareObjectPermission.Approvers.value
+    if (
+        source.owner == context.username
+        or source.principalId in context.groups
+        or dataset.owner == context.username
+        or dataset.SamlAdminGroupName in context.groups
+    ):
+        return ShareObjectPermission.Requesters.value
+    else:
+        return ShareObjectPermission.NoPermission.value
 
 
 def resolve_dataset(context: Context, source: models.ShareObject, **kwargs):
     if not source:
         return None
-    with context.engine.scoped_session() as session:
-        ds: models.Dataset = session.query(models.Dataset).get(source.datasetUri)
-        if ds:
-            org: models.Organization = session.query(models.Organization).get(
-                ds.organizationUri
-            )
-            return {
-                'datasetUri': source.datasetUri,
-                'datasetName': ds.name if ds else 'NotFound',
-                'datasetOrganizationUri': ds.organizationUri if ds else 'NotFound',
-                'businessOwnerEmail': ds.businessOwnerEmail,
-                'datasetOrganizationName': org.name if org else 'NotFound',
-                'exists': True if ds else False,
-            }
+    ds: models.Dataset = context.loaders.dataset.load(source.datasetUri)
+    if ds:
+        org: models.Organization = context.loaders.organization.load(
+            ds.organizationUri
+        )
+        return {
+            'datasetUri': source.datasetUri,
+            'datasetName': ds.name if ds else 'NotFound',
+            'datasetOrganizationUri': ds.organizationUri if ds else 'NotFound',
+            'businessOwnerEmail': ds.businessOwnerEmail,
+            'datasetOrganizationName': org.name if org else 'NotFound',
+            'exists': True if ds else False,
+        }
 
 
 def union_resolver(object, *_):
@@ -11,11 +11,9 @@ from ....utils import Parameter
 
 
 def get_stack_with_cfn_resources(context: Context, targetUri: str, environmentUri: str):
+    env: models.Environment = context.loaders.environment.load(environmentUri)
+    stack: models.Stack = context.loaders.stack.load(targetUri)
     with context.engine.scoped_session() as session:
-        env: models.Environment = session.query(models.Environment).get(environmentUri)
-        stack: models.Stack = db.api.Stack.find_stack_by_target_uri(
-            session, target_uri=targetUri
-        )
         if not stack:
             stack = models.Stack(
                 stack='environment',
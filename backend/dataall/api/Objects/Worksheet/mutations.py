@@ -57,3 +57,15 @@ deleteWorksheet = gql.MutationField(
     ],
     type=gql.Boolean,
 )
+
+startAthenaSqlQuery = gql.MutationField(
+    name='startAthenaSqlQuery',
+    type=gql.Ref('AthenaQueryResult'),
+    args=[
+        gql.Argument(name='environmentUri', type=gql.NonNullableType(gql.String)),
+        gql.Argument(name='worksheetUri', type=gql.NonNullableType(gql.String)),
+        gql.Argument(name='sqlQuery', type=gql.NonNullableType(gql.String)),
+        gql.Argument(name='useCache', type=gql.Boolean),
+    ],
+    resolver=start_sql_query,
+)
@@ -25,6 +25,22 @@ runAthenaSqlQuery = gql.QueryField(
         gql.Argument(name='environmentUri', type=gql.NonNullableType(gql.String)),
         gql.Argument(name='worksheetUri', type=gql.NonNullableType(gql.String)),
         gql.Argument(name='sqlQuery', type=gql.NonNullableType(gql.String)),
+        gql.Argument(name='pageSize', type=gql.Integer),
+        gql.Argument(name='useCache', type=gql.Boolean),
     ],
     resolver=run_sql_query,
 )
+
+
+getAthenaSqlQueryResults = gql.QueryField(
+    name='getAthenaSqlQueryResults',
+    type=gql.Ref('AthenaQueryResult'),
+    args=[
+        gql.Argument(name='environmentUri', type=gql.NonNullableType(gql.String)),
+        gql.Argument(name='worksheetUri', type=gql.NonNullableType(gql.String)),
+        gql.Argument(name='athenaQueryId', type=gql.NonNullableType(gql.String)),
+        gql.Argument(name='nextToken', type=gql.String),
+        gql.Argument(name='pageSize', type=gql.Integer),
+    ],
+    resolver=get_sql_query_results,
+)
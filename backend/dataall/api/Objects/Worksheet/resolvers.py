@@ -1,7 +1,8 @@
 from sqlalchemy import and_
 
 from .... import db
-from ..AthenaQueryResult import helpers as athena_helpers
+from ..AthenaQueryResult import cache as athena_cache, helpers as athena_helpers
+from ..AthenaQueryResult.wrapper import AthenaQueryResultStatus
 from ....api.constants import WorksheetRole
 from ....api.context import Context
 from ....db import paginate, exceptions, permissions, models
@@ -134,9 +135,7 @@ def resolve_shares(context: Context, source: models.Worksheet, filter: dict = No
     ).to_dict()
 
 
-def run_sql_query(
-    context: Context, source, environmentUri: str = None, worksheetUri: str = None, sqlQuery: str = None
-):
+def _worksheet_query_context(context: Context, environmentUri, worksheetUri):
     with context.engine.scoped_session() as session:
         ResourcePolicy.check_user_resource_permission(
             session=session,
@@ -151,10 +150,121 @@ def run_sql_query(
         env_group = db.api.Environment.get_environment_group(
             session, worksheet.SamlAdminGroupName, environment.environmentUri
         )
+    return environment, env_group
+
+
+def _check_query_failure(result: dict) -> dict:
+    """Raises the Athena error of a failed or cancelled query, e.g. a syntax
+    error or a denied access, so that it reaches the worksheet as an API error"""
+    if result['Status'] in [
+        AthenaQueryResultStatus.FAILED.value,
+        AthenaQueryResultStatus.CANCELLED.value,
+    ]:
+        raise exceptions.AWSResourceNotAvailable(
+            action='RUN_ATHENA_QUERY',
+            message=result.get('Error')
+            or f'Query {result["AthenaQueryId"]} is {result["Status"]}',
+        )
+    return result
+
+
+def _run_sql_query(
+    context: Context,
+    environmentUri,
+    worksheetUri,
+    sqlQuery,
+    pageSize=None,
+    useCache=True,
+    wait=athena_helpers.SYNC_THRESHOLD,
+):
+    environment, env_group = _worksheet_query_context(
+        context, environmentUri, worksheetUri
+    )
+    page_size = pageSize or athena_helpers.PAGE_SIZE
+    key = athena_cache.cache_key(
+        environment, env_group.environmentAthenaWorkGroup, sqlQuery
+    )
+    version = None
+    if useCache is not False:
+        with context.engine.scoped_session() as session:
+            version = athena_cache.data_version(session, environment, sqlQuery)
+        cached = athena_cache.get(key, version)
+        if cached:
+            result = athena_helpers.query_results(
+                athena_helpers.athena_client(environment, env_group),
+                cached['AthenaQueryId'],
+                page_size=page_size,
+            )
+            if result['Status'] == AthenaQueryResultStatus.SUCCEEDED.value:
+                result['cached'] = True
+                return result
+
+    result = athena_helpers.run_query_with_role(
+        environment=environment,
+        environment_group=env_group,
+        sql=sqlQuery,
+        page_size=page_size,
+        wait=wait,
+    )
+    if result['Status'] == AthenaQueryResultStatus.SUCCEEDED.value:
+        athena_cache.put(key, version, result['AthenaQueryId'])
+    elif result['Status'] not in athena_helpers.FINISHED:
+        athena_cache.put_running(key, version, result['AthenaQueryId'])
+    return _check_query_failure(result)
 
-    return athena_helpers.run_query_with_role(
-        environment=environment, environment_group=env_group, sql=sqlQuery
+
+def run_sql_query(
+    context: Context,
+    source,
+    environmentUri: str = None,
+    worksheetUri: str = None,
+    sqlQuery: str = None,
+    pageSize: int = None,
+    useCache: bool = True,
+):
+    """Runs a query and returns its first page of results, or its status
+    when it runs longer than the sync threshold"""
+    return _run_sql_query(
+        context, environmentUri, worksheetUri, sqlQuery, pageSize, useCache
+    )
+
+
+def start_sql_query(
+    context: Context,
+    source,
+    environmentUri: str = None,
+    worksheetUri: str = None,
+    sqlQuery: str = None,
+    useCache: bool = True,
+):
+    """Starts a query without waiting, its results are polled with
+    getAthenaSqlQueryResults"""
+    return _run_sql_query(
+        context, environmentUri, worksheetUri, sqlQuery, useCache=useCache, wait=0
+    )
+
+
+def get_sql_query_results(
+    context: Context,
+    source,
+    environmentUri: str = None,
+    worksheetUri: str = None,
+    athenaQueryId: str = None,
+    nextToken: str = None,
+    pageSize: int = None,
+):
+    environment, env_group = _worksheet_query_context(
+        context, environmentUri, worksheetUri
+    )
+    result = athena_helpers.query_results(
+        athena_helpers.athena_client(environment, env_group),
+        athenaQueryId,
+        page_size=pageSize or athena_helpers.PAGE_SIZE,
+        next_token=nextToken,
     )
+    if result['Status'] == AthenaQueryResultStatus.SUCCEEDED.value:
+        athena_cache.complete(athenaQueryId)
+    return _check_query_failure(result)
 
 
 def delete_worksheet(context, source, worksheetUri: str = None):
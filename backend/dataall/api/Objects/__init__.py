@@ -1,3 +1,6 @@
+import importlib
+import json
+import os
 from argparse import Namespace
 
 from ariadne import (
@@ -9,42 +12,59 @@ from ariadne import (
     gql as GQL,
     make_executable_schema,
 )
+from ariadne.enums import set_default_enum_values_on_schema
+from graphql import build_ast_schema, parse
 
 from .. import gql
 from ...api.constants import GraphQLEnumMapper
-from . import (
-    Permission,
-    DataPipeline,
-    Environment,
-    Activity,
-    DatasetTable,
-    DatasetTableColumn,
-    Dataset,
-    Group,
-    Principal,
-    Dashboard,
-    ShareObject,
-    Organization,
-    DatasetStorageLocation,
-    Stack,
-    Test,
-    SagemakerStudio,
-    RedshiftCluster,
-    DatasetProfiling,
-    Glossary,
-    AthenaQueryResult,
-    Worksheet,
-    Feed,
-    Notification,
-    Vpc,
-    Tenant,
-    SagemakerNotebook,
-    KeyValueTag,
-    Vote,
+from ...api.dataloader import DataLoaders
+from ...db.api import PermissionCache
+
+# imported by `bootstrap`, or one by one by the resolvers of a snapshot schema
+PACKAGES = [
+    'Permission',
+    'DataPipeline',
+    'Environment',
+    'Activity',
+    'DatasetTable',
+    'DatasetTableColumn',
+    'Dataset',
+    'Group',
+    'Principal',
+    'Dashboard',
+    'ShareObject',
+    'Organization',
+    'DatasetStorageLocation',
+    'Stack',
+    'Test',
+    'SagemakerStudio',
+    'RedshiftCluster',
+    'DatasetProfiling',
+    'Glossary',
+    'AthenaQueryResult',
+    'Worksheet',
+    'Feed',
+    'Notification',
+    'Vpc',
+    'Tenant',
+    'SagemakerNotebook',
+    'KeyValueTag',
+    'Vote',
+]
+
+SNAPSHOT_PATH = os.getenv(
+    'SCHEMA_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'schema.snapshot.json'),
 )
 
 
+def load_objects():
+    for name in PACKAGES:
+        importlib.import_module(f'{__name__}.{name}')
+
+
 def bootstrap():
+    load_objects()
     classes = {
         gql.ObjectType: [],
         gql.QueryField: [],
@@ -85,18 +105,26 @@ def save():
 
 def resolver_adapter(resolver):
     def adapted(obj, info, **kwargs):
-        response = resolver(
-            context=Namespace(
-                engine=info.context['engine'],
-                es=info.context['es'],
-                username=info.context['username'],
-                groups=info.context['groups'],
-                schema=info.context['schema'],
-                cdkproxyurl=info.context['cdkproxyurl'],
-            ),
-            source=obj or None,
-            **kwargs,
-        )
+        loaders = info.context.get('loaders')
+        if loaders is None:
+            loaders = info.context['loaders'] = DataLoaders(info.context['engine'])
+        # permission decisions are memoized for the whole request
+        memo = info.context.setdefault('permissions', {})
+        with PermissionCache.request_scope(memo):
+            response = resolver(
+                context=Namespace(
+                    engine=info.context['engine'],
+                    es=info.context['es'],
+                    username=info.context['username'],
+                    groups=info.context['groups'],
+                    schema=info.context['schema'],
+                    cdkproxyurl=info.context['cdkproxyurl'],
+                    loaders=loaders,
+                ),
+                source=obj or None,
+                **kwargs,
+            )
+        loaders.collect(response)
         return response
 
     return adapted
@@ -140,3 +168,128 @@ def get_executable_schema():
     type_defs = GQL(schema.gql(with_directives=False))
     executable_schema = make_executable_schema(type_defs, *(_types + _enums + _unions))
     return executable_schema
+
+
+def _resolver_path(resolver, type_name, field_name):
+    """Import path of a resolver, `module:qualname` for functions and
+    `module:@Type.field` for lambdas, found in the gql registry once their
+    module is imported"""
+    if '<' in resolver.__qualname__:
+        return f'{resolver.__module__}:@{type_name}.{field_name}'
+    return f'{resolver.__module__}:{resolver.__qualname__}'
+
+
+def _import_resolver(path):
+    module_name, name = path.split(':')
+    module = importlib.import_module(module_name)
+    if not name.startswith('@'):
+        resolver = module
+        for attribute in name.split('.'):
+            resolver = getattr(resolver, attribute)
+        return resolver
+    type_name, field_name = name[1:].split('.')
+    if type_name == 'Query':
+        return gql.QueryField.get_instance(field_name).resolver
+    if type_name == 'Mutation':
+        return gql.MutationField.get_instance(field_name).resolver
+    if field_name == '__resolve_type':
+        return gql.Union.get_instance(type_name).resolver
+    return next(
+        field.resolver
+        for field in gql.ObjectType.get_instance(type_name).fields
+        if field.name == field_name
+    )
+
+
+def _lazy_resolver(path):
+    """Imports the resolver module on the first call of the field"""
+    adapted = None
+
+    def resolve(obj, info, **kwargs):
+        nonlocal adapted
+        if adapted is None:
+            adapted = resolver_adapter(_import_resolver(path))
+        return adapted(obj, info, **kwargs)
+
+    return resolve
+
+
+def save_snapshot(path=SNAPSHOT_PATH):
+    """Writes the SDL of the schema with the import paths of its resolvers,
+    enum values and union type resolvers, run when the package is built"""
+    schema = bootstrap()
+    snapshot = {
+        'sdl': schema.gql(with_directives=False),
+        'resolvers': {
+            _type.name: {
+                field.name: _resolver_path(field.resolver, _type.name, field.name)
+                for field in _type.fields
+                if field.resolver
+            }
+            for _type in schema.types
+        },
+        'enums': {
+            enum.name: {value.name: value.value for value in enum.values}
+            for enum in schema.enums
+        },
+        'unions': {
+            union.name: _resolver_path(union.resolver, union.name, '__resolve_type')
+            for union in schema.unions
+        },
+    }
+    # the SDL is validated once here instead of at every cold start
+    GQL(snapshot['sdl'])
+    with open(path, 'w') as f:
+        json.dump(snapshot, f)
+    return snapshot
+
+
+def load_executable_schema(path=SNAPSHOT_PATH):
+    """Builds the executable schema of a snapshot without importing the
+    Objects packages, each resolver module is imported on first use"""
+    with open(path) as f:
+        snapshot = json.load(f)
+    schema = build_ast_schema(
+        parse(snapshot['sdl'], no_location=True), assume_valid_sdl=True
+    )
+    bindables = []
+    for type_name, resolvers in snapshot['resolvers'].items():
+        if type_name == 'Query':
+            bindable = QueryType()
+        elif type_name == 'Mutation':
+            bindable = MutationType()
+        else:
+            bindable = ObjectType(name=type_name)
+        for field_name, resolver_path in resolvers.items():
+            bindable.field(field_name)(_lazy_resolver(resolver_path))
+        bindables.append(bindable)
+    bindables.extend(
+        EnumType(name, values) for name, values in snapshot['enums'].items()
+    )
+    bindables.extend(
+        UnionType(name, _LazyTypeResolver(resolver_path))
+        for name, resolver_path in snapshot['unions'].items()
+    )
+    for bindable in bindables:
+        bindable.bind_to_schema(schema)
+    set_default_enum_values_on_schema(schema)
+    return schema
+
+
+class _LazyTypeResolver:
+    def __init__(self, path):
+        self.path = path
+        self.resolver = None
+
+    def __call__(self, obj, *args, **kwargs):
+        if self.resolver is None:
+            self.resolver = _import_resolver(self.path)
+        return self.resolver(obj, *args, **kwargs)
+
+
+def executable_schema():
+    """The snapshot schema when the package was built with one, else the
+    schema bootstrapped from the Objects packages"""
+    if os.path.exists(SNAPSHOT_PATH):
+        return load_executable_schema(SNAPSHOT_PATH)
+    return get_executable_schema()
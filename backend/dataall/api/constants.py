@@ -223,4 +223,11 @@ class WorksheetRole(GraphQLEnumMapper):
     NoPermission = '000'
 
 
+class PaginationCountMode(GraphQLEnumMapper):
+    Exact = 'exact'
+    Cached = 'cached'
+    Estimate = 'estimate'
+    NoCount = 'none'
+
+
 GLUEBUSINESSPROPERTIES = ['EXAMPLE_GLUE_PROPERTY_TO_BE_ADDED_ON_ES']
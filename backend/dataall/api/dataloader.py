@@ -0,0 +1,155 @@
+import logging
+import typing
+
+from ..db import Base, models
+
+log = logging.getLogger(__name__)
+
+
+class DataLoader:
+    """Batches lookups of one model by a key column for the duration of a request.
+
+    Keys are queued when parent objects are resolved (see `DataLoaders.collect`)
+    and fetched with a single `IN (...)` query on the first `load` that misses
+    the per-request identity cache.
+    """
+
+    def __init__(
+        self,
+        engine,
+        model,
+        key: str = None,
+        many: bool = False,
+        sources: typing.Dict[type, str] = None,
+    ):
+        self.engine = engine
+        self.model = model
+        self.key = key or model.__mapper__.primary_key[0].name
+        self.many = many
+        self.sources = sources
+        self.primary = self.key == model.__mapper__.primary_key[0].name
+        self._cache = {}
+        self._queue = set()
+
+    def queue(self, keys: typing.Iterable[str]):
+        for key in keys:
+            if key and key not in self._cache:
+                self._queue.add(key)
+
+    def prime(self, key, value):
+        if key and key not in self._cache:
+            self._cache[key] = value
+            self._queue.discard(key)
+
+    def load(self, key):
+        if not key:
+            return [] if self.many else None
+        if key not in self._cache:
+            self._queue.add(key)
+            self.dispatch()
+        return self._cache.get(key)
+
+    def load_many(self, keys: typing.List[str]) -> list:
+        self.queue(keys)
+        if self._queue:
+            self.dispatch()
+        return [self._cache.get(key) for key in keys]
+
+    def dispatch(self):
+        keys = list(self._queue)
+        self._queue.clear()
+        if not keys:
+            return
+        column = getattr(self.model, self.key)
+        with self.engine.scoped_session() as session:
+            rows = session.query(self.model).filter(column.in_(keys)).all()
+        log.debug(f'{self.model.__name__} loader fetched {len(rows)} rows for {len(keys)} keys')
+        for key in keys:
+            self._cache[key] = [] if self.many else None
+        for row in rows:
+            key = getattr(row, self.key)
+            if self.many:
+                self._cache[key].append(row)
+            elif self._cache[key] is None:
+                self._cache[key] = row
+
+    def collect(self, obj):
+        if self.primary and isinstance(obj, self.model):
+            self.prime(getattr(obj, self.key), obj)
+            return
+        if self.sources is None:
+            attribute = self.key
+        else:
+            attribute = next(
+                (a for m, a in self.sources.items() if isinstance(obj, m)), None
+            )
+        if attribute and hasattr(obj, attribute):
+            self.queue([getattr(obj, attribute)])
+
+
+class DataLoaders:
+    """Request-scoped registry of loaders, stored in the GraphQL context"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.dataset = DataLoader(engine, models.Dataset)
+        self.environment = DataLoader(engine, models.Environment)
+        self.organization = DataLoader(engine, models.Organization)
+        self.dataset_shares = DataLoader(
+            engine,
+            models.ShareObject,
+            key='datasetUri',
+            many=True,
+            sources={models.Dataset: 'datasetUri'},
+        )
+        self.stack = DataLoader(
+            engine,
+            models.Stack,
+            key='targetUri',
+            sources={
+                models.Dataset: 'datasetUri',
+                models.Environment: 'environmentUri',
+                models.DataPipeline: 'DataPipelineUri',
+                models.RedshiftCluster: 'clusterUri',
+                models.SagemakerNotebook: 'notebookUri',
+                models.SagemakerStudioUserProfile: 'sagemakerStudioUserProfileUri',
+            },
+        )
+        self.dataset_statistics = DataLoader(
+            engine,
+            models.DatasetStatistics,
+            sources={models.Dataset: 'datasetUri'},
+        )
+        self._loaders = [
+            self.dataset,
+            self.environment,
+            self.organization,
+            self.dataset_shares,
+            self.stack,
+            self.dataset_statistics,
+        ]
+
+    def model(self, model) -> DataLoader:
+        """Returns the primary key loader of any model, creating it on first use"""
+        loader = next(
+            (loader for loader in self._loaders if loader.model is model and loader.primary),
+            None,
+        )
+        if not loader:
+            loader = DataLoader(self.engine, model)
+            self._loaders.append(loader)
+        return loader
+
+    def collect(self, result):
+        """Queues the keys referenced by a resolver result for batched loading"""
+        if isinstance(result, dict):
+            result = result.get('nodes')
+        if isinstance(result, Base):
+            result = [result]
+        if not isinstance(result, (list, tuple)):
+            return
+        for obj in result:
+            if not isinstance(obj, Base):
+                continue
+            for loader in self._loaders:
+                loader.collect(obj)
@@ -0,0 +1,246 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+import botocore.session
+from ariadne.types import ExtensionSync
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+# instrumentation is opt-in, it costs a timer per resolved field and statement
+ENABLED = os.getenv('GRAPHQL_INSTRUMENTATION', 'false').lower() == 'true'
+# adds the request metrics to the `extensions` block of the GraphQL response
+RETURN_EXTENSIONS = (
+    os.getenv('GRAPHQL_INSTRUMENTATION_EXTENSIONS', 'false').lower() == 'true'
+)
+# statements slower than this are sampled in the request log
+SLOW_QUERY_MS = float(os.getenv('GRAPHQL_SLOW_QUERY_MS', 100))
+MAX_SLOW_QUERIES = 5
+# resolvers reported per request, the slowest first
+MAX_RESOLVERS = 20
+NAMESPACE = 'dataall'
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_installed = False
+_install_lock = threading.Lock()
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class RequestMetrics:
+    """Resolver, SQL and AWS API timings of a GraphQL request.
+
+    SQL statements are also counted on the resolver running them, a field
+    with as many statements as calls is an N+1 candidate.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.operation = None
+        self.resolvers = {}
+        self.running = []
+        self.sql = {'count': 0, 'time': 0.0}
+        self.slow_queries = []
+        self.aws = {}
+
+    def resolver(self, key):
+        return self.resolvers.setdefault(
+            key, {'calls': 0, 'time': 0.0, 'max': 0.0, 'sql': 0}
+        )
+
+    def record_resolver(self, key, elapsed):
+        stats = self.resolver(key)
+        stats['calls'] += 1
+        stats['time'] += elapsed
+        stats['max'] = max(stats['max'], elapsed)
+
+    def record_statement(self, statement, elapsed):
+        self.sql['count'] += 1
+        self.sql['time'] += elapsed
+        if self.running:
+            self.resolver(self.running[-1])['sql'] += 1
+        if _ms(elapsed) >= SLOW_QUERY_MS:
+            self.slow_queries.append(
+                {
+                    'statement': ' '.join(statement.split())[:500],
+                    'resolver': self.running[-1] if self.running else None,
+                    'ms': _ms(elapsed),
+                }
+            )
+            self.slow_queries.sort(key=lambda sample: -sample['ms'])
+            del self.slow_queries[MAX_SLOW_QUERIES:]
+
+    def record_aws_call(self, operation, elapsed):
+        stats = self.aws.setdefault(operation, {'calls': 0, 'time': 0.0})
+        stats['calls'] += 1
+        stats['time'] += elapsed
+
+    def summary(self) -> dict:
+        resolvers = sorted(
+            self.resolvers.items(), key=lambda item: -item[1]['time']
+        )[:MAX_RESOLVERS]
+        return {
+            'operation': self.operation,
+            'duration': _ms(time.perf_counter() - self.started),
+            'resolvers': {
+                key: {
+                    'calls': stats['calls'],
+                    'time': _ms(stats['time']),
+                    'max': _ms(stats['max']),
+                    'sql': stats['sql'],
+                }
+                for key, stats in resolvers
+            },
+            'sql': {'count': self.sql['count'], 'time': _ms(self.sql['time'])},
+            'slowQueries': self.slow_queries,
+            'aws': {
+                key: {'calls': stats['calls'], 'time': _ms(stats['time'])}
+                for key, stats in self.aws.items()
+            },
+        }
+
+
+def emf(summary: dict) -> dict:
+    """CloudWatch embedded metric format record of a request summary"""
+    return {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [
+                {
+                    'Namespace': NAMESPACE,
+                    'Dimensions': [['Operation']],
+                    'Metrics': [
+                        {'Name': 'Duration', 'Unit': 'Milliseconds'},
+                        {'Name': 'SqlStatements', 'Unit': 'Count'},
+                        {'Name': 'SqlTime', 'Unit': 'Milliseconds'},
+                        {'Name': 'AwsCalls', 'Unit': 'Count'},
+                    ],
+                }
+            ],
+        },
+        'Operation': summary['operation'] or 'anonymous',
+        'Duration': summary['duration'],
+        'SqlStatements': summary['sql']['count'],
+        'SqlTime': summary['sql']['time'],
+        'AwsCalls': sum(stats['calls'] for stats in summary['aws'].values()),
+        'metrics': summary,
+    }
+
+
+class RequestInstrumentation(ExtensionSync):
+    """Ariadne extension recording the metrics of a request, which are
+    logged as an EMF record when the request finishes"""
+
+    def __init__(self):
+        self.metrics = RequestMetrics()
+        self.token = None
+
+    def request_started(self, context):
+        self.token = _current.set(self.metrics)
+
+    def request_finished(self, context):
+        if self.token:
+            _current.reset(self.token)
+        print(json.dumps(emf(self.summary(context)), default=str))
+
+    def summary(self, context) -> dict:
+        summary = self.metrics.summary()
+        engine = context.get('engine') if isinstance(context, dict) else None
+        if engine is not None:
+            summary['pool'] = engine.pool_stats()
+        return summary
+
+    def resolve(self, next_, parent, info, **kwargs):
+        if self.metrics.operation is None and info.operation.name:
+            self.metrics.operation = info.operation.name.value
+        # fields without resolver return an attribute of their parent
+        if info.parent_type.fields[info.field_name].resolve is None:
+            return next_(parent, info, **kwargs)
+        key = f'{info.parent_type.name}.{info.field_name}'
+        self.metrics.running.append(key)
+        started = time.perf_counter()
+        try:
+            return next_(parent, info, **kwargs)
+        finally:
+            self.metrics.record_resolver(key, time.perf_counter() - started)
+            self.metrics.running.pop()
+
+    def format(self, context):
+        if RETURN_EXTENSIONS:
+            return {'instrumentation': self.summary(context)}
+        return None
+
+
+def current() -> RequestMetrics:
+    """Metrics of the request being processed, None outside of a request"""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('instrumentation_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current.get()
+    started = conn.info.get('instrumentation_started')
+    if metrics is not None and started:
+        metrics.record_statement(statement, time.perf_counter() - started.pop())
+
+
+def _before_aws_call(model, context, **kwargs):
+    if _current.get() is not None:
+        context['instrumentation_started'] = time.perf_counter()
+
+
+def _after_aws_call(model, context, **kwargs):
+    metrics = _current.get()
+    started = context.get('instrumentation_started')
+    if metrics is not None and started:
+        metrics.record_aws_call(
+            f'{model.service_model.service_name}.{model.name}',
+            time.perf_counter() - started,
+        )
+
+
+def _instrument_clients(create_client):
+    @wraps(create_client)
+    def create_instrumented_client(*args, **kwargs):
+        client = create_client(*args, **kwargs)
+        client.meta.events.register('before-call.*.*', _before_aws_call)
+        client.meta.events.register('after-call.*.*', _after_aws_call)
+        return client
+
+    return create_instrumented_client
+
+
+def install():
+    """Registers the SQLAlchemy engine listeners and the boto3 call hooks of
+    the clients created from now on, once per process"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        botocore.session.Session.create_client = _instrument_clients(
+            botocore.session.Session.create_client
+        )
+        _installed = True
+
+
+def extensions() -> list:
+    """Extensions of the GraphQL requests, empty unless instrumentation is
+    enabled"""
+    if not ENABLED:
+        return []
+    install()
+    return [RequestInstrumentation]
@@ -1,4 +1,5 @@
 import logging
+import os
 
 from botocore.exceptions import ClientError
 
@@ -6,8 +7,11 @@ from .service_handlers import Worker
 from .sts import SessionHelper
 from ... import db
 from ...db import models
+from ...searchproxy import LazyConnection, indexers
 
 log = logging.getLogger('aws:glue')
+# reindexes the synchronized tables, connects on the first synchronization
+ES = LazyConnection(envname=os.getenv('envname', 'local'))
 
 
 class Glue:
@@ -77,17 +81,35 @@ class Glue:
     @staticmethod
     @Worker.handler(path='glue.dataset.database.tables')
     def list_tables(engine, task: models.Task):
+        """Synchronizes the dataset tables with Glue and reindexes the changed
+        ones, reporting the tables discovered, added, updated and deleted"""
         with engine.scoped_session() as session:
             dataset: models.Dataset = db.api.Dataset.get_dataset_by_uri(
                 session, task.targetUri
             )
-            accountid = dataset.AwsAccountId
-            region = dataset.region
+            datasetUri = dataset.datasetUri
             tables = Glue.list_glue_database_tables(
-                accountid, dataset.GlueDatabaseName, region
+                dataset.AwsAccountId, dataset.GlueDatabaseName, dataset.region
             )
-            db.api.DatasetTable.sync(session, dataset.datasetUri, glue_tables=tables)
-            return tables
+            Worker.report_progress(
+                session, task.taskUri, {'tablesDiscovered': len(tables)}
+            )
+            summary = db.api.DatasetTable.sync(session, datasetUri, glue_tables=tables)
+            progress = {
+                'tablesDiscovered': summary['discovered'],
+                'tablesAdded': len(summary['added']),
+                'tablesUpdated': len(summary['updated']),
+                'tablesDeleted': len(summary['deleted']),
+            }
+            Worker.report_progress(session, task.taskUri, progress)
+            report = indexers.reindex_synced_tables(
+                session,
+                ES,
+                datasetUri,
+                tableUris=summary['added'] + summary['updated'],
+                deletedTableUris=summary['deleted'],
+            )
+            return {**progress, 'tablesIndexingErrors': len(report['errors'])}
 
     @staticmethod
     def list_glue_database_tables(accountid, database, region):
@@ -647,6 +669,63 @@ class Glue:
             log.error(f'Failed to get job run {run_id} due to: {e}')
             raise e
 
+    @staticmethod
+    def batch_grant_principals_all_table_permissions(
+        tables: [models.DatasetTable], principals: [str], client=None
+    ):
+        """
+        Update the permissions of many tables on Lake Formation
+        with batch_grant_permissions, 20 grants per call
+        :param tables:
+        :param principals:
+        :param client:
+        :return: list of failed grants
+        """
+        if not tables:
+            return []
+        if not client:
+            client = SessionHelper.remote_session(tables[0].AWSAccountId).client(
+                'lakeformation', region_name=tables[0].region
+            )
+        entries = [
+            dict(
+                Id=str(index),
+                Principal={'DataLakePrincipalIdentifier': principal},
+                Resource={
+                    'Table': {
+                        'DatabaseName': table.GlueDatabaseName,
+                        'Name': table.name,
+                    }
+                },
+                Permissions=['ALL'],
+            )
+            for index, (table, principal) in enumerate(
+                [(table, principal) for table in tables for principal in principals]
+            )
+        ]
+        failures = []
+        for i in range(0, len(entries), 20):
+            try:
+                response = client.batch_grant_permissions(Entries=entries[i : i + 20])
+                failures.extend(response.get('Failures', []))
+            except ClientError as e:
+                log.error(
+                    f'Failed to grant principals {principals} all permissions on '
+                    f'{len(entries[i : i + 20])} tables of '
+                    f'aws://{tables[0].AWSAccountId}/{tables[0].GlueDatabaseName}: {e}'
+                )
+                failures.extend(
+                    {'RequestEntry': entry, 'Error': {'ErrorMessage': str(e)}}
+                    for entry in entries[i : i + 20]
+                )
+        for failure in failures:
+            log.error(
+                f'Failed to grant all permissions on table '
+                f'{failure["RequestEntry"]["Resource"]["Table"]} to '
+                f'{failure["RequestEntry"]["Principal"]}: {failure.get("Error")}'
+            )
+        return failures
+
     @staticmethod
     def grant_principals_all_table_permissions(
         table: models.DatasetTable, principals: [str], client=None
@@ -1,5 +1,8 @@
 import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from botocore.exceptions import ClientError
@@ -9,11 +12,26 @@ from .service_handlers import Worker
 from .sts import SessionHelper
 from ... import db
 from ...db import models
+from ...utils import TTLCache
 
 log = logging.getLogger(__name__)
 
+# seconds a task waits for its statements before reporting them as failed
+STATEMENT_TIMEOUT = float(os.getenv('REDSHIFT_STATEMENT_TIMEOUT_SECONDS', 600))
+# clusters of an environment loaded concurrently
+MAX_WORKERS = int(os.getenv('REDSHIFT_COPY_MAX_WORKERS', 8))
+POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 5
+FINISHED = ['FINISHED', 'FAILED', 'ABORTED']
+
+
+class RedshiftStatementError(Exception):
+    pass
+
 
 class Redshift:
+    clients = TTLCache(ttl=int(os.getenv('REDSHIFT_CLIENT_CACHE_TTL', 900)))
+
     def __init__(self):
         pass
 
@@ -125,37 +143,97 @@ class Redshift:
             raise e
 
     @staticmethod
-    def run_query(**data):
-
-        log.info(f"Starting query run: {data.get('sql_query')}")
+    def data_client(accountid, region):
+        """Redshift Data API client of the pivot role, reused across statements"""
+        return Redshift.clients.get_or_set(
+            (accountid, region),
+            lambda: SessionHelper.remote_session(accountid).client(
+                'redshift-data', region_name=region
+            ),
+        )
 
-        accountid = data['accountid']
-        region = data.get('region', 'eu-west-1')
+    @staticmethod
+    def default_database(accountid, region, cluster_id):
         session = SessionHelper.remote_session(accountid)
         client_redshift = session.client('redshift', region_name=region)
-        client_redshift_data = session.client('redshift-data', region_name=region)
+        response = client_redshift.describe_clusters(
+            ClusterIdentifier=cluster_id, MaxRecords=100
+        )
+        return response.get('Clusters')[0].get('DBName')
+
+    @staticmethod
+    def run_query(**data):
+
+        log.info(f"Starting query run: {data.get('sql_query')}")
         try:
-            response = client_redshift.describe_clusters(
-                ClusterIdentifier=data['cluster_id'], MaxRecords=100
-            )
-            cluster = response.get('Clusters')[0]
-            database = data.get('database', cluster.get('DBName'))
-            statement = dict(
-                ClusterIdentifier=data['cluster_id'],
-                Database=database,
-                Sql=data.get('sql_query'),
-                WithEvent=data.get('with_event', False),
-            )
-            if data.get('dbuser'):
-                statement['DbUser'] = data.get('dbuser')
-            else:
-                statement['SecretArn'] = data['secret_arn']
-            response = client_redshift_data.execute_statement(**statement)
+            response = Redshift.execute_statements(
+                **{**data, 'statements': [data.get('sql_query')], 'wait': False}
+            )
             log.info(f'Ran query successfully {response}')
+            return response
         except ClientError as e:
             log.error(e, exc_info=True)
             raise e
 
+    @staticmethod
+    def execute_statements(**data):
+        """Runs `statements` on a cluster through the Data API.
+
+        Several statements are sent with one batch_execute_statement call and
+        run in a single transaction. With `wait` the statement is polled until
+        it finishes and a RedshiftStatementError is raised if it failed,
+        otherwise it returns as soon as the statement is submitted.
+        """
+        accountid = data['accountid']
+        region = data.get('region', 'eu-west-1')
+        statements = data['statements']
+        client = Redshift.data_client(accountid, region)
+        statement = dict(
+            ClusterIdentifier=data['cluster_id'],
+            Database=data.get('database')
+            or Redshift.default_database(accountid, region, data['cluster_id']),
+            WithEvent=data.get('with_event', False),
+        )
+        if data.get('dbuser'):
+            statement['DbUser'] = data.get('dbuser')
+        else:
+            statement['SecretArn'] = data['secret_arn']
+        if len(statements) == 1:
+            response = client.execute_statement(Sql=statements[0], **statement)
+        else:
+            response = client.batch_execute_statement(Sqls=statements, **statement)
+        if not data.get('wait', True):
+            return {'Id': response['Id'], 'Status': 'SUBMITTED'}
+        result = Redshift.wait_for_statement(
+            client, response['Id'], data.get('timeout', STATEMENT_TIMEOUT)
+        )
+        if result['Status'] != 'FINISHED':
+            raise RedshiftStatementError(
+                f"Statement {result['Id']} on cluster {data['cluster_id']} "
+                f"is {result['Status']}: {result.get('Error')}"
+            )
+        return result
+
+    @staticmethod
+    def wait_for_statement(client, statement_id, timeout=STATEMENT_TIMEOUT):
+        """Polls describe_statement with a growing interval until the statement
+        finishes or `timeout` seconds have passed"""
+        deadline = time.monotonic() + timeout
+        interval = POLL_INTERVAL
+        while True:
+            response = client.describe_statement(Id=statement_id)
+            if response['Status'] in FINISHED or time.monotonic() > deadline:
+                # Duration is in nanoseconds, -1 until the statement ran
+                duration = response.get('Duration', -1)
+                return {
+                    'Id': statement_id,
+                    'Status': response['Status'],
+                    'Error': response.get('Error'),
+                    'DurationInMs': duration // 1000000 if duration >= 0 else None,
+                }
+            time.sleep(interval)
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+
     @staticmethod
     @Worker.handler(path='redshift.cluster.init_database')
     def init_datahub_db(engine, task: models.Task):
@@ -486,6 +564,8 @@ class Redshift:
             )
             log.info(f'DDL Columns: {ddl_columns}')
 
+            table_name = table.GlueTableName
+            loads = []
             for cluster in env_clusters:
                 cluster_dataset_table = (
                     db.api.RedshiftCluster.get_cluster_dataset_table(
@@ -497,51 +577,69 @@ class Redshift:
                         f'Cluster {cluster}|{environment.AwsAccountId} '
                         f'copy from {dataset.name} for table {table.GlueTableName} is enabled'
                     )
-                    queries = list()
-                    queries.append(
-                        f'CREATE SCHEMA IF NOT EXISTS {cluster_dataset_table.schema}'
-                    )
-                    queries.append(
-                        f'GRANT ALL ON SCHEMA {cluster_dataset_table.schema} TO {cluster.databaseUser}'
-                    )
-                    queries.append(
-                        f'GRANT ALL ON SCHEMA {cluster_dataset_table.schema} TO GROUP PUBLIC'
-                    )
-                    queries.append(
-                        Redshift.get_create_table_statement(
-                            cluster_dataset_table.schema,
-                            table.GlueTableName,
-                            ddl_columns,
-                        )
-                    )
-                    queries.append(
-                        f'GRANT ALL ON TABLE {cluster_dataset_table.schema}.{table.GlueTableName} TO {cluster.databaseUser}'
-                    )
-                    queries.append(
-                        f'GRANT ALL ON TABLE {cluster_dataset_table.schema}.{table.GlueTableName} TO GROUP PUBLIC'
+                    loads.append(
+                        {
+                            'clusterUri': cluster.clusterUri,
+                            'accountid': cluster.AwsAccountId,
+                            'region': cluster.region,
+                            'cluster_id': cluster.name,
+                            'database': cluster.databaseName,
+                            'dbuser': cluster.databaseUser,
+                            'statements': Redshift.get_copy_statements(
+                                cluster_dataset_table.schema,
+                                table.GlueTableName,
+                                Redshift.get_data_prefix(cluster_dataset_table),
+                                environment.EnvironmentDefaultIAMRoleArn,
+                                ddl_columns,
+                                cluster.databaseUser,
+                            ),
+                        }
                     )
-                    data_prefix = Redshift.get_data_prefix(cluster_dataset_table)
-                    queries.extend(
-                        Redshift.get_merge_table_statements(
-                            cluster_dataset_table.schema,
-                            table.GlueTableName,
-                            data_prefix,
-                            environment.EnvironmentDefaultIAMRoleArn,
-                            ddl_columns,
-                        )
-                    )
-                    for query in queries:
-                        Redshift.run_query(
-                            **{
-                                'accountid': cluster.AwsAccountId,
-                                'region': cluster.region,
-                                'cluster_id': cluster.name,
-                                'database': cluster.databaseName,
-                                'dbuser': cluster.databaseUser,
-                                'sql_query': query,
-                            }
-                        )
-        return True
+
+        outcomes = Redshift.load_clusters(loads)
+        failed = [o for o in outcomes if o['Status'] != 'FINISHED']
+        if failed:
+            raise RedshiftStatementError(
+                f'Copy of table {table_name} failed on clusters: '
+                + ', '.join(f"{o['clusterUri']} ({o['Error']})" for o in failed)
+            )
+        return {'clusters': outcomes}
+
+    @staticmethod
+    def load_clusters(loads: [dict]) -> [dict]:
+        """Runs the statements of each load on its cluster, the clusters in
+        parallel, and returns the outcome of each load"""
+
+        def load(data):
+            outcome = {'clusterUri': data['clusterUri']}
+            try:
+                outcome.update(Redshift.execute_statements(**data))
+            except (ClientError, RedshiftStatementError) as e:
+                log.error(f"Copy on cluster {data['cluster_id']} failed: {e}")
+                outcome.update({'Status': 'FAILED', 'Error': str(e)})
+            return outcome
+
+        if len(loads) <= 1:
+            return [load(data) for data in loads]
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(loads))) as executor:
+            return list(executor.map(load, loads))
+
+    @staticmethod
+    def get_copy_statements(schema, table_name, data_prefix, iam_role_arn, columns, user):
+        """Statements refreshing a cluster table from S3, run in one transaction"""
+        statements = list()
+        statements.append(f'CREATE SCHEMA IF NOT EXISTS {schema}')
+        statements.append(f'GRANT ALL ON SCHEMA {schema} TO {user}')
+        statements.append(f'GRANT ALL ON SCHEMA {schema} TO GROUP PUBLIC')
+        statements.extend(
+            Redshift.get_merge_table_statements(
+                schema, table_name, data_prefix, iam_role_arn, columns
+            )
+        )
+        # the swap replaced the table, grants are given again
+        statements.append(f'GRANT ALL ON TABLE {schema}.{table_name} TO {user}')
+        statements.append(f'GRANT ALL ON TABLE {schema}.{table_name} TO GROUP PUBLIC')
+        return statements
 
     @staticmethod
     def get_data_prefix(table: models.RedshiftClusterDatasetTable):
@@ -586,28 +684,16 @@ class Redshift:
     def get_merge_table_statements(
         schema, table_name, data_prefix, iam_role_arn, columns
     ):
+        """Loads the data in a stage table swapped with the table, the
+        statements are meant to run in a single transaction"""
         statements = list()
+        statements.append(f'DROP TABLE IF EXISTS "{schema}"."{table_name}_stage"')
+        statements.append(f'CREATE TABLE "{schema}"."{table_name}_stage"({columns})')
         statements.append(
-            f"""CREATE TABLE "{schema}"."{table_name}_stage"({columns});"""
+            f"""COPY "{schema}"."{table_name}_stage" FROM '{data_prefix}' iam_role '{iam_role_arn}' format as parquet"""
         )
+        statements.append(f'DROP TABLE IF EXISTS "{schema}"."{table_name}"')
         statements.append(
-            f"""COPY "{schema}"."{table_name}_stage" FROM '{data_prefix}' iam_role '{iam_role_arn}' format as parquet;"""
-        )
-        statements.append(
-            f"""CREATE TABLE "{schema}"."{table_name}_stage"({columns};"""
-        )
-        statements.append(
-            f"""
-                        -- Start a new transaction
-                        begin transaction;
-
-                        drop table if exists "{schema}"."{table_name}";
-
-                        -- Insert all the rows from the staging table into the target table
-                        alter table "{schema}"."{table_name}_stage" rename to "{table_name}";
-
-                        -- End transaction and commit
-                        end transaction;
-        """
+            f'ALTER TABLE "{schema}"."{table_name}_stage" RENAME TO "{table_name}"'
         )
         return statements
@@ -1,13 +1,30 @@
+import importlib
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
+from sqlalchemy import and_
+
 from ...db.models import Task
 from ...utils.json_utils import to_json
 
 log = logging.getLogger(__name__)
 ENVNAME = os.getenv('envname', 'local')
+# tasks of a batch running concurrently, each one holds a database connection
+MAX_WORKERS = int(os.getenv('WORKER_MAX_WORKERS', 8))
+# modules registering task handlers, imported before the first batch runs
+HANDLER_MODULES = [
+    'cloudformation',
+    'codecommit',
+    'codepipeline',
+    'ecs',
+    'glue',
+    'redshift',
+    's3',
+    'sns',
+]
 
 
 class WorkerHandler:
@@ -22,6 +39,14 @@ class WorkerHandler:
     def __init__(self):
         self.handlers = {}
         self.enabled = True
+        self.handlers_loaded = False
+
+    def load_handlers(self):
+        """Imports the modules registering the task handlers, once per process"""
+        if not self.handlers_loaded:
+            for name in HANDLER_MODULES:
+                importlib.import_module(f'{__package__}.{name}')
+            self.handlers_loaded = True
 
     def queue(self, engine, task_ids: [str]):
         log.info(f'Queuing Task Ids: {task_ids}')
@@ -34,59 +59,161 @@ class WorkerHandler:
         return decorator
 
     def process(self, engine, task_ids: [str], save_response=True):
-        tasks_responses = []
-        if self.enabled:
-            for taskid in task_ids:
+        """Runs a batch of tasks and returns their responses in `task_ids` order.
+
+        Tasks are claimed with a single conditional update (pending to
+        started), so a task delivered twice only runs once. Claimed tasks run
+        on a thread pool of at most MAX_WORKERS threads, the tasks of a same
+        target sequentially on one thread, and their statuses
+        are written back together once the batch is done. Handlers open their
+        sessions from the pool threads, Engine.session() gives each thread a
+        session of its own.
+        """
+        if not self.enabled:
+            log.info(f'Worker disabled, tasks {task_ids} wont be processed')
+            return []
+        task_ids = list(dict.fromkeys(task_ids))
+        log.info(f'Processing Tasks: {task_ids}')
+        try:
+            Worker.load_handlers()
+            claimed = self.claim_tasks(engine, task_ids)
+        except Exception as e:
+            log.exception('Error in process')
+            log.error(f'Task processing failed {e} : {task_ids}')
+            return []
+        if not claimed:
+            return []
+
+        def run(claim):
+            handler, task = claim
+            error, response, status = self.handle_task(engine, task, handler)
+            return {
+                'taskUri': task.taskUri,
+                'response': response,
+                'error': error,
+                'status': status,
+            }
+
+        # tasks of a same target run one after another, in `task_ids` order
+        targets = {}
+        for claim in claimed:
+            targets.setdefault(claim[1].targetUri or claim[1].taskUri, []).append(claim)
+
+        if len(targets) == 1:
+            tasks_responses = [run(claim) for claim in claimed]
+        else:
+            # each thread holds a connection, the pool must not run out
+            max_workers = min(MAX_WORKERS, len(targets))
+            capacity = engine.pool_capacity()
+            if capacity:
+                max_workers = min(max_workers, capacity)
+
+            def run_in_pool(target_claims):
                 try:
-                    log.info(f'Processing Task: {taskid}')
-                    handler, task = self.get_task_handler(engine, taskid)
+                    return [run(claim) for claim in target_claims]
+                finally:
+                    # pool threads are reused, their session is not kept
+                    engine.remove_session()
 
-                    error, response, status = self.handle_task(engine, task, handler)
-                    if save_response:
-                        WorkerHandler.update_task(
-                            engine, taskid, error, to_json(response), status
-                        )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                responses = {
+                    r['taskUri']: r
+                    for target_responses in executor.map(
+                        run_in_pool, targets.values()
+                    )
+                    for r in target_responses
+                }
+            tasks_responses = [responses[task.taskUri] for _, task in claimed]
+            log.info(f'Database pool after batch: {engine.pool_stats()}')
 
-                    else:
-                        WorkerHandler.update_task(engine, taskid, error, {}, status)
-                    tasks_responses.append(
-                        {
-                            'taskUri': taskid,
-                            'response': response,
-                            'error': error,
-                            'status': status,
-                        }
+        statuses = []
+        for r in tasks_responses:
+            try:
+                response = to_json(r['response']) if save_response else {}
+            except Exception as e:
+                log.error(f'Could not serialize the response of task {r["taskUri"]}: {e}')
+                r.update(status='failed', error={'message': f'Invalid task response: {e}'})
+                response = {}
+            statuses.append(
+                {
+                    'taskUri': r['taskUri'],
+                    'status': r['status'],
+                    'error': r['error'],
+                    'response': response,
+                }
+            )
+        try:
+            WorkerHandler.update_tasks(engine, statuses)
+        except Exception as e:
+            log.exception('Error in process')
+            log.error(f'Failed to save the status of tasks {task_ids}: {e}')
+            # one bad row must not leave the whole batch started
+            for status in statuses:
+                try:
+                    WorkerHandler.update_task(
+                        engine,
+                        status['taskUri'],
+                        status['error'],
+                        status['response'],
+                        status['status'],
                     )
-                    return tasks_responses
                 except Exception as e:
-                    print('==================>', e)
-                    log.exception('Error in process')
-                    log.error(f'Task processing failed {e} : {taskid}')
-        else:
-            log.info(f'Worker disabled, tasks {task_ids} wont be processed')
+                    log.error(f'Failed to save the status of task {status["taskUri"]}: {e}')
+        return tasks_responses
 
-    def get_task_handler(self, engine, taskid):
+    def claim_tasks(self, engine, task_ids: [str]) -> list:
+        """Marks the pending tasks of `task_ids` that have a handler as started
+        and returns their (handler, task) pairs, skipping the others"""
         with engine.scoped_session() as session:
-            task = session.query(Task).get(taskid)
-            handler = self.handlers.get(task.action)
-            log.info(
-                f' found handler {handler} for task action {task.action}|{task.taskUri}'
-            )
-            if task.status != 'pending':
-                raise Exception(
-                    f'Could not start task {task.taskUri} as its status is {task.status}'
+            tasks = {
+                task.taskUri: task
+                for task in session.query(Task).filter(Task.taskUri.in_(task_ids))
+            }
+            runnable = []
+            for taskid in task_ids:
+                task = tasks.get(taskid)
+                if not task:
+                    log.error(f'Task {taskid} not found')
+                elif not self.handlers.get(task.action):
+                    log.error(f'No handler defined for {task.action}|{taskid}')
+                else:
+                    runnable.append(taskid)
+            if not runnable:
+                return []
+            table = Task.__table__
+            claimed = {
+                uri
+                for (uri,) in session.execute(
+                    table.update()
+                    .where(
+                        and_(
+                            table.c.taskUri.in_(runnable),
+                            table.c.status == 'pending',
+                        )
+                    )
+                    .values(status='started')
+                    .returning(table.c.taskUri)
                 )
-            if not handler:
-                raise Exception(f'No handler defined for {task.action}')
-            task.status = 'started'
+            }
             session.commit()
-        return handler, task
+        for taskid in runnable:
+            if taskid not in claimed:
+                log.error(
+                    f'Could not start task {taskid} as its status is '
+                    f'{tasks[taskid].status}'
+                )
+        return [
+            (self.handlers[tasks[taskid].action], tasks[taskid])
+            for taskid in runnable
+            if taskid in claimed
+        ]
 
     @staticmethod
     def handle_task(engine, task: Task, handler):
         error = {}
         response = {}
         try:
+            log.info(f'Running handler {handler} for task {task.action}|{task.taskUri}')
             response = handler(engine, task)
             status = 'completed'
         except Exception as e:
@@ -97,6 +224,24 @@ class WorkerHandler:
             status = 'failed'
         return error, response, status
 
+    @staticmethod
+    def update_tasks(engine, statuses: [dict]):
+        """Writes the status, error and response of several tasks at once"""
+        if not statuses:
+            return
+        with engine.scoped_session() as session:
+            session.bulk_update_mappings(Task, statuses)
+            session.commit()
+
+    @staticmethod
+    def report_progress(session, taskid, progress: dict):
+        """Publishes the intermediate response of a started task, the final
+        response replaces it when the task completes"""
+        session.query(Task).filter(
+            and_(Task.taskUri == taskid, Task.status == 'started')
+        ).update({Task.response: to_json(progress)}, synchronize_session=False)
+        session.commit()
+
     @staticmethod
     def update_task(engine, taskid, error, response, status):
         with engine.scoped_session() as session:
@@ -1,19 +1,66 @@
+import contextvars
+import hashlib
 import json
 import logging
 import os
+import threading
 import uuid
+from contextlib import contextmanager
 
-import boto3
 from botocore.exceptions import ClientError
+from sqlalchemy.orm import Session
 
-from ...utils import Parameter
+from ...db.models import Task
+from ...utils import Parameter, TTLCache, cached_client
 
 logger = logging.getLogger(__name__)
 
+# send_message_batch accepts at most 10 entries
+BATCH_SIZE = 10
+# a task is dropped when an identical one, still pending, was sent less than
+# this many seconds ago
+DEDUPE_WINDOW = int(os.getenv('SQS_DEDUPE_WINDOW_SECONDS', 60))
+DEFAULT_GROUP = 'dataall'
+
+_buffer = contextvars.ContextVar('sqs_buffer', default=None)
+
+
+class SqsSendError(Exception):
+    def __init__(self, failed: dict):
+        self.failed = failed
+        super().__init__(f'Failed to send tasks {list(failed)}')
+
+
+class LocalQueue:
+    """In-memory stand-in for the SQS client, to enqueue tasks offline"""
+
+    def __init__(self):
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def send_message_batch(self, QueueUrl, Entries):
+        with self._lock:
+            self.messages.extend(Entries)
+        return {
+            'Successful': [
+                {'Id': entry['Id'], 'MessageId': str(uuid.uuid4())}
+                for entry in Entries
+            ],
+            'Failed': [],
+        }
+
+    def receive(self) -> [[str]]:
+        """Returns and removes the task ids of all the queued messages"""
+        with self._lock:
+            messages, self.messages = self.messages, []
+        return [json.loads(message['MessageBody']) for message in messages]
+
 
 class SqsQueue:
     disabled = True
     queue_url = None
+    backend = None
+    recent = TTLCache(ttl=DEDUPE_WINDOW, maxsize=10000)
 
     @classmethod
     def configure_(cls, queue_url):
@@ -31,36 +78,217 @@ class SqsQueue:
     def enable(cls):
         cls.disabled = False
 
+    @classmethod
+    def use_backend(cls, backend):
+        """Sends messages to `backend`, e.g. a LocalQueue, instead of SQS"""
+        cls.backend = backend
+        cls.queue_url = 'local' if backend else None
+        cls.disabled = not backend
+
     @classmethod
     def get_envname(cls):
         return os.environ.get('envname', 'local')
 
     @classmethod
     def get_sqs_client(cls):
+        if cls.backend:
+            return cls.backend
         if not cls.disabled:
-            client = boto3.client(
-                'sqs', region_name=os.getenv('AWS_REGION', 'eu-west-1')
+            return cached_client('sqs', os.getenv('AWS_REGION', 'eu-west-1'))
+
+    @classmethod
+    def get_queue_url(cls):
+        if not cls.queue_url:
+            cls.configure_(
+                Parameter().get_parameter(env=cls.get_envname(), path='sqs/queue_url')
             )
-            return client
+        return cls.queue_url
 
     @classmethod
     def send(cls, engine, task_ids: [str]):
-        cls.configure_(
-            Parameter().get_parameter(env=cls.get_envname(), path='sqs/queue_url')
-        )
-        client = cls.get_sqs_client()
-        logger.debug(f'Sending task {task_ids} through SQS {cls.queue_url}')
+        """Enqueues tasks, or buffers them until the end of the current
+        `buffered` block when there is one"""
+        buffer = _buffer.get()
+        if buffer is not None:
+            buffer.setdefault(engine, []).extend(task_ids)
+            return None
+        return cls.send_batch(engine, task_ids)
+
+    @classmethod
+    @contextmanager
+    def buffered(cls, raise_errors=True):
+        """Collects the tasks enqueued within the block and sends them at once.
+
+        Every engine's tasks are sent before the first send error is raised,
+        the tasks that could not be sent are marked failed. With
+        `raise_errors=False` the errors are only logged and collected in the
+        yielded list.
+        """
+        buffer, errors = {}, []
+        token = _buffer.set(buffer)
         try:
-            return client.send_message(
-                QueueUrl=cls.queue_url,
-                MessageBody=json.dumps(task_ids),
-                MessageGroupId=cls._get_random_message_id(),
-                MessageDeduplicationId=cls._get_random_message_id(),
+            yield errors
+        finally:
+            _buffer.reset(token)
+            for engine, task_ids in buffer.items():
+                try:
+                    cls.send_batch(engine, task_ids)
+                except Exception as e:
+                    logger.exception(f'Failed to send tasks {task_ids}: {e}')
+                    errors.append(e)
+        if errors and raise_errors:
+            raise errors[0]
+
+    @classmethod
+    def send_batch(cls, engine, task_ids: [str]) -> [dict]:
+        """Sends tasks with send_message_batch, one message per target so that
+        FIFO ordering applies to the tasks of a same target.
+
+        The tasks of the messages SQS rejects are marked failed and a
+        SqsSendError is raised once all the messages were sent.
+        """
+        groups, keys, duplicates = cls.coalesce(engine, list(dict.fromkeys(task_ids)))
+        if not groups:
+            cls.update_tasks(engine, duplicates)
+            return []
+        queue_url = cls.get_queue_url()
+        client = cls.get_sqs_client()
+        messages = {str(i): ids for i, ids in enumerate(groups.values())}
+        entries = [
+            {
+                'Id': message_id,
+                'MessageBody': json.dumps(ids),
+                'MessageGroupId': group,
+                'MessageDeduplicationId': hashlib.sha256(
+                    json.dumps(ids).encode()
+                ).hexdigest(),
+            }
+            for (message_id, ids), group in zip(messages.items(), groups)
+        ]
+        logger.debug(f'Sending tasks {groups} through SQS {queue_url}')
+        responses, failed = [], {}
+        for i in range(0, len(entries), BATCH_SIZE):
+            batch = entries[i : i + BATCH_SIZE]
+            try:
+                response = client.send_message_batch(QueueUrl=queue_url, Entries=batch)
+            except ClientError as e:
+                logger.error(e)
+                for entry in batch:
+                    failed.update({uri: str(e) for uri in messages[entry['Id']]})
+                continue
+            for success in response.get('Successful', []):
+                # only tasks that reached the queue are reused by later sends
+                for uri in messages[success['Id']]:
+                    if uri in keys:
+                        cls.recent.set(keys[uri], uri)
+            for failure in response.get('Failed', []):
+                logger.error(f'Failed to send tasks message {failure}')
+                message = failure.get('Message') or failure.get('Code')
+                failed.update({uri: message for uri in messages[failure['Id']]})
+            responses.append(response)
+
+        # duplicates of a task that could not be sent fail with it
+        for duplicate in duplicates:
+            original = duplicate['response']['coalescedWith']
+            if original in failed:
+                failed[duplicate['taskUri']] = failed[original]
+        statuses = [d for d in duplicates if d['taskUri'] not in failed] + [
+            {
+                'taskUri': uri,
+                'status': 'failed',
+                'error': {'message': f'Could not enqueue the task: {message}'},
+            }
+            for uri, message in failed.items()
+        ]
+        cls.update_tasks(engine, statuses)
+        if failed:
+            raise SqsSendError(failed)
+        return responses
+
+    @classmethod
+    def coalesce(cls, engine, task_ids: [str]) -> (dict, dict, [dict]):
+        """Groups task ids by target and finds the duplicated tasks.
+
+        A task is a duplicate of another one with the same action, target and
+        payload that is sent in the same batch, or that was sent within
+        DEDUPE_WINDOW seconds and has not started yet. Returns the task ids
+        to send by group, the dedupe key of each task and the statuses marking
+        the duplicates completed with a reference to the task that runs
+        instead.
+        """
+        if not task_ids:
+            return {}, {}, []
+        with cls.private_session(engine) as session:
+            tasks = {
+                task.taskUri: task
+                for task in session.query(Task).filter(Task.taskUri.in_(task_ids))
+            }
+            targets = {uri: task.targetUri for uri, task in tasks.items()}
+            keys = {
+                uri: (
+                    task.action,
+                    task.targetUri,
+                    json.dumps(task.payload, sort_keys=True),
+                )
+                for uri, task in tasks.items()
+            }
+            previous = {
+                key: uri
+                for key in set(keys.values())
+                for uri in [cls.recent.get(key)]
+                if uri and uri not in tasks
+            }
+            pending = set()
+            if previous:
+                pending = {
+                    uri
+                    for (uri,) in session.query(Task.taskUri).filter(
+                        Task.taskUri.in_(previous.values()),
+                        Task.status == 'pending',
+                    )
+                }
+
+        groups, seen, duplicates = {}, {}, []
+        for uri in task_ids:
+            key = keys.get(uri)
+            original = seen.get(key) or (
+                previous.get(key) if previous.get(key) in pending else None
             )
-        except ClientError as e:
-            logger.error(e)
-            raise e
+            if key and original:
+                duplicates.append(
+                    {
+                        'taskUri': uri,
+                        'status': 'completed',
+                        'response': {'coalescedWith': original},
+                    }
+                )
+                keys.pop(uri)
+                continue
+            if key:
+                seen[key] = uri
+            group = targets.get(uri) or DEFAULT_GROUP
+            groups.setdefault(group, []).append(uri)
+        if duplicates:
+            logger.info(f'Coalesced {len(duplicates)} duplicated tasks')
+        return groups, keys, duplicates
 
     @classmethod
-    def _get_random_message_id(cls):
-        return str(uuid.uuid4())
+    def update_tasks(cls, engine, statuses: [dict]):
+        if statuses:
+            with cls.private_session(engine) as session:
+                session.bulk_update_mappings(Task, statuses)
+
+    @staticmethod
+    @contextmanager
+    def private_session(engine):
+        """Session of its own, tasks are often sent while the caller's
+        thread-local session is open and it must not be committed or closed"""
+        session = Session(bind=engine.engine)
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
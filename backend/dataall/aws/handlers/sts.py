@@ -1,13 +1,17 @@
 import json
 import logging
 import os
+import threading
 import urllib
 
 import boto3
+import botocore.session
 from botocore.client import Config
+from botocore.credentials import RefreshableCredentials
 from botocore.exceptions import ClientError
 
 from dataall.version import __version__, __pkg_name__
+from ...utils.cache import TTLCache, cached_client
 
 try:
     from urllib import quote_plus
@@ -20,23 +24,51 @@ except ImportError:
 log = logging.getLogger(__name__)
 
 
+class CachedSession(boto3.Session):
+    """boto3 Session that reuses its clients per (service, region)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def client(self, service_name, region_name=None, **kwargs):
+        if kwargs:
+            return super().client(service_name, region_name=region_name, **kwargs)
+        key = (service_name, region_name)
+        with self._clients_lock:
+            if key not in self._clients:
+                self._clients[key] = super().client(
+                    service_name, region_name=region_name
+                )
+            return self._clients[key]
+
+
 class SessionHelper:
     """SessionHelpers is a class simplifying common aws boto3 session tasks and helpers"""
 
+    secrets = TTLCache(ttl=int(os.getenv('SECRET_CACHE_TTL', 300)))
+    sessions = {}
+    sessions_lock = threading.Lock()
+    assume_role_calls = 0
+
     @classmethod
     def get_root_account_session(cls):
         ENVNAME = os.environ.get('envname', 'local')
 
     @classmethod
-    def get_session(cls, base_session=None, role_arn=None):
+    def get_session(cls, base_session=None, role_arn=None, use_cache=True):
         """Returns a boto3 session fo the given role
         Args:
             base_session(object,optional) :  a boto3 session
             role_arn(string, optional) : a role arn
+            use_cache(bool, optional) : reuse the cached session of the role, defaults to True.
+                    Use False when the credentials are handed out to users
         Returns:
             boto3.session.Session : a boto3 session
                     If neither base_session and role_arn is provided, returns a default boto3 session
                     If role_arn is provided, base_session should be a boto3 session on the aws accountid is defined
+                    Cached sessions refresh their credentials before they expire
         """
         if role_arn:
             external_id_secret = cls.get_external_id_secret()
@@ -51,36 +83,86 @@ class SessionHelper:
                     RoleArn=role_arn,
                     RoleSessionName=role_arn.split('/')[1],
                 )
-            try:
-                sts = base_session.client(
-                    'sts',
-                    config=Config(user_agent_extra=f'{__pkg_name__}/{__version__}'),
-                )
-                response = sts.assume_role(**assume_role_dict)
+            if not use_cache:
+                credentials = cls._assume_role(base_session, assume_role_dict)
                 return boto3.Session(
-                    aws_access_key_id=response['Credentials']['AccessKeyId'],
-                    aws_secret_access_key=response['Credentials']['SecretAccessKey'],
-                    aws_session_token=response['Credentials']['SessionToken'],
+                    aws_access_key_id=credentials['AccessKeyId'],
+                    aws_secret_access_key=credentials['SecretAccessKey'],
+                    aws_session_token=credentials['SessionToken'],
                 )
-            except ClientError as e:
-                log.error(f'Failed to assume role {role_arn} due to: {e} ')
-                raise e
+            key = (role_arn, external_id_secret)
+            session = cls.sessions.get(key)
+            if not session:
+                session = cls._refreshable_session(base_session, assume_role_dict)
+                with cls.sessions_lock:
+                    session = cls.sessions.setdefault(key, session)
+            return session
 
         else:
             return boto3.Session()
 
     @classmethod
-    def get_secret(cls, secret_name):
+    def _assume_role(cls, base_session, assume_role_dict):
+        try:
+            sts = base_session.client(
+                'sts',
+                config=Config(user_agent_extra=f'{__pkg_name__}/{__version__}'),
+            )
+            cls.assume_role_calls += 1
+            return sts.assume_role(**assume_role_dict)['Credentials']
+        except ClientError as e:
+            log.error(f'Failed to assume role {assume_role_dict["RoleArn"]} due to: {e} ')
+            raise e
+
+    @classmethod
+    def _refreshable_session(cls, base_session, assume_role_dict):
+        """Builds a session whose credentials botocore renews through AssumeRole
+        ahead of their expiration (15 minutes before by default)"""
+
+        def refresh():
+            credentials = cls._assume_role(base_session, assume_role_dict)
+            return {
+                'access_key': credentials['AccessKeyId'],
+                'secret_key': credentials['SecretAccessKey'],
+                'token': credentials['SessionToken'],
+                'expiry_time': credentials['Expiration'].isoformat(),
+            }
+
+        botocore_session = botocore.session.get_session()
+        botocore_session._credentials = RefreshableCredentials.create_from_metadata(
+            metadata=refresh(),
+            refresh_using=refresh,
+            method='sts-assume-role',
+        )
+        return CachedSession(botocore_session=botocore_session)
+
+    @classmethod
+    def clear_sessions(cls):
+        """Drops every cached assumed-role session"""
+        with cls.sessions_lock:
+            cls.sessions.clear()
+
+    @classmethod
+    def get_secret(cls, secret_name, use_cache=True):
         """
-        Method to get secret_string from secrets manager
+        Method to get secret_string from secrets manager,
+        cached for SECRET_CACHE_TTL seconds unless use_cache is False,
+        a secret that could not be read is not cached
         :return:
         :rtype:
         """
+        if not use_cache:
+            cls.secrets.invalidate(secret_name)
+        return cls.secrets.get_or_set(
+            secret_name, lambda: cls._fetch_secret(secret_name), cache_none=False
+        )
+
+    @classmethod
+    def _fetch_secret(cls, secret_name):
         secret_string = None
         region = os.getenv('AWS_REGION', 'eu-west-1')
         try:
-            session = SessionHelper.get_session()
-            client = session.client('secretsmanager', region_name=region)
+            client = cached_client('secretsmanager', region)
             secret_string = client.get_secret_value(SecretId=secret_name).get(
                 'SecretString'
             )
@@ -1,4 +1,5 @@
 from .permission import Permission
+from .permission_cache import PermissionCache
 from .tenant import Tenant
 from .tenant_policy import TenantPolicy
 from .resource_policy import ResourcePolicy
@@ -11,6 +12,7 @@ from .environment import Environment
 from .glossary import Glossary
 from .vote import Vote
 from .dataset import Dataset
+from .dataset_statistics import DatasetStatistics
 from .dataset_location import DatasetStorageLocation
 from .dataset_profiling_run import DatasetProfilingRun
 from .dataset_table import DatasetTable
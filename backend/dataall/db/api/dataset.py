@@ -216,27 +216,26 @@ class Dataset:
 
     @staticmethod
     def query_user_datasets(session, username, groups, filter) -> Query:
-        query = (
-            session.query(models.Dataset)
-            .outerjoin(
-                models.ShareObject,
-                models.ShareObject.datasetUri == models.Dataset.datasetUri,
-            )
+        shared = (
+            session.query(models.ShareObject.datasetUri)
             .filter(
-                or_(
-                    models.Dataset.owner == username,
-                    models.Dataset.SamlAdminGroupName.in_(groups),
-                    models.Dataset.stewards.in_(groups),
-                    and_(
+                and_(
+                    models.ShareObject.status == 'Approved',
+                    or_(
                         models.ShareObject.principalId.in_(groups),
-                        models.ShareObject.status == 'Approved',
-                    ),
-                    and_(
                         models.ShareObject.owner == username,
-                        models.ShareObject.status == 'Approved',
                     ),
                 )
             )
+            .distinct()
+        )
+        query = session.query(models.Dataset).filter(
+            or_(
+                models.Dataset.owner == username,
+                models.Dataset.SamlAdminGroupName.in_(groups),
+                models.Dataset.stewards.in_(groups),
+                models.Dataset.datasetUri.in_(shared.subquery()),
+            )
         )
         if filter and filter.get('term'):
             query = query.filter(
@@ -251,11 +250,15 @@ class Dataset:
     def paginated_user_datasets(
         session, username, groups, uri, data=None, check_perm=None
     ) -> dict:
-        return paginate(
+        page = paginate(
             query=Dataset.query_user_datasets(session, username, groups, data),
             page=data.get('page', 1),
             page_size=data.get('pageSize', 10),
         ).to_dict()
+        ResourcePolicy.prefetch_user_permissions(
+            session, groups, [dataset.datasetUri for dataset in page['nodes']]
+        )
+        return page
 
     @staticmethod
     def paginated_dataset_locations(
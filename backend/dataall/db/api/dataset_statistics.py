@@ -0,0 +1,174 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import event, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm.attributes import get_history
+
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ['tables', 'locations', 'upvotes']
+
+
+class DatasetStatistics:
+    """Counters of tables, locations and upvotes per dataset.
+
+    The dataset_statistics rows are maintained by the ORM events below within
+    the transaction changing the counted objects, `reconcile` repairs the
+    rows that drifted through bulk statements bypassing the ORM.
+    """
+
+    @staticmethod
+    def get_statistics(session, dataset_uris: [str] = None) -> dict:
+        """Returns {datasetUri: {'tables', 'locations', 'upvotes'}} of the
+        datasets, zeros for the datasets without counters row"""
+        query = session.query(models.DatasetStatistics)
+        if dataset_uris is not None:
+            if not dataset_uris:
+                return {}
+            query = query.filter(
+                models.DatasetStatistics.datasetUri.in_(set(dataset_uris))
+            )
+        statistics = {
+            uri: dict.fromkeys(COUNTERS, 0) for uri in dataset_uris or []
+        }
+        for row in query:
+            statistics[row.datasetUri] = DatasetStatistics.to_dict(row)
+        return statistics
+
+    @staticmethod
+    def to_dict(row: models.DatasetStatistics) -> dict:
+        if not row:
+            return dict.fromkeys(COUNTERS, 0)
+        return {counter: getattr(row, counter) or 0 for counter in COUNTERS}
+
+    @staticmethod
+    def increment(connection, dataset_uri, counter, delta):
+        if not dataset_uri or not delta:
+            return
+        table = models.DatasetStatistics.__table__
+        stmt = insert(table).values(
+            datasetUri=dataset_uri,
+            **{c: max(delta, 0) if c == counter else 0 for c in COUNTERS},
+            updated=datetime.now(),
+        )
+        connection.execute(
+            stmt.on_conflict_do_update(
+                index_elements=['datasetUri'],
+                set_={
+                    counter: func.greatest(table.c[counter] + delta, 0),
+                    'updated': stmt.excluded.updated,
+                },
+            )
+        )
+
+    @staticmethod
+    def count_all(session) -> dict:
+        """Counts every dataset objects, as the counters should read"""
+        statistics = {
+            uri: dict.fromkeys(COUNTERS, 0)
+            for (uri,) in session.query(models.Dataset.datasetUri)
+        }
+        for counter, column, criterion in [
+            ('tables', models.DatasetTable.datasetUri, []),
+            ('locations', models.DatasetStorageLocation.datasetUri, []),
+            (
+                'upvotes',
+                models.Vote.targetUri,
+                [models.Vote.targetType == 'dataset', models.Vote.upvote.is_(True)],
+            ),
+        ]:
+            for uri, count in (
+                session.query(column, func.count()).filter(*criterion).group_by(column)
+            ):
+                if uri in statistics:
+                    statistics[uri][counter] = count
+        return statistics
+
+    @staticmethod
+    def reconcile(session) -> int:
+        """Rewrites the counters that differ from the counted objects and
+        drops the counters of deleted datasets, returns the repaired rows"""
+        expected = DatasetStatistics.count_all(session)
+        stored = DatasetStatistics.get_statistics(session)
+        repaired = [
+            {'datasetUri': uri, **counters, 'updated': datetime.now()}
+            for uri, counters in expected.items()
+            if stored.get(uri) != counters
+        ]
+        orphans = [uri for uri in stored if uri not in expected]
+        if repaired:
+            stmt = insert(models.DatasetStatistics.__table__).values(repaired)
+            session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=['datasetUri'],
+                    set_={
+                        column: stmt.excluded[column]
+                        for column in COUNTERS + ['updated']
+                    },
+                )
+            )
+        if orphans:
+            session.query(models.DatasetStatistics).filter(
+                models.DatasetStatistics.datasetUri.in_(orphans)
+            ).delete(synchronize_session=False)
+        logger.info(
+            f'Repaired {len(repaired)} dataset statistics, dropped {len(orphans)}'
+        )
+        return len(repaired) + len(orphans)
+
+
+def _count_child(counter, delta):
+    def listener(mapper, connection, target):
+        DatasetStatistics.increment(connection, target.datasetUri, counter, delta)
+
+    return listener
+
+
+def _is_dataset_upvote(vote: models.Vote, upvote) -> bool:
+    return vote.targetType == 'dataset' and upvote is True
+
+
+def _count_vote_insert(mapper, connection, target):
+    if _is_dataset_upvote(target, target.upvote):
+        DatasetStatistics.increment(connection, target.targetUri, 'upvotes', 1)
+
+
+def _count_vote_update(mapper, connection, target):
+    history = get_history(target, 'upvote')
+    if not history.has_changes():
+        return
+    before = _is_dataset_upvote(target, (history.deleted or [None])[0])
+    after = _is_dataset_upvote(target, target.upvote)
+    DatasetStatistics.increment(
+        connection, target.targetUri, 'upvotes', int(after) - int(before)
+    )
+
+
+def _count_vote_delete(mapper, connection, target):
+    if _is_dataset_upvote(target, target.upvote):
+        DatasetStatistics.increment(connection, target.targetUri, 'upvotes', -1)
+
+
+def _drop_statistics(mapper, connection, target):
+    connection.execute(
+        models.DatasetStatistics.__table__.delete().where(
+            models.DatasetStatistics.datasetUri == target.datasetUri
+        )
+    )
+
+
+event.listen(models.DatasetTable, 'after_insert', _count_child('tables', 1))
+event.listen(models.DatasetTable, 'after_delete', _count_child('tables', -1))
+event.listen(
+    models.DatasetStorageLocation, 'after_insert', _count_child('locations', 1)
+)
+event.listen(
+    models.DatasetStorageLocation, 'after_delete', _count_child('locations', -1)
+)
+event.listen(models.Vote, 'after_insert', _count_vote_insert)
+event.listen(models.Vote, 'after_update', _count_vote_update)
+event.listen(models.Vote, 'after_delete', _count_vote_delete)
+event.listen(models.Dataset, 'after_delete', _drop_statistics)
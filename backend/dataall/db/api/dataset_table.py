@@ -1,9 +1,11 @@
+import hashlib
+import json
 import logging
 from typing import List
 
 from sqlalchemy.sql import and_
 
-from .. import models, api, permissions, exceptions, paginate
+from .. import models, api, permissions, exceptions, paginate, utils
 from . import has_tenant_perm, has_resource_perm, Glossary
 from ..models import Dataset
 from ...utils import json_utils
@@ -200,22 +202,37 @@ class DatasetTable:
         return table
 
     @staticmethod
-    def sync(session, datasetUri, glue_tables=None):
+    def sync(session, datasetUri, glue_tables=None) -> dict:
+        """Synchronizes the dataset tables with its Glue tables.
 
+        Returns the number of Glue tables discovered and the uris of the
+        tables added, updated and deleted by the synchronization.
+        """
+        summary = {'discovered': 0, 'added': [], 'updated': [], 'deleted': []}
         dataset: Dataset = session.query(Dataset).get(datasetUri)
         if dataset:
+            glue_tables = glue_tables or []
             existing_tables = (
                 session.query(models.DatasetTable)
                 .filter(models.DatasetTable.datasetUri == datasetUri)
                 .all()
             )
-            existing_table_names = [e.GlueTableName for e in existing_tables]
             existing_dataset_tables_map = {t.GlueTableName: t for t in existing_tables}
 
-            DatasetTable.update_existing_tables_status(existing_tables, glue_tables)
+            deleted_tables = DatasetTable.update_existing_tables_status(
+                existing_tables, glue_tables
+            )
 
+            added_tables = []
+            updated_tables = []
+            changed_tables = []
             for table in glue_tables:
-                if table['Name'] not in existing_table_names:
+                properties = json_utils.to_json(table.get('Parameters', {}))
+                updated_table: models.DatasetTable = existing_dataset_tables_map.get(
+                    table['Name']
+                )
+                updated = False
+                if not updated_table:
                     logger.info(
                         f'Storing new table: {table} for dataset db {dataset.GlueDatabaseName}'
                     )
@@ -231,69 +248,162 @@ class DatasetTable:
                         S3Prefix=table.get('StorageDescriptor', {}).get('Location'),
                         GlueTableName=table['Name'],
                         LastGlueTableStatus='InSync',
-                        GlueTableProperties=json_utils.to_json(
-                            table.get('Parameters', {})
-                        ),
+                        GlueTableProperties=properties,
                     )
                     session.add(updated_table)
-                    session.commit()
+                    added_tables.append(updated_table)
                 else:
-                    logger.info(
-                        f'Updating table: {table} for dataset db {dataset.GlueDatabaseName}'
-                    )
-                    updated_table: models.DatasetTable = (
-                        existing_dataset_tables_map.get(table['Name'])
-                    )
-                    updated_table.GlueTableProperties = json_utils.to_json(
-                        table.get('Parameters', {})
-                    )
-
-                DatasetTable.sync_table_columns(session, updated_table, table)
+                    if updated_table.GlueTableProperties != properties:
+                        logger.info(
+                            f'Updating table: {table} for dataset db {dataset.GlueDatabaseName}'
+                        )
+                        updated_table.GlueTableProperties = properties
+                        updated = True
+                    if updated_table.LastGlueTableStatus == 'Deleted':
+                        logger.info(
+                            f'Table {updated_table.GlueTableName} is back on Glue'
+                        )
+                        updated_table.LastGlueTableStatus = 'InSync'
+                        updated = True
+
+                schema_hash = DatasetTable.glue_table_schema_hash(table)
+                if updated_table.GlueTableSchemaHash != schema_hash:
+                    updated_table.GlueTableSchemaHash = schema_hash
+                    changed_tables.append((updated_table, table))
+                    updated = True
+                if updated and updated_table not in added_tables:
+                    updated_tables.append(updated_table)
+
+            logger.info(
+                f'{len(changed_tables)} of {len(glue_tables)} tables changed '
+                f'on Glue database {dataset.GlueDatabaseName}'
+            )
+            # assigns the uris of the new tables
+            session.flush()
+            DatasetTable.sync_tables_columns(session, changed_tables)
+            summary = {
+                'discovered': len(glue_tables),
+                'added': [t.tableUri for t in added_tables],
+                'updated': [t.tableUri for t in updated_tables],
+                'deleted': [t.tableUri for t in deleted_tables],
+            }
+            session.commit()
+
+        return summary
 
-        return True
+    @staticmethod
+    def glue_table_schema_hash(glue_table) -> str:
+        """Fingerprint of the parts of a Glue table that are synced as columns"""
+        schema = {
+            'Columns': glue_table.get('StorageDescriptor', {}).get('Columns', []),
+            'PartitionKeys': glue_table.get('PartitionKeys', []),
+        }
+        return hashlib.sha256(
+            json.dumps(schema, sort_keys=True, default=str).encode()
+        ).hexdigest()
 
     @staticmethod
     def update_existing_tables_status(existing_tables, glue_tables):
+        """Marks the tables missing from Glue as Deleted, returns the ones
+        which were not already"""
+        glue_table_names = {t['Name'] for t in glue_tables}
+        deleted_tables = []
         for existing_table in existing_tables:
-            if existing_table.GlueTableName not in [t['Name'] for t in glue_tables]:
+            if existing_table.GlueTableName not in glue_table_names:
+                if existing_table.LastGlueTableStatus != 'Deleted':
+                    deleted_tables.append(existing_table)
                 existing_table.LastGlueTableStatus = 'Deleted'
                 logger.info(
                     f'Table {existing_table.GlueTableName} status set to Deleted from Glue.'
                 )
+        return deleted_tables
 
     @staticmethod
     def sync_table_columns(session, dataset_table, glue_table):
+        dataset_table.GlueTableSchemaHash = DatasetTable.glue_table_schema_hash(
+            glue_table
+        )
+        DatasetTable.sync_tables_columns(session, [(dataset_table, glue_table)])
 
-        DatasetTable.delete_all_table_columns(session, dataset_table)
-
-        columns = [
-            {**item, **{'columnType': 'column'}}
-            for item in glue_table.get('StorageDescriptor', {}).get('Columns', [])
-        ]
-        partitions = [
-            {**item, **{'columnType': f'partition_{index}'}}
-            for index, item in enumerate(glue_table.get('PartitionKeys', []))
-        ]
-
-        logger.debug(f'Found columns {columns} for table {dataset_table}')
-        logger.debug(f'Found partitions {partitions} for table {dataset_table}')
-
-        for col in columns + partitions:
-            table_col = models.DatasetTableColumn(
-                name=col['Name'],
-                description=col.get('Comment', 'No description provided'),
-                label=col['Name'],
-                owner=dataset_table.owner,
-                datasetUri=dataset_table.datasetUri,
-                tableUri=dataset_table.tableUri,
-                AWSAccountId=dataset_table.AWSAccountId,
-                GlueDatabaseName=dataset_table.GlueDatabaseName,
-                GlueTableName=dataset_table.GlueTableName,
-                region=dataset_table.region,
-                typeName=col['Type'],
-                columnType=col['columnType'],
-            )
-            session.add(table_col)
+    @staticmethod
+    def sync_tables_columns(session, tables):
+        """Applies the Glue columns of many (dataset_table, glue_table) pairs.
+
+        Columns are matched by name, so existing columns keep their uri,
+        description and glossary terms. New columns are bulk inserted, changed
+        ones bulk updated and removed ones deleted with one statement.
+        """
+        if not tables:
+            return
+        existing_columns = {}
+        for column in session.query(models.DatasetTableColumn).filter(
+            models.DatasetTableColumn.tableUri.in_([t.tableUri for t, _ in tables])
+        ):
+            existing_columns.setdefault(column.tableUri, {})[column.name] = column
+
+        inserts, updates, deletes = [], [], []
+        for dataset_table, glue_table in tables:
+            columns = [
+                {**item, **{'columnType': 'column'}}
+                for item in glue_table.get('StorageDescriptor', {}).get('Columns', [])
+            ]
+            partitions = [
+                {**item, **{'columnType': f'partition_{index}'}}
+                for index, item in enumerate(glue_table.get('PartitionKeys', []))
+            ]
+
+            logger.debug(f'Found columns {columns} for table {dataset_table}')
+            logger.debug(f'Found partitions {partitions} for table {dataset_table}')
+
+            existing = existing_columns.get(dataset_table.tableUri, {})
+            for col in columns + partitions:
+                column = existing.pop(col['Name'], None)
+                if not column:
+                    inserts.append(
+                        dict(
+                            columnUri=utils.uuid('col')(None),
+                            name=col['Name'],
+                            description=col.get('Comment', 'No description provided'),
+                            label=col['Name'],
+                            owner=dataset_table.owner,
+                            datasetUri=dataset_table.datasetUri,
+                            tableUri=dataset_table.tableUri,
+                            AWSAccountId=dataset_table.AWSAccountId,
+                            GlueDatabaseName=dataset_table.GlueDatabaseName,
+                            GlueTableName=dataset_table.GlueTableName,
+                            region=dataset_table.region,
+                            typeName=col['Type'],
+                            columnType=col['columnType'],
+                        )
+                    )
+                elif (column.typeName, column.columnType) != (
+                    col['Type'],
+                    col['columnType'],
+                ):
+                    updates.append(
+                        dict(
+                            columnUri=column.columnUri,
+                            typeName=col['Type'],
+                            columnType=col['columnType'],
+                        )
+                    )
+            deletes.extend(c.columnUri for c in existing.values())
+
+        logger.info(
+            f'Syncing columns of {len(tables)} tables: {len(inserts)} new, '
+            f'{len(updates)} changed, {len(deletes)} removed'
+        )
+        if inserts:
+            session.bulk_insert_mappings(models.DatasetTableColumn, inserts)
+        if updates:
+            session.bulk_update_mappings(models.DatasetTableColumn, updates)
+        if deletes:
+            session.query(models.DatasetTableColumn).filter(
+                models.DatasetTableColumn.columnUri.in_(deletes)
+            ).delete(synchronize_session=False)
+            session.query(models.TermLink).filter(
+                models.TermLink.targetUri.in_(deletes)
+            ).delete(synchronize_session=False)
 
     @staticmethod
     def delete_all_table_columns(session, dataset_table):
@@ -22,7 +22,7 @@ from ..models.Enums import (
     EnvironmentPermission,
 )
 from ..models.Permission import PermissionType
-from ..paginator import Page, paginate
+from ..paginator import Page, paginate, paginate_filter
 from ...utils.naming_convention import (
     NamingConventionService,
     NamingConventionPattern,
@@ -475,18 +475,15 @@ class Environment:
 
     @staticmethod
     def query_user_environments(session, username, groups, filter) -> Query:
-        query = (
-            session.query(models.Environment)
-            .outerjoin(
-                models.EnvironmentGroup,
-                models.Environment.environmentUri
-                == models.EnvironmentGroup.environmentUri,
-            )
-            .filter(
-                or_(
-                    models.Environment.owner == username,
-                    models.EnvironmentGroup.groupUri.in_(groups),
-                )
+        # every invited group holds a policy on the environment, filtering on
+        # the policies avoids the duplicate rows of a join on the groups
+        authorized = ResourcePolicy.query_authorized_resource_uris(
+            session, groups, resource_type=models.Environment.__name__
+        )
+        query = session.query(models.Environment).filter(
+            or_(
+                models.Environment.owner == username,
+                models.Environment.environmentUri.in_(authorized.subquery()),
             )
         )
         if filter and filter.get('term'):
@@ -505,11 +502,15 @@ class Environment:
     def paginated_user_environments(
         session, username, groups, uri, data=None, check_perm=None
     ) -> dict:
-        return paginate(
+        page = paginate(
             query=Environment.query_user_environments(session, username, groups, data),
             page=data.get('page', 1),
             page_size=data.get('pageSize', 5),
         ).to_dict()
+        ResourcePolicy.prefetch_user_permissions(
+            session, groups, [env.environmentUri for env in page['nodes']]
+        )
+        return page
 
     @staticmethod
     def query_user_environment_groups(session, username, groups, uri, filter) -> Query:
@@ -722,6 +723,7 @@ class Environment:
         q = (
             session.query(
                 models.ShareObjectItem.shareUri.label('shareUri'),
+                models.ShareObjectItem.shareItemUri.label('shareItemUri'),
                 models.Dataset.datasetUri.label('datasetUri'),
                 models.Dataset.name.label('datasetName'),
                 models.Dataset.description.label('datasetDescription'),
@@ -807,8 +809,13 @@ class Environment:
             term = data.get('term')
             q = q.filter(models.ShareObjectItem.itemName.ilike('%' + term + '%'))
 
-        return paginate(
-            query=q, page=data.get('page', 1), page_size=data.get('pageSize', 10)
+        return paginate_filter(
+            query=q,
+            data=data,
+            sort_keys=[
+                (models.ShareObject.created, 'created'),
+                (models.ShareObjectItem.shareItemUri, 'shareItemUri'),
+            ],
         ).to_dict()
 
     @staticmethod
@@ -818,6 +825,7 @@ class Environment:
         q = (
             session.query(
                 models.ShareObjectItem.shareUri.label('shareUri'),
+                models.ShareObjectItem.shareItemUri.label('shareItemUri'),
                 models.Dataset.datasetUri.label('datasetUri'),
                 models.Dataset.name.label('datasetName'),
                 models.Dataset.description.label('datasetDescription'),
@@ -904,8 +912,13 @@ class Environment:
             term = data.get('term')
             q = q.filter(models.ShareObjectItem.itemName.ilike('%' + term + '%'))
 
-        return paginate(
-            query=q, page=data.get('page', 1), page_size=data.get('pageSize', 10)
+        return paginate_filter(
+            query=q,
+            data=data,
+            sort_keys=[
+                (models.ShareObject.created, 'created'),
+                (models.ShareObjectItem.shareItemUri, 'shareItemUri'),
+            ],
         ).to_dict()
 
     @staticmethod
@@ -944,6 +957,7 @@ class Environment:
         q = (
             session.query(
                 models.ShareObjectItem.shareUri.label('shareUri'),
+                models.ShareObjectItem.shareItemUri.label('shareItemUri'),
                 models.Dataset.datasetUri.label('datasetUri'),
                 models.Dataset.name.label('datasetName'),
                 models.Dataset.description.label('datasetDescription'),
@@ -1023,8 +1037,13 @@ class Environment:
             term = data.get('term')
             q = q.filter(models.ShareObjectItem.itemName.ilike('%' + term + '%'))
 
-        return paginate(
-            query=q, page=data.get('page', 1), page_size=data.get('pageSize', 10)
+        return paginate_filter(
+            query=q,
+            data=data,
+            sort_keys=[
+                (models.ShareObject.created, 'created'),
+                (models.ShareObjectItem.shareItemUri, 'shareItemUri'),
+            ],
         ).to_dict()
 
     @staticmethod
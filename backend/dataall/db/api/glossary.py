@@ -1,10 +1,12 @@
 import logging
 from datetime import datetime
 
-from sqlalchemy import asc, or_, and_, literal, case
-from sqlalchemy.orm import with_expression, aliased
+from sqlalchemy import asc, or_, and_, literal, event, select, union
+from sqlalchemy.orm import with_expression
+from sqlalchemy.orm.attributes import get_history
 
 from .. import models, exceptions, permissions, paginate
+from ..paginator import paginate_filter
 from .permission_checker import (
     has_tenant_perm,
 )
@@ -217,82 +219,56 @@ class Glossary:
 
     @staticmethod
     def hierarchical_search(session, username, groups, uri, data=None, check_perm=None):
-        q = session.query(models.GlossaryNode).options(
-            with_expression(models.GlossaryNode.isMatch, literal(True))
-        )
-        q = q.filter(models.GlossaryNode.deleted.is_(None))
-        term = data.get('term', None)
+        """Returns the nodes matching `term` with their ancestors and
+        descendants, ordered by path.
+
+        The matches are read once through the trigram indexes of label and
+        readme, their ancestors and descendants through the two indexes of
+        the glossary_node_ancestor closure, all in one statement.
+        """
+        data = {'pageSize': 100, **(data or {})}
+        node = models.GlossaryNode
+        q = session.query(node).filter(node.deleted.is_(None))
+        term = data.get('term')
         if term:
-            q = q.filter(
-                or_(
-                    models.GlossaryNode.label.ilike('%' + term.upper() + '%'),
-                    models.GlossaryNode.readme.ilike('%' + term.upper() + '%'),
-                )
+            is_match = or_(
+                node.label.ilike(f'%{term}%'),
+                node.readme.ilike(f'%{term}%'),
             )
-        matches = q.subquery('matches')
-        parents = aliased(models.GlossaryNode, name='parents')
-        children = aliased(models.GlossaryNode, name='children')
-
-        if term:
-            parent_expr = case(
-                [
-                    (
-                        or_(
-                            parents.label.ilike(f'%{term}%'),
-                            parents.readme.ilike(f'%{term}%'),
-                        )
-                    )
-                ],
-                else_=literal(False),
+            closure = models.GlossaryNodeAncestor
+            matches = (
+                session.query(node.nodeUri)
+                .filter(node.deleted.is_(None), is_match)
+                .cte('matches')
             )
-        else:
-            parent_expr = literal(False)
-
-        ascendants = (
-            session.query(parents)
-            .options(with_expression(parents.isMatch, parent_expr))
-            .join(
-                and_(
-                    matches,
-                    matches.c.path.startswith(parents.path),
-                    matches,
-                    matches.c.deleted.is_(None),
-                )
+            related = union(
+                select([closure.ancestorUri]).where(
+                    closure.nodeUri.in_(select([matches.c.nodeUri]))
+                ),
+                select([closure.nodeUri]).where(
+                    closure.ancestorUri.in_(select([matches.c.nodeUri]))
+                ),
             )
-        )
-
-        if term:
-            child_expr = case(
-                [
-                    (
-                        or_(
-                            children.label.ilike(f'%{term}%'),
-                            children.readme.ilike(f'%{term}%'),
-                        ),
-                        and_(children.deleted.is_(None)),
-                    )
-                ],
-                else_=literal(False),
+            q = q.options(with_expression(node.isMatch, is_match)).filter(
+                node.nodeUri.in_(related)
             )
         else:
-            child_expr = literal(False)
-
-        descendants = (
-            session.query(children)
-            .options(with_expression(children.isMatch, child_expr))
-            .join(
-                matches,
-                children.path.startswith(matches.c.path),
-            )
-        )
-
-        all = ascendants.union(descendants)
-        q = all.order_by(models.GlossaryNode.path)
-
-        return paginate(
-            q, page=data.get('page', 1), page_size=data.get('pageSize', 100)
+            q = q.options(with_expression(node.isMatch, literal(False)))
+        return paginate_filter(
+            q, data, sort_keys=[(node.path, 'path'), (node.nodeUri, 'nodeUri')]
         ).to_dict()
 
+    @staticmethod
+    def ancestors(node_uri: str, path: str) -> [dict]:
+        """glossary_node_ancestor rows of a node, from its materialized path"""
+        uris = [uri for uri in (path or '').split('/') if uri]
+        if not uris or uris[-1] != node_uri:
+            uris.append(node_uri)
+        return [
+            {'nodeUri': node_uri, 'ancestorUri': ancestor, 'depth': len(uris) - 1 - i}
+            for i, ancestor in enumerate(uris)
+        ]
+
     @staticmethod
     def search_terms(session, username, groups, uri, data=None, check_perm=None):
         q = session.query(models.GlossaryNode).filter(
@@ -485,3 +461,21 @@ class Glossary:
         )
         for link in term_links:
             session.delete(link)
+
+
+def _index_ancestors(mapper, connection, target):
+    table = models.GlossaryNodeAncestor.__table__
+    connection.execute(table.delete().where(table.c.nodeUri == target.nodeUri))
+    connection.execute(
+        table.insert(), Glossary.ancestors(target.nodeUri, target.path)
+    )
+
+
+def _reindex_moved_ancestors(mapper, connection, target):
+    if get_history(target, 'path').has_changes():
+        _index_ancestors(mapper, connection, target)
+
+
+# nodes get their final path once their uri is known, see create_term
+event.listen(models.GlossaryNode, 'after_insert', _index_ancestors)
+event.listen(models.GlossaryNode, 'after_update', _reindex_moved_ancestors)
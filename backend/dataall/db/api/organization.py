@@ -103,18 +103,13 @@ class Organization:
 
     @staticmethod
     def query_user_organizations(session, username, groups, filter) -> Query:
-        query = (
-            session.query(models.Organization)
-            .outerjoin(
-                models.OrganizationGroup,
-                models.Organization.organizationUri
-                == models.OrganizationGroup.organizationUri,
-            )
-            .filter(
-                or_(
-                    models.Organization.owner == username,
-                    models.OrganizationGroup.groupUri.in_(groups),
-                )
+        authorized = ResourcePolicy.query_authorized_resource_uris(
+            session, groups, resource_type=models.Organization.__name__
+        )
+        query = session.query(models.Organization).filter(
+            or_(
+                models.Organization.owner == username,
+                models.Organization.organizationUri.in_(authorized.subquery()),
             )
         )
         if filter and filter.get('term'):
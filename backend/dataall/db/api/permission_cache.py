@@ -0,0 +1,107 @@
+import contextvars
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from ...utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+RESOURCE = 'resource'
+TENANT = 'tenant'
+
+_request_memo = contextvars.ContextVar('permission_memo', default=None)
+
+
+class PermissionCache:
+    """Caches the permission names a set of groups holds on a resource or tenant.
+
+    Decisions are memoized for the duration of a request (see `request_scope`)
+    and, when PERMISSION_CACHE_TTL is set, shared across requests of the same
+    process for that many seconds. Entries are keyed by
+    (kind, frozenset(groups), target) and dropped whenever a policy on the
+    target is attached or deleted.
+    """
+
+    ttl = int(os.getenv('PERMISSION_CACHE_TTL', 0))
+    shared = TTLCache(ttl=ttl, maxsize=10000)
+    metrics = {'request_hits': 0, 'shared_hits': 0, 'misses': 0}
+    _lock = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def request_scope(memo: dict = None):
+        """Activates a request memo, reusing `memo` when one is given"""
+        token = _request_memo.set({} if memo is None else memo)
+        try:
+            yield _request_memo.get()
+        finally:
+            _request_memo.reset(token)
+
+    @staticmethod
+    def get_permissions(kind: str, groups: [str], target: str, loader) -> frozenset:
+        """Returns the permission names of `groups` on `target`, calling
+        `loader()` to fetch them on a miss"""
+        key = (kind, frozenset(groups or []), target)
+        memo = _request_memo.get()
+        if memo is not None and key in memo:
+            PermissionCache._count('request_hits')
+            return memo[key]
+        permissions = None
+        if PermissionCache.ttl:
+            permissions = PermissionCache.shared.get(key)
+            if permissions is not None:
+                PermissionCache._count('shared_hits')
+        if permissions is None:
+            PermissionCache._count('misses')
+            permissions = frozenset(loader())
+            if PermissionCache.ttl:
+                PermissionCache.shared.set(key, permissions, PermissionCache.ttl)
+        if memo is not None:
+            memo[key] = permissions
+        return permissions
+
+    @staticmethod
+    def prime(kind: str, groups: [str], target: str, permissions):
+        """Stores permissions loaded in bulk, see `get_permissions`"""
+        key = (kind, frozenset(groups or []), target)
+        permissions = frozenset(permissions)
+        memo = _request_memo.get()
+        if memo is not None:
+            memo[key] = permissions
+        if PermissionCache.ttl:
+            PermissionCache.shared.set(key, permissions, PermissionCache.ttl)
+
+    @staticmethod
+    def invalidate(kind: str = None, target: str = None):
+        """Drops the decisions on `target`, every `kind` decision, or all of them"""
+
+        def matches(key):
+            return (kind is None or key[0] == kind) and (
+                target is None or key[2] == target
+            )
+
+        PermissionCache.shared.invalidate_if(matches)
+        memo = _request_memo.get()
+        if memo:
+            for key in [k for k in memo if matches(k)]:
+                del memo[key]
+
+    @staticmethod
+    def stats() -> dict:
+        with PermissionCache._lock:
+            stats = dict(PermissionCache.metrics)
+        stats['shared_size'] = len(PermissionCache.shared)
+        return stats
+
+    @staticmethod
+    def reset_stats():
+        with PermissionCache._lock:
+            for name in PermissionCache.metrics:
+                PermissionCache.metrics[name] = 0
+
+    @staticmethod
+    def _count(name):
+        with PermissionCache._lock:
+            PermissionCache.metrics[name] += 1
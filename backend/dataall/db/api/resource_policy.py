@@ -1,11 +1,13 @@
 import logging
 from typing import Optional
 
+from sqlalchemy.orm import Query
 from sqlalchemy.sql import and_
 
 from .. import exceptions
 from .. import models
 from . import Permission
+from .permission_cache import PermissionCache, RESOURCE
 from ..models.Permission import PermissionType
 
 logger = logging.getLogger(__name__)
@@ -35,13 +37,97 @@ class ResourcePolicy:
     @staticmethod
     def has_user_resource_permission(
         session, username: str, groups: [str], resource_uri: str, permission_name: str
-    ) -> Optional[models.ResourcePolicy]:
+    ) -> bool:
 
         if not username or not permission_name or not resource_uri:
-            return None
+            return False
 
-        policy: models.ResourcePolicy = (
-            session.query(models.ResourcePolicy)
+        return permission_name in ResourcePolicy.get_user_resource_permission_names(
+            session, groups, resource_uri
+        )
+
+    @staticmethod
+    def get_user_resource_permission_names(
+        session, groups: [str], resource_uri: str
+    ) -> frozenset:
+        return PermissionCache.get_permissions(
+            RESOURCE,
+            groups,
+            resource_uri,
+            lambda: ResourcePolicy.get_groups_resource_permission_names(
+                session, groups, resource_uri
+            ),
+        )
+
+    @staticmethod
+    def get_groups_resource_permission_names(
+        session, groups: [str], resource_uri: str
+    ) -> [str]:
+        return [
+            name
+            for (name,) in session.query(models.Permission.name)
+            .join(
+                models.ResourcePolicyPermission,
+                models.Permission.permissionUri
+                == models.ResourcePolicyPermission.permissionUri,
+            )
+            .join(
+                models.ResourcePolicy,
+                models.ResourcePolicy.sid == models.ResourcePolicyPermission.sid,
+            )
+            .filter(
+                and_(
+                    models.ResourcePolicy.principalId.in_(groups or []),
+                    models.ResourcePolicy.principalType == 'GROUP',
+                    models.ResourcePolicy.resourceUri == resource_uri,
+                )
+            )
+        ]
+
+    @staticmethod
+    def query_authorized_resource_uris(
+        session, groups: [str], resource_type: str = None, permission_name: str = None
+    ) -> Query:
+        """Returns a query of the distinct resourceUris on which `groups` hold
+        a policy, optionally restricted to one resource type and permission.
+        List queries filter on it with `in_(query.subquery())` or join it, so
+        authorization costs one query instead of one check per row."""
+        query = session.query(models.ResourcePolicy.resourceUri).filter(
+            and_(
+                models.ResourcePolicy.principalId.in_(groups or []),
+                models.ResourcePolicy.principalType == 'GROUP',
+            )
+        )
+        if resource_type:
+            query = query.filter(models.ResourcePolicy.resourceType == resource_type)
+        if permission_name:
+            query = (
+                query.join(
+                    models.ResourcePolicyPermission,
+                    models.ResourcePolicy.sid == models.ResourcePolicyPermission.sid,
+                )
+                .join(
+                    models.Permission,
+                    models.Permission.permissionUri
+                    == models.ResourcePolicyPermission.permissionUri,
+                )
+                .filter(models.Permission.name == permission_name)
+            )
+        return query.distinct()
+
+    @staticmethod
+    def prefetch_user_permissions(
+        session, groups: [str], resource_uris: [str]
+    ) -> dict:
+        """Loads the permission names of `groups` on a page of resources with
+        one query and primes the permission cache, so that the checks made
+        while resolving each row do not hit the database"""
+        resource_uris = [uri for uri in set(resource_uris) if uri]
+        if not resource_uris:
+            return {}
+        permissions = {uri: set() for uri in resource_uris}
+        for uri, name in (
+            session.query(models.ResourcePolicy.resourceUri, models.Permission.name)
             .join(
                 models.ResourcePolicyPermission,
                 models.ResourcePolicy.sid == models.ResourcePolicyPermission.sid,
@@ -53,19 +139,16 @@ class ResourcePolicy:
             )
             .filter(
                 and_(
-                    models.ResourcePolicy.principalId.in_(groups),
+                    models.ResourcePolicy.principalId.in_(groups or []),
                     models.ResourcePolicy.principalType == 'GROUP',
-                    models.Permission.name == permission_name,
-                    models.ResourcePolicy.resourceUri == resource_uri,
+                    models.ResourcePolicy.resourceUri.in_(resource_uris),
                 )
             )
-            .first()
-        )
-
-        if not policy:
-            return None
-        else:
-            return policy
+        ):
+            permissions[uri].add(name)
+        for uri, names in permissions.items():
+            PermissionCache.prime(RESOURCE, groups, uri, names)
+        return permissions
 
     @staticmethod
     def has_group_resource_permission(
@@ -142,6 +225,7 @@ class ResourcePolicy:
         ResourcePolicy.add_permission_to_resource_policy(
             session, group, permissions, resource_uri, policy
         )
+        PermissionCache.invalidate(RESOURCE, resource_uri)
 
         return policy
 
@@ -162,6 +246,7 @@ class ResourcePolicy:
                 session.delete(permission)
             session.delete(policy)
             session.commit()
+        PermissionCache.invalidate(RESOURCE, resource_uri)
 
         return True
 
@@ -6,6 +6,7 @@ from .. import exceptions, permissions, paginate
 from .. import models
 from ..api.permission import Permission
 from ..api.tenant import Tenant
+from .permission_cache import PermissionCache, TENANT
 from ..models.Permission import PermissionType
 
 logger = logging.getLogger(__name__)
@@ -55,29 +56,40 @@ class TenantPolicy:
     ):
         if not username or not permission_name:
             return False
-        tenant_policy: models.TenantPolicy = (
-            session.query(models.TenantPolicy)
+        return permission_name in PermissionCache.get_permissions(
+            TENANT,
+            groups,
+            tenant_name,
+            lambda: TenantPolicy.get_groups_tenant_permission_names(
+                session, groups, tenant_name
+            ),
+        )
+
+    @staticmethod
+    def get_groups_tenant_permission_names(
+        session, groups: [str], tenant_name: str
+    ) -> [str]:
+        return [
+            name
+            for (name,) in session.query(models.Permission.name)
             .join(
                 models.TenantPolicyPermission,
+                models.Permission.permissionUri
+                == models.TenantPolicyPermission.permissionUri,
+            )
+            .join(
+                models.TenantPolicy,
                 models.TenantPolicy.sid == models.TenantPolicyPermission.sid,
             )
             .join(
                 models.Tenant,
                 models.Tenant.tenantUri == models.TenantPolicy.tenantUri,
             )
-            .join(
-                models.Permission,
-                models.Permission.permissionUri
-                == models.TenantPolicyPermission.permissionUri,
-            )
             .filter(
-                models.TenantPolicy.principalId.in_(groups),
-                models.Permission.name == permission_name,
+                models.TenantPolicy.principalId.in_(groups or []),
                 models.Tenant.name == tenant_name,
             )
-            .first()
-        )
-        return tenant_policy
+        ]
 
     @staticmethod
     def has_group_tenant_permission(
@@ -158,6 +170,7 @@ class TenantPolicy:
         TenantPolicy.add_permission_to_group_tenant_policy(
             session, group, permissions, tenant_name, policy
         )
+        PermissionCache.invalidate(TENANT, tenant_name)
 
         return policy
 
@@ -271,6 +284,7 @@ class TenantPolicy:
                 session.delete(permission)
             session.delete(policy)
             session.commit()
+        PermissionCache.invalidate(TENANT, tenant_name)
 
         return True
 
@@ -6,7 +6,8 @@ from contextlib import contextmanager
 import boto3
 import sqlalchemy
 from sqlalchemy.engine import reflection
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from .. import db
 from ..db import Base
@@ -22,14 +23,52 @@ log = logging.getLogger(__name__)
 ENVNAME = os.getenv('envname', 'local')
 
 
+def _env_flag(name, default=False):
+    return os.getenv(name, str(default)).lower() in ['1', 'true', 'yes']
+
+
+def pool_settings() -> dict:
+    """Connection pool options of the process, from the environment.
+
+    Lambda functions serve one request at a time and default to a small pool,
+    ECS tasks and local servers run concurrent work and keep more connections.
+    Behind RDS Proxy, which pools the database connections itself, idle
+    connections are recycled before the proxy closes them, the pre-ping round
+    trip is skipped and TLS is required. DB_POOL_SIZE=0 disables pooling.
+    """
+    lambda_runtime = bool(os.getenv('AWS_LAMBDA_FUNCTION_NAME'))
+    rds_proxy = _env_flag('DB_RDS_PROXY')
+    pool_size = int(os.getenv('DB_POOL_SIZE', 1 if lambda_runtime else 5))
+    settings = {
+        'pool_pre_ping': _env_flag('DB_POOL_PRE_PING', not rds_proxy),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 600 if rds_proxy else 1800)),
+    }
+    if pool_size:
+        settings.update(
+            pool_size=pool_size,
+            max_overflow=int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+            pool_timeout=int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        )
+    else:
+        settings['poolclass'] = NullPool
+    if rds_proxy:
+        settings['connect_args'] = {'sslmode': 'require'}
+    return settings
+
+
 class Engine:
-    def __init__(self, dbconfig: DbConfig):
+    def __init__(self, dbconfig: DbConfig, **pool_options):
         self.dbconfig = dbconfig
+        options = {**pool_settings(), **pool_options}
+        connect_args = {
+            'options': f"-csearch_path={dbconfig.params['schema']}",
+            **options.pop('connect_args', {}),
+        }
         self.engine = sqlalchemy.create_engine(
             dbconfig.url,
             echo=False,
-            pool_size=1,
-            connect_args={'options': f"-csearch_path={dbconfig.params['schema']}"},
+            connect_args=connect_args,
+            **options,
         )
         try:
             if not self.engine.dialect.has_schema(
@@ -46,15 +85,37 @@ class Engine:
             log.error(f'Could not create schema: {e}')
 
         self.sessions = {}
-        self._session = None
+        # sessions are not thread safe, the registry holds one per thread
+        self._registry = scoped_session(
+            sessionmaker(bind=self.engine, autoflush=True, expire_on_commit=False)
+        )
 
     def session(self):
-        if self._session is None:
-            self._session = sessionmaker(
-                bind=self.engine, autoflush=True, expire_on_commit=False
-            )()
-
-        return self._session
+        return self._registry()
+
+    def remove_session(self):
+        """Closes and forgets the session of the current thread"""
+        self._registry.remove()
+
+    def pool_capacity(self):
+        """Connections the pool can open at once, None when it is unbounded"""
+        pool = self.engine.pool
+        if isinstance(pool, NullPool) or pool._max_overflow < 0:
+            return None
+        return pool.size() + pool._max_overflow
+
+    def pool_stats(self) -> dict:
+        pool = self.engine.pool
+        if isinstance(pool, NullPool):
+            return {'pool': 'NullPool'}
+        return {
+            'pool': type(pool).__name__,
+            'size': pool.size(),
+            'checkedIn': pool.checkedin(),
+            'checkedOut': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'capacity': self.pool_capacity(),
+        }
 
     @contextmanager
     def scoped_session(self):
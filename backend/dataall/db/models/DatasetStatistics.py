@@ -0,0 +1,16 @@
+import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String
+
+from .. import Base
+
+
+class DatasetStatistics(Base):
+    __tablename__ = 'dataset_statistics'
+    datasetUri = Column(String, primary_key=True)
+    tables = Column(Integer, nullable=False, default=0)
+    locations = Column(Integer, nullable=False, default=0)
+    upvotes = Column(Integer, nullable=False, default=0)
+    updated = Column(
+        DateTime, default=datetime.datetime.now, onupdate=datetime.datetime.now
+    )
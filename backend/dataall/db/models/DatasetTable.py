@@ -18,6 +18,8 @@ class DatasetTable(Resource, Base):
     GlueTableConfig = Column(Text)
     GlueTableProperties = Column(postgresql.JSON, default={})
     LastGlueTableStatus = Column(String, default='InSync')
+    # hash of the Glue columns and partition keys the table was last synced with
+    GlueTableSchemaHash = Column(String, nullable=True)
     region = Column(String, default='eu-west-1')
     # LastGeneratedPreviewDate= Column(DateTime, default=None)
     confidentiality = Column(String, nullable=True)
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, String, DateTime, Enum
+from sqlalchemy import Boolean, Column, String, DateTime, Enum, Index, Integer
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import query_expression
 
@@ -19,6 +19,14 @@ class GlossaryNodeStatus(enum.Enum):
 
 class GlossaryNode(Base):
     __tablename__ = 'glossary_node'
+    __table_args__ = (
+        # serves the path prefix (LIKE 'path%') lookups of the subtrees
+        Index(
+            'ix_glossary_node_path',
+            'path',
+            postgresql_ops={'path': 'text_pattern_ops'},
+        ),
+    )
     nodeUri = Column(String, primary_key=True, default=utils.uuid('glossary_node'))
     parentUri = Column(String, nullable=True)
     nodeType = Column(String, default='G')
@@ -37,6 +45,19 @@ class GlossaryNode(Base):
     isMatch = query_expression()
 
 
+class GlossaryNodeAncestor(Base):
+    """Closure of the glossary tree, one row per node and ancestor,
+    the node itself included at depth 0"""
+
+    __tablename__ = 'glossary_node_ancestor'
+    __table_args__ = (
+        Index('ix_glossary_node_ancestor_ancestor', 'ancestorUri', 'nodeUri'),
+    )
+    nodeUri = Column(String, primary_key=True)
+    ancestorUri = Column(String, primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+
 class GlossarySchemaDefinition:
     __tablename__ = 'glossary_schema'
     schemaUri = Column(String, primary_key=True, default=utils.uuid('glossary_schema'))
@@ -1,6 +1,6 @@
 import datetime
 
-from sqlalchemy import Column, String, DateTime, Enum as DBEnum
+from sqlalchemy import Column, String, DateTime, Enum as DBEnum, Index
 from sqlalchemy.orm import relationship
 
 from .. import Base, utils
@@ -8,6 +8,14 @@ from .. import Base, utils
 
 class ResourcePolicy(Base):
     __tablename__ = 'resource_policy'
+    __table_args__ = (
+        Index(
+            'ix_resource_policy_principal_resource',
+            'principalId',
+            'resourceType',
+            'resourceUri',
+        ),
+    )
 
     sid = Column(String, primary_key=True, default=utils.uuid('resource_policy'))
 
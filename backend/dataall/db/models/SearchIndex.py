@@ -0,0 +1,20 @@
+import datetime
+
+from sqlalchemy import Column, DateTime, String
+
+from .. import Base
+
+
+class SearchIndexCheckpoint(Base):
+    __tablename__ = 'search_index_checkpoint'
+    name = Column(String, primary_key=True)
+    highWaterMark = Column(DateTime, nullable=True)
+    lastFullIndex = Column(DateTime, nullable=True)
+    updated = Column(DateTime, onupdate=datetime.datetime.now)
+
+
+class SearchIndexTombstone(Base):
+    __tablename__ = 'search_index_tombstone'
+    targetUri = Column(String, primary_key=True)
+    targetType = Column(String, nullable=False)
+    deleted = Column(DateTime, default=datetime.datetime.now, index=True)
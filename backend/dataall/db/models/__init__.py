@@ -7,6 +7,7 @@ from .DashboardShare import DashboardShareStatus
 from .Dataset import Dataset
 from .DatasetProfilingRun import DatasetProfilingRun
 from .DatasetQualityRule import DatasetQualityRule
+from .DatasetStatistics import DatasetStatistics
 from .DatasetStorageLocation import DatasetStorageLocation
 from .DatasetTable import DatasetTable
 from .DatasetTableColumn import DatasetTableColumn
@@ -14,7 +15,7 @@ from .DatasetTableProfilingJob import DatasetTableProfilingJob
 from .Environment import Environment
 from .EnvironmentGroup import EnvironmentGroup
 from .FeedMessage import FeedMessage
-from .Glossary import GlossaryNode, TermLink
+from .Glossary import GlossaryNode, GlossaryNodeAncestor, TermLink
 from .Group import Group
 from .GroupMember import GroupMember
 from .Notification import Notification, NotificationType
@@ -28,6 +29,7 @@ from .ResourcePolicy import ResourcePolicy
 from .ResourcePolicyPermission import ResourcePolicyPermission
 from .SagemakerNotebook import SagemakerNotebook
 from .SagemakerStudio import SagemakerStudio, SagemakerStudioUserProfile
+from .SearchIndex import SearchIndexCheckpoint, SearchIndexTombstone
 from .ShareObject import ShareObject
 from .ShareObjectHistory import ShareObjectHistory
 from .ShareObjectItem import ShareObjectItem
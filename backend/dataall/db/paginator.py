@@ -1,6 +1,20 @@
+import base64
+import datetime
+import json
 import math
 
-__version__ = '0.0.2'
+from sqlalchemy import tuple_
+
+from ..utils.cache import TTLCache
+
+__version__ = '0.0.3'
+
+COUNT_EXACT = 'exact'
+COUNT_CACHED = 'cached'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+
+count_cache = TTLCache(ttl=60, maxsize=1024)
 
 
 class Page(object):
@@ -34,6 +48,35 @@ class Page(object):
         }
 
 
+class KeysetPage(object):
+    def __init__(self, items, page_size, cursor, next_cursor, total=None):
+        self.page_size = page_size
+        self.items = items
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.has_previous = bool(cursor)
+        self.has_next = next_cursor is not None
+        self.total = total
+        self.pages = (
+            int(math.ceil(total / float(page_size))) if total is not None else None
+        )
+
+    def to_dict(self):
+        return {
+            'count': self.total,
+            'pages': self.pages,
+            'page': None,
+            'pageSize': self.page_size,
+            'nodes': self.items,
+            'hasNext': self.has_next,
+            'hasPrevious': self.has_previous,
+            'nextPage': None,
+            'previousPage': None,
+            'cursor': self.cursor,
+            'nextCursor': self.next_cursor,
+        }
+
+
 def paginate(query, page, page_size):
     if page <= 0:
         raise AttributeError('page needs to be >= 1')
@@ -42,3 +85,102 @@ def paginate(query, page, page_size):
     items = query.limit(page_size).offset((page - 1) * page_size).all()
     total = query.order_by(None).count()
     return Page(items, page, page_size, total)
+
+
+def encode_cursor(values) -> str:
+    payload = [
+        {'d': v.isoformat()} if isinstance(v, datetime.datetime) else v
+        for v in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise AttributeError(f'Invalid pagination cursor {cursor}')
+    return [
+        datetime.datetime.fromisoformat(v['d']) if isinstance(v, dict) else v
+        for v in payload
+    ]
+
+
+def count_query(query, mode=COUNT_EXACT):
+    """Counts the rows of `query`.
+    `cached` reuses an exact count of the same SQL and parameters for a minute,
+    `estimate` reads the planner row estimate (EXPLAIN) instead of scanning,
+    `none` skips counting"""
+    if mode == COUNT_NONE:
+        return None
+    query = query.order_by(None)
+    if mode == COUNT_ESTIMATE:
+        return _estimate_count(query)
+    if mode == COUNT_CACHED:
+        compiled = query.statement.compile(dialect=query.session.bind.dialect)
+        key = (str(compiled), json.dumps(compiled.params, sort_keys=True, default=str))
+        return count_cache.get_or_set(key, query.count)
+    return query.count()
+
+
+def _estimate_count(query):
+    compiled = query.statement.compile(dialect=query.session.bind.dialect)
+    plan = query.session.connection().execute(
+        f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def paginate_keyset(
+    query, page_size, sort_keys, cursor=None, count=COUNT_CACHED, descending=False
+):
+    """Cursor based pagination over a stable ordering.
+    `sort_keys` is a list of (column, attribute name) pairs whose last column is unique,
+    typically a sort column followed by the primary key. The cursor encodes the
+    sort values of the last returned row, so deep pages cost an index seek, not an OFFSET.
+    """
+    if page_size <= 0:
+        raise AttributeError('page_size needs to be >= 1')
+    columns = [column for column, _ in sort_keys]
+    total = count_query(query, count)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise AttributeError(f'Invalid pagination cursor {cursor}')
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+    query = query.order_by(None).order_by(
+        *[column.desc() if descending else column.asc() for column in columns]
+    )
+    items = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, name) for _, name in sort_keys])
+    return KeysetPage(items, page_size, cursor or None, next_cursor, total)
+
+
+def paginate_filter(query, data, sort_keys, descending=False):
+    """Paginates with page/pageSize, or by cursor when the filter carries a `cursor` key
+    (null or empty for the first page)"""
+    if 'cursor' in data:
+        return paginate_keyset(
+            query,
+            page_size=data.get('pageSize', 10),
+            sort_keys=sort_keys,
+            cursor=data.get('cursor'),
+            count=data.get('countMode') or COUNT_CACHED,
+            descending=descending,
+        )
+    return paginate(
+        query.order_by(
+            *[column.desc() if descending else column.asc() for column, _ in sort_keys]
+        ),
+        page=data.get('page', 1),
+        page_size=data.get('pageSize', 10),
+    )
@@ -1,14 +1,18 @@
-from .connect import connect
+from .connect import connect, LazyConnection
+# registers the listeners recording tombstones of deleted objects
+from . import incremental
 from .indexers import upsert_dataset
 from .indexers import upsert_table
 from .indexers import upsert_dataset_tables
 from .search import run_query
-from .upsert import upsert
+from .upsert import upsert, bulk_upsert
 
 __all__ = [
     'connect',
+    'LazyConnection',
     'run_query',
     'upsert',
+    'bulk_upsert',
     'upsert_dataset',
     'upsert_table',
     'upsert_dataset_tables',
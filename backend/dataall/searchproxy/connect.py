@@ -1,4 +1,5 @@
 import os
+import threading
 from urllib.parse import urlparse
 
 import boto3
@@ -78,6 +79,33 @@ def connect(envname='local'):
         return es
 
 
+class LazyConnection:
+    """OpenSearch client that connects on first use.
+
+    Lets the API start without the domain lookup, `info` and index
+    checks of `connect`, which then run in the first request using search.
+    """
+
+    def __init__(self, envname='local'):
+        self.envname = envname
+        self._es = None
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self):
+        return self._es is not None
+
+    def get(self):
+        if self._es is None:
+            with self._lock:
+                if self._es is None:
+                    self._es = connect(envname=self.envname)
+        return self._es
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
 def connect_dev_environment(envname):
     hostname = 'elasticsearch' if envname == 'dkrcompose' else 'localhost'
     try:
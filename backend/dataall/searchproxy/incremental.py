@@ -0,0 +1,280 @@
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from . import indexers
+from .upsert import bulk_upsert
+from ..db import models
+
+log = logging.getLogger(__name__)
+
+CHECKPOINT = 'catalog'
+# timestamps come from the clocks of several containers, so every run
+# re-reads a small window before the high-water mark
+OVERLAP = timedelta(seconds=int(os.getenv('CATALOG_INDEX_OVERLAP_SECONDS', 120)))
+FULL_REINDEX_INTERVAL = timedelta(
+    hours=int(os.getenv('CATALOG_FULL_REINDEX_HOURS', 24))
+)
+
+INDEXED_MODELS = {
+    models.Dataset: ('datasetUri', 'dataset'),
+    models.DatasetTable: ('tableUri', 'table'),
+    models.DatasetStorageLocation: ('locationUri', 'folder'),
+    models.Dashboard: ('dashboardUri', 'dashboard'),
+}
+
+
+def record_tombstone(mapper, connection, target):
+    """Records a hard deleted object so the next run removes it from the index"""
+    attribute, target_type = INDEXED_MODELS[type(target)]
+    stmt = insert(models.SearchIndexTombstone.__table__).values(
+        targetUri=getattr(target, attribute),
+        targetType=target_type,
+        deleted=datetime.now(),
+    )
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=['targetUri'], set_={'deleted': stmt.excluded.deleted}
+        )
+    )
+
+
+for model in INDEXED_MODELS:
+    event.listen(model, 'after_delete', record_tombstone)
+
+# term link target types whose documents list the linked glossary terms
+TERM_LINK_TARGETS = {
+    'Dataset': models.Dataset,
+    'DatasetTable': models.DatasetTable,
+    'Folder': models.DatasetStorageLocation,
+    'DatasetStorageLocation': models.DatasetStorageLocation,
+    'Dashboard': models.Dashboard,
+}
+
+
+@event.listens_for(models.TermLink, 'after_delete')
+def touch_term_link_target(mapper, connection, target):
+    """A deleted term link leaves no row behind, the target is marked updated
+    so the next run reindexes it without the removed term"""
+    model = TERM_LINK_TARGETS.get(target.targetType)
+    if not model:
+        return
+    attribute = INDEXED_MODELS[model][0]
+    table = model.__table__
+    connection.execute(
+        table.update()
+        .where(table.c[attribute] == target.targetUri)
+        .values(updated=datetime.now())
+    )
+
+
+def get_checkpoint(session) -> models.SearchIndexCheckpoint:
+    checkpoint = session.query(models.SearchIndexCheckpoint).get(CHECKPOINT)
+    if not checkpoint:
+        checkpoint = models.SearchIndexCheckpoint(name=CHECKPOINT)
+        session.add(checkpoint)
+    return checkpoint
+
+
+def needs_full_reindex(checkpoint: models.SearchIndexCheckpoint, now=None) -> bool:
+    now = now or datetime.now()
+    return (
+        not checkpoint.highWaterMark
+        or not checkpoint.lastFullIndex
+        or now - checkpoint.lastFullIndex > FULL_REINDEX_INTERVAL
+    )
+
+
+def _changed(model, since):
+    return or_(
+        model.created > since,
+        model.updated > since,
+        model.deleted > since,
+    )
+
+
+def find_changes(session, since: datetime) -> dict:
+    """Returns the uris to reindex or delete because of changes after `since`.
+
+    Besides the changed objects themselves, the dependants whose documents
+    embed their data are included: tables and folders of a changed dataset,
+    the parent dataset of a created or deleted child (counters), every object
+    of a renamed environment or organization, and the targets of changed
+    term links, glossary terms and votes.
+    """
+    datasets, tables, folders, dashboards = set(), set(), set(), set()
+    deleted = {}
+
+    for uri, is_deleted in session.query(
+        models.Dataset.datasetUri, models.Dataset.deleted.isnot(None)
+    ).filter(_changed(models.Dataset, since)):
+        if is_deleted:
+            deleted[uri] = 'dataset'
+        else:
+            datasets.add(uri)
+
+    for uri, datasetUri, is_deleted in session.query(
+        models.DatasetTable.tableUri,
+        models.DatasetTable.datasetUri,
+        or_(
+            models.DatasetTable.deleted.isnot(None),
+            models.DatasetTable.LastGlueTableStatus == 'Deleted',
+        ),
+    ).filter(_changed(models.DatasetTable, since)):
+        datasets.add(datasetUri)
+        if is_deleted:
+            deleted[uri] = 'table'
+        else:
+            tables.add(uri)
+
+    for uri, datasetUri, is_deleted in session.query(
+        models.DatasetStorageLocation.locationUri,
+        models.DatasetStorageLocation.datasetUri,
+        models.DatasetStorageLocation.deleted.isnot(None),
+    ).filter(_changed(models.DatasetStorageLocation, since)):
+        datasets.add(datasetUri)
+        if is_deleted:
+            deleted[uri] = 'folder'
+        else:
+            folders.add(uri)
+
+    for uri, is_deleted in session.query(
+        models.Dashboard.dashboardUri, models.Dashboard.deleted.isnot(None)
+    ).filter(_changed(models.Dashboard, since)):
+        if is_deleted:
+            deleted[uri] = 'dashboard'
+        else:
+            dashboards.add(uri)
+
+    environments = [
+        uri
+        for (uri,) in session.query(models.Environment.environmentUri).filter(
+            models.Environment.updated > since
+        )
+    ]
+    organizations = [
+        uri
+        for (uri,) in session.query(models.Organization.organizationUri).filter(
+            models.Organization.updated > since
+        )
+    ]
+    if environments or organizations:
+        datasets.update(
+            uri
+            for (uri,) in session.query(models.Dataset.datasetUri).filter(
+                or_(
+                    models.Dataset.environmentUri.in_(environments),
+                    models.Dataset.organizationUri.in_(organizations),
+                )
+            )
+        )
+        dashboards.update(
+            uri
+            for (uri,) in session.query(models.Dashboard.dashboardUri).filter(
+                or_(
+                    models.Dashboard.environmentUri.in_(environments),
+                    models.Dashboard.organizationUri.in_(organizations),
+                )
+            )
+        )
+
+    targets = {
+        uri
+        for (uri,) in session.query(models.TermLink.targetUri).filter(
+            _changed(models.TermLink, since)
+        )
+    }
+    targets.update(
+        uri
+        for (uri,) in session.query(models.TermLink.targetUri)
+        .join(
+            models.GlossaryNode, models.GlossaryNode.nodeUri == models.TermLink.nodeUri
+        )
+        .filter(models.GlossaryNode.updated > since)
+    )
+    targets.update(
+        uri
+        for (uri,) in session.query(models.Vote.targetUri).filter(
+            or_(models.Vote.created > since, models.Vote.updated > since)
+        )
+    )
+
+    for targetUri, targetType in session.query(
+        models.SearchIndexTombstone.targetUri, models.SearchIndexTombstone.targetType
+    ).filter(models.SearchIndexTombstone.deleted > since):
+        deleted[targetUri] = targetType
+
+    # children inherit classification, topics and admins from their dataset
+    # and disappear from the catalog with it
+    dropped = [uri for uri, kind in deleted.items() if kind == 'dataset']
+    for kind, model, attribute, uris in [
+        ('table', models.DatasetTable, 'tableUri', tables),
+        ('folder', models.DatasetStorageLocation, 'locationUri', folders),
+    ]:
+        if not datasets and not dropped:
+            break
+        for uri, datasetUri in session.query(
+            getattr(model, attribute), model.datasetUri
+        ).filter(model.datasetUri.in_(datasets | set(dropped))):
+            if datasetUri in dropped:
+                deleted[uri] = kind
+            else:
+                uris.add(uri)
+
+    return {
+        'datasets': (datasets | targets) - deleted.keys(),
+        'tables': (tables | targets) - deleted.keys(),
+        'folders': (folders | targets) - deleted.keys(),
+        'dashboards': (dashboards | targets) - deleted.keys(),
+        'deleted': deleted,
+    }
+
+
+def changed_documents(session, changes: dict):
+    """Yields the (id, doc) pairs of `changes`, deletions have no doc"""
+    if changes['datasets']:
+        yield from indexers.dataset_documents(
+            session,
+            models.Dataset.datasetUri.in_(changes['datasets']),
+            models.Dataset.deleted.is_(None),
+        )
+    if changes['tables']:
+        yield from indexers.table_documents(
+            session,
+            models.DatasetTable.tableUri.in_(changes['tables']),
+            models.Dataset.deleted.is_(None),
+        )
+    if changes['folders']:
+        yield from indexers.folder_documents(
+            session,
+            models.DatasetStorageLocation.locationUri.in_(changes['folders']),
+            models.Dataset.deleted.is_(None),
+        )
+    if changes['dashboards']:
+        yield from indexers.dashboard_documents(
+            session, models.Dashboard.dashboardUri.in_(changes['dashboards'])
+        )
+    for uri in changes['deleted']:
+        yield uri, None
+
+
+def index_changes(session, es, since: datetime) -> dict:
+    """Reindexes the objects changed after `since` and removes deleted ones"""
+    changes = find_changes(session, since - OVERLAP)
+    log.info(
+        'Found changes: '
+        + ', '.join(f'{key}={len(uris)}' for key, uris in changes.items())
+    )
+    return bulk_upsert(es, changed_documents(session, changes))
+
+
+def purge_tombstones(session, before: datetime):
+    """Tombstones are only needed until a run has applied them"""
+    return (
+        session.query(models.SearchIndexTombstone)
+        .filter(models.SearchIndexTombstone.deleted < before - OVERLAP)
+        .delete(synchronize_session=False)
+    )
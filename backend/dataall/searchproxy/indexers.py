@@ -1,14 +1,17 @@
 import logging
+from itertools import chain
 
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 from sqlalchemy.orm import with_expression
 
-from .upsert import upsert
-from .. import db
+from .upsert import upsert, bulk_upsert
 from ..db import models
+from ..db.api import DatasetStatistics
 
 log = logging.getLogger(__name__)
 
+IN_LIMIT = 500
+
 
 def get_target_glossary_terms(session, targetUri):
     q = (
@@ -32,8 +35,66 @@ def get_target_glossary_terms(session, targetUri):
     return [t.path for t in q]
 
 
-def upsert_dataset(session, es, datasetUri: str):
-    dataset = (
+def get_glossary_terms_by_target(session, targetUris=None) -> dict:
+    """Returns the approved glossary paths of many targets as {targetUri: [path]}"""
+    q = (
+        session.query(models.TermLink.targetUri, models.GlossaryNode.path)
+        .join(
+            models.GlossaryNode, models.GlossaryNode.nodeUri == models.TermLink.nodeUri
+        )
+        .filter(models.TermLink.approvedBySteward.is_(True))
+    )
+    if targetUris is not None:
+        if not targetUris:
+            return {}
+        q = q.filter(models.TermLink.targetUri.in_(targetUris))
+    terms = {}
+    for targetUri, path in q:
+        terms.setdefault(targetUri, []).append(path)
+    return terms
+
+
+def count_by(session, column, *criterion) -> dict:
+    """Returns {value: count} grouped on `column`"""
+    q = session.query(column, func.count()).filter(*criterion).group_by(column)
+    return {value: count for value, count in q}
+
+
+def count_upvotes_by_target(session, target_type, targetUris=None) -> dict:
+    criterion = [
+        models.Vote.targetType == target_type,
+        models.Vote.upvote.is_(True),
+    ]
+    if targetUris is not None:
+        if not targetUris:
+            return {}
+        criterion.append(models.Vote.targetUri.in_(targetUris))
+    return count_by(session, models.Vote.targetUri, *criterion)
+
+
+def dataset_counters(statistics: dict = None) -> dict:
+    """Maps the dataset_statistics counters to the dataset document fields"""
+    statistics = statistics or {}
+    return {
+        'tables': statistics.get('tables', 0),
+        'folders': statistics.get('locations', 0),
+        'upvotes': statistics.get('upvotes', 0),
+    }
+
+
+def _scope(uris, criterion):
+    """Restricts the lookup queries to `uris`, unless that list is unbounded.
+
+    Past a few hundred keys reading every glossary link or counter is cheaper
+    than sending a huge IN (...) list, and the extra rows are simply unused.
+    """
+    if not criterion or len(uris) > IN_LIMIT:
+        return None
+    return uris
+
+
+def dataset_query(session):
+    return (
         session.query(
             models.Dataset.datasetUri.label('datasetUri'),
             models.Dataset.name.label('name'),
@@ -63,52 +124,39 @@ def upsert_dataset(session, es, datasetUri: str):
             models.Environment,
             models.Dataset.environmentUri == models.Environment.environmentUri,
         )
-        .filter(models.Dataset.datasetUri == datasetUri)
-        .first()
-    )
-    count_tables = db.api.Dataset.count_dataset_tables(session, datasetUri)
-    count_folders = db.api.Dataset.count_dataset_locations(session, datasetUri)
-    count_upvotes = db.api.Vote.count_upvotes(
-        session, None, None, datasetUri, {'targetType': 'dataset'}
     )
 
-    if dataset:
-        glossary = get_target_glossary_terms(session, datasetUri)
-        upsert(
-            es=es,
-            index='dataall-index',
-            id=datasetUri,
-            doc={
-                'name': dataset.name,
-                'owner': dataset.owner,
-                'label': dataset.label,
-                'admins': dataset.admins,
-                'database': dataset.database,
-                'source': dataset.source,
-                'resourceKind': 'dataset',
-                'description': dataset.description,
-                'classification': dataset.classification,
-                'tags': [t.replace('-', '') for t in dataset.tags or []],
-                'topics': dataset.topics,
-                'region': dataset.region.replace('-', ''),
-                'environmentUri': dataset.envUri,
-                'environmentName': dataset.envName,
-                'organizationUri': dataset.orgUri,
-                'organizationName': dataset.orgName,
-                'created': dataset.created,
-                'updated': dataset.updated,
-                'deleted': dataset.deleted,
-                'glossary': glossary,
-                'tables': count_tables,
-                'folders': count_folders,
-                'upvotes': count_upvotes,
-            },
-        )
-    return dataset
+
+def dataset_doc(dataset, glossary, tables, folders, upvotes) -> dict:
+    return {
+        'name': dataset.name,
+        'owner': dataset.owner,
+        'label': dataset.label,
+        'admins': dataset.admins,
+        'database': dataset.database,
+        'source': dataset.source,
+        'resourceKind': 'dataset',
+        'description': dataset.description,
+        'classification': dataset.classification,
+        'tags': [t.replace('-', '') for t in dataset.tags or []],
+        'topics': dataset.topics,
+        'region': dataset.region.replace('-', ''),
+        'environmentUri': dataset.envUri,
+        'environmentName': dataset.envName,
+        'organizationUri': dataset.orgUri,
+        'organizationName': dataset.orgName,
+        'created': dataset.created,
+        'updated': dataset.updated,
+        'deleted': dataset.deleted,
+        'glossary': glossary,
+        'tables': tables,
+        'folders': folders,
+        'upvotes': upvotes,
+    }
 
 
-def upsert_table(session, es, tableUri: str):
-    table = (
+def table_query(session):
+    return (
         session.query(
             models.DatasetTable.datasetUri.label('datasetUri'),
             models.DatasetTable.tableUri.label('uri'),
@@ -143,47 +191,37 @@ def upsert_table(session, es, tableUri: str):
             models.Environment,
             models.Dataset.environmentUri == models.Environment.environmentUri,
         )
-        .filter(models.DatasetTable.tableUri == tableUri)
-        .first()
     )
 
-    if table:
-        glossary = get_target_glossary_terms(session, tableUri)
-        tags = table.tags if table.tags else []
-        upsert(
-            es=es,
-            index='dataall-index',
-            id=tableUri,
-            doc={
-                'name': table.name,
-                'admins': table.admins,
-                'owner': table.owner,
-                'label': table.label,
-                'resourceKind': 'table',
-                'description': table.description,
-                'database': table.database,
-                'source': table.source,
-                'classification': table.classification,
-                'tags': [t.replace('-', '') for t in tags or []],
-                'topics': table.topics,
-                'region': table.region.replace('-', ''),
-                'datasetUri': table.datasetUri,
-                'environmentUri': table.envUri,
-                'environmentName': table.envName,
-                'organizationUri': table.orgUri,
-                'organizationName': table.orgName,
-                'created': table.created,
-                'updated': table.updated,
-                'deleted': table.deleted,
-                'glossary': glossary,
-            },
-        )
-        upsert_dataset(session, es, table.datasetUri)
-    return table
 
+def table_doc(table, glossary) -> dict:
+    return {
+        'name': table.name,
+        'admins': table.admins,
+        'owner': table.owner,
+        'label': table.label,
+        'resourceKind': 'table',
+        'description': table.description,
+        'database': table.database,
+        'source': table.source,
+        'classification': table.classification,
+        'tags': [t.replace('-', '') for t in table.tags or []],
+        'topics': table.topics,
+        'region': table.region.replace('-', ''),
+        'datasetUri': table.datasetUri,
+        'environmentUri': table.envUri,
+        'environmentName': table.envName,
+        'organizationUri': table.orgUri,
+        'organizationName': table.orgName,
+        'created': table.created,
+        'updated': table.updated,
+        'deleted': table.deleted,
+        'glossary': glossary,
+    }
 
-def upsert_folder(session, es, locationUri: str):
-    folder = (
+
+def folder_query(session):
+    return (
         session.query(
             models.DatasetStorageLocation.datasetUri.label('datasetUri'),
             models.DatasetStorageLocation.locationUri.label('uri'),
@@ -217,44 +255,36 @@ def upsert_folder(session, es, locationUri: str):
             models.Environment,
             models.Dataset.environmentUri == models.Environment.environmentUri,
         )
-        .filter(models.DatasetStorageLocation.locationUri == locationUri)
-        .first()
     )
-    if folder:
-        glossary = get_target_glossary_terms(session, locationUri)
-        upsert(
-            es=es,
-            index='dataall-index',
-            id=locationUri,
-            doc={
-                'name': folder.name,
-                'admins': folder.admins,
-                'owner': folder.owner,
-                'label': folder.label,
-                'resourceKind': 'folder',
-                'description': folder.description,
-                'source': folder.source,
-                'classification': folder.classification,
-                'tags': [f.replace('-', '') for f in folder.tags or []],
-                'topics': folder.topics,
-                'region': folder.region.replace('-', ''),
-                'datasetUri': folder.datasetUri,
-                'environmentUri': folder.envUri,
-                'environmentName': folder.envName,
-                'organizationUri': folder.orgUri,
-                'organizationName': folder.orgName,
-                'created': folder.created,
-                'updated': folder.updated,
-                'deleted': folder.deleted,
-                'glossary': glossary,
-            },
-        )
-        upsert_dataset(session, es, folder.datasetUri)
-    return folder
 
 
-def upsert_dashboard(session, es, dashboardUri: str):
-    dashboard = (
+def folder_doc(folder, glossary) -> dict:
+    return {
+        'name': folder.name,
+        'admins': folder.admins,
+        'owner': folder.owner,
+        'label': folder.label,
+        'resourceKind': 'folder',
+        'description': folder.description,
+        'source': folder.source,
+        'classification': folder.classification,
+        'tags': [f.replace('-', '') for f in folder.tags or []],
+        'topics': folder.topics,
+        'region': folder.region.replace('-', ''),
+        'datasetUri': folder.datasetUri,
+        'environmentUri': folder.envUri,
+        'environmentName': folder.envName,
+        'organizationUri': folder.orgUri,
+        'organizationName': folder.orgName,
+        'created': folder.created,
+        'updated': folder.updated,
+        'deleted': folder.deleted,
+        'glossary': glossary,
+    }
+
+
+def dashboard_query(session):
+    return (
         session.query(
             models.Dashboard.dashboardUri.label('uri'),
             models.Dashboard.name.label('name'),
@@ -274,48 +304,172 @@ def upsert_dashboard(session, es, dashboardUri: str):
         )
         .join(
             models.Organization,
-            models.Dashboard.organizationUri == models.Dashboard.organizationUri,
+            models.Dashboard.organizationUri == models.Organization.organizationUri,
         )
         .join(
             models.Environment,
             models.Dashboard.environmentUri == models.Environment.environmentUri,
         )
+    )
+
+
+def dashboard_doc(dashboard, glossary, upvotes) -> dict:
+    return {
+        'name': dashboard.name,
+        'admins': dashboard.admins,
+        'owner': dashboard.owner,
+        'label': dashboard.label,
+        'resourceKind': 'dashboard',
+        'description': dashboard.description,
+        'tags': [f.replace('-', '') for f in dashboard.tags or []],
+        'topics': [],
+        'region': dashboard.region.replace('-', ''),
+        'environmentUri': dashboard.envUri,
+        'environmentName': dashboard.envName,
+        'organizationUri': dashboard.orgUri,
+        'organizationName': dashboard.orgName,
+        'created': dashboard.created,
+        'updated': dashboard.updated,
+        'deleted': dashboard.deleted,
+        'glossary': glossary,
+        'upvotes': upvotes,
+    }
+
+
+def upsert_dataset(session, es, datasetUri: str):
+    dataset = (
+        dataset_query(session).filter(models.Dataset.datasetUri == datasetUri).first()
+    )
+    if dataset:
+        upsert(
+            es=es,
+            index='dataall-index',
+            id=datasetUri,
+            doc=dataset_doc(
+                dataset,
+                glossary=get_target_glossary_terms(session, datasetUri),
+                **dataset_counters(
+                    DatasetStatistics.get_statistics(session, [datasetUri])[datasetUri]
+                ),
+            ),
+        )
+    return dataset
+
+
+def upsert_table(session, es, tableUri: str, with_dataset=True):
+    table = table_query(session).filter(models.DatasetTable.tableUri == tableUri).first()
+    if table:
+        upsert(
+            es=es,
+            index='dataall-index',
+            id=tableUri,
+            doc=table_doc(table, get_target_glossary_terms(session, tableUri)),
+        )
+        if with_dataset:
+            upsert_dataset(session, es, table.datasetUri)
+    return table
+
+
+def upsert_folder(session, es, locationUri: str, with_dataset=True):
+    folder = (
+        folder_query(session)
+        .filter(models.DatasetStorageLocation.locationUri == locationUri)
+        .first()
+    )
+    if folder:
+        upsert(
+            es=es,
+            index='dataall-index',
+            id=locationUri,
+            doc=folder_doc(folder, get_target_glossary_terms(session, locationUri)),
+        )
+        if with_dataset:
+            upsert_dataset(session, es, folder.datasetUri)
+    return folder
+
+
+def upsert_dashboard(session, es, dashboardUri: str):
+    dashboard = (
+        dashboard_query(session)
         .filter(models.Dashboard.dashboardUri == dashboardUri)
         .first()
     )
     if dashboard:
-        glossary = get_target_glossary_terms(session, dashboardUri)
-        count_upvotes = db.api.Vote.count_upvotes(
-            session, None, None, dashboardUri, {'targetType': 'dashboard'}
-        )
         upsert(
             es=es,
             index='dataall-index',
             id=dashboardUri,
-            doc={
-                'name': dashboard.name,
-                'admins': dashboard.admins,
-                'owner': dashboard.owner,
-                'label': dashboard.label,
-                'resourceKind': 'dashboard',
-                'description': dashboard.description,
-                'tags': [f.replace('-', '') for f in dashboard.tags or []],
-                'topics': [],
-                'region': dashboard.region.replace('-', ''),
-                'environmentUri': dashboard.envUri,
-                'environmentName': dashboard.envName,
-                'organizationUri': dashboard.orgUri,
-                'organizationName': dashboard.orgName,
-                'created': dashboard.created,
-                'updated': dashboard.updated,
-                'deleted': dashboard.deleted,
-                'glossary': glossary,
-                'upvotes': count_upvotes,
-            },
+            doc=dashboard_doc(
+                dashboard,
+                glossary=get_target_glossary_terms(session, dashboardUri),
+                upvotes=count_upvotes_by_target(
+                    session, 'dashboard', [dashboardUri]
+                ).get(dashboardUri, 0),
+            ),
         )
     return dashboard
 
 
+def dataset_documents(session, *criterion):
+    """Yields (datasetUri, doc) for every dataset matching `criterion`.
+
+    Counters and glossary paths are fetched with one query each instead of
+    once per dataset.
+    """
+    datasets = dataset_query(session).filter(*criterion).all()
+    uris = [d.datasetUri for d in datasets]
+    if not uris:
+        return
+    scope = _scope(uris, criterion)
+    glossary = get_glossary_terms_by_target(session, scope)
+    statistics = DatasetStatistics.get_statistics(session, scope)
+    for dataset in datasets:
+        uri = dataset.datasetUri
+        yield uri, dataset_doc(
+            dataset,
+            glossary=glossary.get(uri, []),
+            **dataset_counters(statistics.get(uri)),
+        )
+
+
+def table_documents(session, *criterion):
+    """Yields (tableUri, doc) for every table matching `criterion`"""
+    tables = (
+        table_query(session)
+        .filter(models.DatasetTable.LastGlueTableStatus != 'Deleted', *criterion)
+        .all()
+    )
+    glossary = get_glossary_terms_by_target(
+        session, _scope([t.uri for t in tables], criterion)
+    )
+    for table in tables:
+        yield table.uri, table_doc(table, glossary.get(table.uri, []))
+
+
+def folder_documents(session, *criterion):
+    """Yields (locationUri, doc) for every folder matching `criterion`"""
+    folders = folder_query(session).filter(*criterion).all()
+    glossary = get_glossary_terms_by_target(
+        session, _scope([f.uri for f in folders], criterion)
+    )
+    for folder in folders:
+        yield folder.uri, folder_doc(folder, glossary.get(folder.uri, []))
+
+
+def dashboard_documents(session, *criterion):
+    """Yields (dashboardUri, doc) for every dashboard matching `criterion`"""
+    dashboards = dashboard_query(session).filter(*criterion).all()
+    scope = _scope([d.uri for d in dashboards], criterion)
+    glossary = get_glossary_terms_by_target(session, scope)
+    upvotes = count_upvotes_by_target(session, 'dashboard', scope)
+    for dashboard in dashboards:
+        yield dashboard.uri, dashboard_doc(
+            dashboard,
+            glossary=glossary.get(dashboard.uri, []),
+            upvotes=upvotes.get(dashboard.uri, 0),
+        )
+
+
 def upsert_dataset_tables(session, es, datasetUri: str):
     tables = (
         session.query(models.DatasetTable)
@@ -327,8 +481,11 @@ def upsert_dataset_tables(session, es, datasetUri: str):
         )
         .all()
     )
-    for table in tables:
-        upsert_table(session, es, table.tableUri)
+    bulk_upsert(
+        es,
+        table_documents(session, models.DatasetTable.datasetUri == datasetUri),
+    )
+    upsert_dataset(session, es, datasetUri)
     return tables
 
 
@@ -348,14 +505,36 @@ def remove_deleted_tables(session, es, datasetUri: str):
     return tables
 
 
+def reindex_synced_tables(session, es, datasetUri: str, tableUris, deletedTableUris):
+    """Indexes the tables changed by a synchronization and removes the
+    deleted ones in one bulk request, then refreshes the dataset"""
+    tableUris, deletedTableUris = list(tableUris), list(deletedTableUris)
+    documents = []
+    if tableUris:
+        documents = table_documents(
+            session, models.DatasetTable.tableUri.in_(tableUris)
+        )
+    report = bulk_upsert(
+        es, chain(documents, ((uri, None) for uri in deletedTableUris))
+    )
+    if tableUris or deletedTableUris:
+        upsert_dataset(session, es, datasetUri)
+    return report
+
+
 def upsert_dataset_folders(session, es, datasetUri: str):
     folders = (
         session.query(models.DatasetStorageLocation)
         .filter(models.DatasetStorageLocation.datasetUri == datasetUri)
         .all()
     )
-    for folder in folders:
-        upsert_folder(session, es, folder.locationUri)
+    bulk_upsert(
+        es,
+        folder_documents(
+            session, models.DatasetStorageLocation.datasetUri == datasetUri
+        ),
+    )
+    upsert_dataset(session, es, datasetUri)
     return folders
 
 
@@ -1,8 +1,16 @@
 import logging
+import os
 from datetime import datetime
 
+from opensearchpy import helpers
+
 log = logging.getLogger(__name__)
 
+BULK_CHUNK_SIZE = int(os.getenv('ES_BULK_CHUNK_SIZE', 500))
+BULK_MAX_CHUNK_BYTES = int(os.getenv('ES_BULK_MAX_CHUNK_BYTES', 5 * 1024 * 1024))
+# chunks rejected with 429 (too many requests) are retried with backoff
+BULK_MAX_RETRIES = 3
+
 
 def upsert(es, index, id, doc):
     doc['_indexed'] = datetime.now()
@@ -13,3 +21,57 @@ def upsert(es, index, id, doc):
     else:
         log.error(f'ES config is missing doc {doc} for id {id} was not indexed')
         return False
+
+
+def bulk_upsert(
+    es,
+    documents,
+    index='dataall-index',
+    chunk_size=BULK_CHUNK_SIZE,
+    max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+) -> dict:
+    """Indexes an iterable of (id, doc) pairs through the `_bulk` API.
+
+    A pair whose doc is None deletes the document instead. Documents are
+    streamed in chunks bounded by count and payload size. Failed documents do
+    not stop the run, they are returned in the report as
+    {'indexed': n, 'deleted': n, 'errors': [{'id': id, 'error': reason}]}.
+    """
+    report = {'indexed': 0, 'deleted': 0, 'errors': []}
+    if not es:
+        log.error('ES config is missing, documents were not indexed')
+        return report
+    indexed = datetime.now()
+
+    def actions():
+        for id, doc in documents:
+            if doc is None:
+                yield {'_op_type': 'delete', '_index': index, '_id': id}
+                continue
+            doc['_indexed'] = indexed
+            yield {'_op_type': 'index', '_index': index, '_id': id, '_source': doc}
+
+    for ok, item in helpers.streaming_bulk(
+        es,
+        actions(),
+        chunk_size=chunk_size,
+        max_chunk_bytes=max_chunk_bytes,
+        raise_on_error=False,
+        raise_on_exception=False,
+        max_retries=BULK_MAX_RETRIES,
+    ):
+        op_type, result = next(iter(item.items()))
+        if ok:
+            report['deleted' if op_type == 'delete' else 'indexed'] += 1
+        elif op_type == 'delete' and result.get('status') == 404:
+            # deleting a document that was never indexed is not an error
+            continue
+        else:
+            report['errors'].append(
+                {'id': result.get('_id'), 'error': str(result.get('error'))}
+            )
+    log.info(
+        f'Bulk indexed {report["indexed"]} and deleted {report["deleted"]} documents '
+        f'with {len(report["errors"])} errors'
+    )
+    return report
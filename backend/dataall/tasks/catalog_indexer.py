@@ -1,11 +1,13 @@
+import itertools
 import logging
 import os
 import sys
+from datetime import datetime
 
-from .. import db
 from ..db import get_engine, exceptions
 from ..db import models
-from ..searchproxy import indexers
+from ..searchproxy import incremental, indexers
+from ..searchproxy.upsert import bulk_upsert
 from ..searchproxy.connect import (
     connect,
 )
@@ -18,38 +20,74 @@ if not root.hasHandlers():
 log = logging.getLogger(__name__)
 
 
+def _report_errors(report):
+    if report['errors']:
+        log.error(f'Failed to index {len(report["errors"])} objects: {report["errors"]}')
+        AlarmService().trigger_catalog_indexing_failure_alarm(
+            error=f'{len(report["errors"])} documents failed to index, '
+            f'first error: {report["errors"][0]}'
+        )
+
+
 def index_objects(engine, es):
     try:
         if not es:
             raise exceptions.AWSResourceNotFound(
                 action='CATALOG_INDEXER_TASK', message='ES configuration not found'
             )
-        indexed_objects_counter = 0
+        started = datetime.now()
         with engine.scoped_session() as session:
+            active = models.Dataset.deleted.is_(None)
+            tombstones = session.query(models.SearchIndexTombstone.targetUri)
+            report = bulk_upsert(
+                es,
+                itertools.chain(
+                    indexers.dataset_documents(session, active),
+                    indexers.table_documents(session, active),
+                    indexers.folder_documents(session, active),
+                    indexers.dashboard_documents(session),
+                    ((uri, None) for (uri,) in tombstones),
+                ),
+            )
+            checkpoint = incremental.get_checkpoint(session)
+            checkpoint.highWaterMark = started
+            checkpoint.lastFullIndex = started
+            incremental.purge_tombstones(session, started)
+        indexed_objects_counter = report['indexed']
+        log.info(f'Successfully indexed {indexed_objects_counter} objects')
+        _report_errors(report)
+        return indexed_objects_counter
+    except Exception as e:
+        AlarmService().trigger_catalog_indexing_failure_alarm(error=str(e))
+        raise e
 
-            all_datasets: [models.Dataset] = db.api.Dataset.list_all_active_datasets(
-                session
+
+def index_changes(engine, es):
+    """Reindexes what changed since the last run, or everything when the last
+    full reindex is missing or older than FULL_REINDEX_INTERVAL"""
+    with engine.scoped_session() as session:
+        checkpoint = incremental.get_checkpoint(session)
+        full = incremental.needs_full_reindex(checkpoint)
+        since = checkpoint.highWaterMark
+    if full:
+        log.info('No recent full reindex, indexing the whole catalog')
+        return index_objects(engine, es)
+    try:
+        if not es:
+            raise exceptions.AWSResourceNotFound(
+                action='CATALOG_INDEXER_TASK', message='ES configuration not found'
             )
-            log.info(f'Found {len(all_datasets)} datasets')
-            dataset: models.Dataset
-            for dataset in all_datasets:
-                tables = indexers.upsert_dataset_tables(session, es, dataset.datasetUri)
-                folders = indexers.upsert_dataset_folders(
-                    session, es, dataset.datasetUri
-                )
-                indexed_objects_counter = (
-                    indexed_objects_counter + len(tables) + len(folders) + 1
-                )
-
-            all_dashboards: [models.Dashboard] = session.query(models.Dashboard).all()
-            log.info(f'Found {len(all_dashboards)} dashboards')
-            dashboard: models.Dashboard
-            for dashboard in all_dashboards:
-                indexers.upsert_dashboard(session, es, dashboard.dashboardUri)
-                indexed_objects_counter = indexed_objects_counter + 1
-
-            log.info(f'Successfully indexed {indexed_objects_counter} objects')
-            return indexed_objects_counter
+        started = datetime.now()
+        with engine.scoped_session() as session:
+            report = incremental.index_changes(session, es, since)
+            incremental.get_checkpoint(session).highWaterMark = started
+            incremental.purge_tombstones(session, since)
+        log.info(
+            f'Successfully indexed {report["indexed"]} and deleted '
+            f'{report["deleted"]} objects changed since {since}'
+        )
+        _report_errors(report)
+        return report['indexed'] + report['deleted']
     except Exception as e:
         AlarmService().trigger_catalog_indexing_failure_alarm(error=str(e))
         raise e
@@ -59,4 +97,7 @@ if __name__ == '__main__':
     ENVNAME = os.environ.get('envname', 'local')
     ENGINE = get_engine(envname=ENVNAME)
     ES = connect(envname=ENVNAME)
-    index_objects(engine=ENGINE, es=ES)
+    if os.environ.get('CATALOG_INDEX_MODE', 'incremental') == 'full':
+        index_objects(engine=ENGINE, es=ES)
+    else:
+        index_changes(engine=ENGINE, es=ES)
@@ -0,0 +1,26 @@
+import logging
+import os
+import sys
+
+from ..db import api, get_engine
+
+root = logging.getLogger()
+root.setLevel(logging.INFO)
+if not root.hasHandlers():
+    root.addHandler(logging.StreamHandler(sys.stdout))
+log = logging.getLogger(__name__)
+
+
+def reconcile_statistics(engine):
+    """Repairs the dataset statistics counters that drifted from the counted
+    tables, locations and upvotes"""
+    with engine.scoped_session() as session:
+        repaired = api.DatasetStatistics.reconcile(session)
+    log.info(f'Dataset statistics reconciled, {repaired} rows repaired')
+    return repaired
+
+
+if __name__ == '__main__':
+    ENVNAME = os.environ.get('envname', 'local')
+    ENGINE = get_engine(envname=ENVNAME)
+    reconcile_statistics(engine=ENGINE)
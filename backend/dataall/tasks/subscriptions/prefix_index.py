@@ -0,0 +1,50 @@
+class S3PrefixIndex:
+    """In-memory lookup of objects by S3 prefix, keyed by account and region.
+
+    Prefixes are stored in a trie of their `/` separated segments.
+    `find(prefix, accountid, region)` returns the first indexed object whose
+    prefix starts with `prefix`, the same match as an SQL
+    `S3Prefix LIKE 'prefix%'`, without a query per lookup.
+    """
+
+    _VALUE = object()
+
+    def __init__(self, objects=None):
+        self.roots = {}
+        for obj in objects or []:
+            self.add(obj.S3Prefix, obj.AWSAccountId, obj.region, obj)
+
+    def add(self, prefix, accountid, region, obj):
+        if not prefix:
+            return
+        node = self.roots.setdefault((accountid, region), {})
+        for segment in prefix.split('/'):
+            node = node.setdefault(segment, {})
+        node.setdefault(self._VALUE, obj)
+
+    def find(self, prefix, accountid, region):
+        node = self.roots.get((accountid, region))
+        if not node or prefix is None:
+            return None
+        *segments, last = prefix.split('/')
+        for segment in segments:
+            node = node.get(segment)
+            if node is None:
+                return None
+        # the last segment may be a partial one
+        for segment, child in node.items():
+            if segment is not self._VALUE and segment.startswith(last):
+                found = self._first(child)
+                if found is not None:
+                    return found
+        return None
+
+    def _first(self, node):
+        if self._VALUE in node:
+            return node[self._VALUE]
+        for segment, child in node.items():
+            if segment is not self._VALUE:
+                found = self._first(child)
+                if found is not None:
+                    return found
+        return None
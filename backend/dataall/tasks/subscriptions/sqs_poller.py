@@ -2,10 +2,13 @@ import json
 import logging
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-import boto3
 from botocore.exceptions import ClientError
 
+from ...utils import cached_client
+
 root = logging.getLogger()
 root.setLevel(logging.INFO)
 if not root.hasHandlers():
@@ -15,57 +18,100 @@ log = logging.getLogger(__name__)
 ENVNAME = os.getenv('envname', 'local')
 region = os.getenv('AWS_REGION', 'eu-west-1')
 
-
-def poll_queues(queues):
-    log.debug(f'Received Queues URL: {queues}')
-
+MAX_WORKERS = int(os.getenv('SUBSCRIPTIONS_POLL_MAX_WORKERS', 16))
+# long polling wait of a receive, an empty queue costs one receive of this length
+WAIT_TIME_SECONDS = int(os.getenv('SUBSCRIPTIONS_POLL_WAIT_SECONDS', 5))
+# the task is scheduled every 15 minutes, queues stop being drained after this
+TIME_BUDGET = float(os.getenv('SUBSCRIPTIONS_POLL_TIME_BUDGET_SECONDS', 10 * 60))
+# receive_message and delete_message_batch handle at most 10 messages
+BATCH_SIZE = 10
+
+
+def poll_queue(queue, deadline: float, wait_time: int = WAIT_TIME_SECONDS):
+    """Drains `queue` until it is empty or `deadline` is reached.
+
+    Returns the producer messages and the queue metrics: received, deleted
+    and failed message counts, number of receive calls and duration.
+    """
+    started = time.monotonic()
+    metrics = {
+        'queue': queue['url'],
+        'received': 0,
+        'deleted': 0,
+        'failed': 0,
+        'polls': 0,
+    }
     messages = []
-
-    for queue in queues:
-
-        sqs = boto3.client('sqs', region_name=queue['region'])
-        try:
-
+    sqs = cached_client('sqs', queue['region'])
+    try:
+        while time.monotonic() < deadline:
             response = sqs.receive_message(
                 QueueUrl=queue['url'],
                 AttributeNames=['SentTimestamp'],
-                MaxNumberOfMessages=10,
+                MaxNumberOfMessages=BATCH_SIZE,
                 MessageAttributeNames=['All'],
+                WaitTimeSeconds=wait_time,
             )
-
-            if not response or not response.get('Messages'):
-                log.info(f"No new messages available from queue: {queue['url']}")
-
-            if response and response.get('Messages'):
-
-                log.info(f"Available messages from queue: {response['Messages']}")
-                for message in response['Messages']:
-                    if message.get('Body'):
-                        log.info('Consumed message from queue: %s' % message)
-                        producer_message = json.loads(
-                            json.loads(message.get('Body')).get('Message')
+            metrics['polls'] += 1
+            received = (response or {}).get('Messages', [])
+            if not received:
+                break
+            metrics['received'] += len(received)
+            for message in received:
+                if message.get('Body'):
+                    log.debug('Consumed message from queue: %s' % message)
+                    try:
+                        messages.append(
+                            json.loads(json.loads(message['Body']).get('Message'))
                         )
-                        log.info(f'Extracted Message: {producer_message}')
-
-                        messages.append(producer_message)
-
-                        try:
-                            log.info(
-                                f'Deleting the original message from the Queue: {message}'
-                            )
-                            delete_response = sqs.delete_message(
-                                QueueUrl=queue['url'],
-                                ReceiptHandle=message.get('ReceiptHandle'),
-                            )
-                            log.info(
-                                f'Deleted message from the Queue response: {delete_response}'
-                            )
-                        except ClientError as e:
-                            log.error(
-                                f'Failed to delete the original message from queue {queue} due to: {e}'
-                            )
-
-        except ClientError as e:
-            log.error(f'Failed to get messages from queue {queue} due to: {e}')
-
+                    except (TypeError, ValueError) as e:
+                        metrics['failed'] += 1
+                        log.error(f'Invalid message {message} on {queue["url"]}: {e}')
+            delete_messages(sqs, queue, received, metrics)
+    except ClientError as e:
+        log.error(f'Failed to get messages from queue {queue} due to: {e}')
+        metrics['error'] = str(e)
+    metrics['duration'] = round(time.monotonic() - started, 3)
+    return messages, metrics
+
+
+def delete_messages(sqs, queue, received, metrics):
+    try:
+        response = sqs.delete_message_batch(
+            QueueUrl=queue['url'],
+            Entries=[
+                {'Id': str(i), 'ReceiptHandle': message['ReceiptHandle']}
+                for i, message in enumerate(received)
+            ],
+        )
+        metrics['deleted'] += len(response.get('Successful', []))
+        for failure in response.get('Failed', []):
+            log.error(f'Failed to delete message from queue {queue["url"]}: {failure}')
+    except ClientError as e:
+        log.error(
+            f'Failed to delete the original messages from queue {queue} due to: {e}'
+        )
+
+
+def poll(
+    queues,
+    max_workers=MAX_WORKERS,
+    wait_time=WAIT_TIME_SECONDS,
+    time_budget=TIME_BUDGET,
+):
+    """Drains the queues concurrently and returns their messages and metrics"""
+    log.debug(f'Received Queues URL: {queues}')
+    if not queues:
+        return [], []
+    deadline = time.monotonic() + time_budget
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queues)))) as executor:
+        results = list(
+            executor.map(lambda queue: poll_queue(queue, deadline, wait_time), queues)
+        )
+    messages = [message for queue_messages, _ in results for message in queue_messages]
+    return messages, [metrics for _, metrics in results]
+
+
+def poll_queues(queues, **kwargs):
+    messages, metrics = poll(queues, **kwargs)
     return messages
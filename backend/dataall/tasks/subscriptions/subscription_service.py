@@ -2,9 +2,10 @@ import json
 import logging
 import os
 import sys
+from collections import defaultdict
 
 from botocore.exceptions import ClientError
-from sqlalchemy import and_
+from sqlalchemy import and_, tuple_
 
 from ... import db
 from ...aws.handlers.service_handlers import Worker
@@ -12,7 +13,8 @@ from ...aws.handlers.sts import SessionHelper
 from ...aws.handlers.sqs import SqsQueue
 from ...db import get_engine
 from ...db import models
-from ...tasks.subscriptions import poll_queues
+from ...tasks.subscriptions import poll
+from ...tasks.subscriptions.prefix_index import S3PrefixIndex
 from ...utils import json_utils
 
 root = logging.getLogger()
@@ -46,90 +48,176 @@ class SubscriptionService:
             )
         return queues
 
+    @staticmethod
+    def report_poll_metrics(metrics: [dict]) -> dict:
+        """Logs the throughput of every polled queue and returns the totals"""
+        summary = {
+            'queues': len(metrics),
+            'received': 0,
+            'deleted': 0,
+            'failed': 0,
+            'errors': 0,
+        }
+        for queue in metrics:
+            for key in ['received', 'deleted', 'failed']:
+                summary[key] += queue[key]
+            summary['errors'] += 1 if queue.get('error') else 0
+            if queue['received'] or queue.get('error'):
+                rate = queue['received'] / queue['duration'] if queue['duration'] else 0
+                log.info(
+                    f"Queue {queue['queue']}: {queue['received']} messages in "
+                    f"{queue['polls']} polls, {queue['duration']}s ({rate:.1f} msg/s)"
+                    + (f", error: {queue['error']}" if queue.get('error') else '')
+                )
+        log.info(f'Polled subscription queues: {summary}')
+        return summary
+
     @staticmethod
     def notify_consumers(engine, messages):
 
         log.info(f'Notifying consumers with messages {messages}')
 
         with engine.scoped_session() as session:
+            batch = SubscriptionService.resolve_messages(session, messages)
 
-            for message in messages:
+        for message in messages:
 
-                SubscriptionService.publish_table_update_message(engine, message)
+            SubscriptionService.publish_table_update_message(engine, message, batch)
 
-                SubscriptionService.publish_location_update_message(session, message)
+            SubscriptionService.publish_location_update_message(engine, message, batch)
 
         return True
 
     @staticmethod
-    def publish_table_update_message(engine, message):
-        with engine.scoped_session() as session:
-            table: models.DatasetTable = db.api.DatasetTable.get_table_by_s3_prefix(
-                session,
-                message.get('prefix'),
-                message.get('accountid'),
-                message.get('region'),
-            )
-            if not table:
-                log.info(f'No table for message {message}')
-            else:
-                log.info(
-                    f'Found table {table.tableUri}|{table.GlueTableName}|{table.S3Prefix}'
+    def resolve_messages(session, messages) -> dict:
+        """Maps a batch of messages to their tables, folders, datasets, share
+        items, approved shares and share environments.
+
+        Tables and folders of the accounts and regions of the batch are
+        indexed by S3 prefix once, so the number of queries does not depend
+        on the number of messages.
+        """
+        scopes = list(
+            {(message.get('accountid'), message.get('region')) for message in messages}
+        )
+        batch = {
+            'tables': S3PrefixIndex(),
+            'locations': S3PrefixIndex(),
+            'datasets': {},
+            'share_items': defaultdict(list),
+            'shares': {},
+            'environments': {},
+        }
+        if not scopes:
+            return batch
+        for key, model in [
+            ('tables', models.DatasetTable),
+            ('locations', models.DatasetStorageLocation),
+        ]:
+            batch[key] = S3PrefixIndex(
+                session.query(model).filter(
+                    tuple_(model.AWSAccountId, model.region).in_(scopes)
                 )
+            )
 
-                dataset: models.Dataset = session.query(models.Dataset).get(
-                    table.datasetUri
-                )
-                log.info(
-                    f'Found dataset {dataset.datasetUri}|{dataset.environmentUri}|{dataset.AwsAccountId}'
-                )
-                share_items: [models.ShareObjectItem] = (
-                    session.query(models.ShareObjectItem)
-                    .filter(models.ShareObjectItem.itemUri == table.tableUri)
-                    .all()
+        found = [
+            obj
+            for message in messages
+            for obj in SubscriptionService._find_targets(batch, message)
+            if obj
+        ]
+        if not found:
+            return batch
+        batch['datasets'] = {
+            dataset.datasetUri: dataset
+            for dataset in session.query(models.Dataset).filter(
+                models.Dataset.datasetUri.in_({obj.datasetUri for obj in found})
+            )
+        }
+        for item in session.query(models.ShareObjectItem).filter(
+            models.ShareObjectItem.itemUri.in_(
+                {getattr(obj, 'tableUri', None) or obj.locationUri for obj in found}
+            )
+        ):
+            batch['share_items'][item.itemUri].append(item)
+        share_uris = {
+            item.shareUri for items in batch['share_items'].values() for item in items
+        }
+        if share_uris:
+            batch['shares'] = {
+                share.shareUri: share
+                for share in session.query(models.ShareObject).filter(
+                    and_(
+                        models.ShareObject.shareUri.in_(share_uris),
+                        models.ShareObject.status == 'Approved',
+                    )
                 )
-                log.info(f'Found shared items for table {share_items}')
-
-                return SubscriptionService.publish_sns_message(
-                    engine,
-                    message,
-                    dataset,
-                    share_items,
-                    table.S3Prefix,
-                    table=table,
+            }
+        principals = {share.principalId for share in batch['shares'].values()}
+        if principals:
+            batch['environments'] = {
+                env.environmentUri: env
+                for env in session.query(models.Environment).filter(
+                    models.Environment.environmentUri.in_(principals)
                 )
+            }
+        return batch
+
+    @staticmethod
+    def _find_targets(batch, message):
+        key = (message.get('prefix'), message.get('accountid'), message.get('region'))
+        return batch['tables'].find(*key), batch['locations'].find(*key)
 
     @staticmethod
-    def publish_location_update_message(session, message):
-        location: models.DatasetStorageLocation = (
-            db.api.DatasetStorageLocation.get_location_by_s3_prefix(
-                session,
-                message.get('prefix'),
-                message.get('accountid'),
-                message.get('region'),
+    def publish_table_update_message(engine, message, batch=None):
+        if batch is None:
+            with engine.scoped_session() as session:
+                batch = SubscriptionService.resolve_messages(session, [message])
+        table, _ = SubscriptionService._find_targets(batch, message)
+        if not table:
+            log.info(f'No table for message {message}')
+        else:
+            log.info(
+                f'Found table {table.tableUri}|{table.GlueTableName}|{table.S3Prefix}'
             )
-        )
+            dataset: models.Dataset = batch['datasets'].get(table.datasetUri)
+            log.info(
+                f'Found dataset {dataset.datasetUri}|{dataset.environmentUri}|{dataset.AwsAccountId}'
+            )
+            share_items = batch['share_items'].get(table.tableUri, [])
+            log.info(f'Found shared items for table {share_items}')
+
+            return SubscriptionService.publish_sns_message(
+                engine,
+                message,
+                dataset,
+                share_items,
+                table.S3Prefix,
+                table=table,
+                batch=batch,
+            )
+
+    @staticmethod
+    def publish_location_update_message(engine, message, batch=None):
+        if batch is None:
+            with engine.scoped_session() as session:
+                batch = SubscriptionService.resolve_messages(session, [message])
+        _, location = SubscriptionService._find_targets(batch, message)
         if not location:
             log.info(f'No location found for message {message}')
 
         else:
             log.info(f'Found location {location.locationUri}|{location.S3Prefix}')
 
-            dataset: models.Dataset = session.query(models.Dataset).get(
-                location.datasetUri
-            )
+            dataset: models.Dataset = batch['datasets'].get(location.datasetUri)
             log.info(
                 f'Found dataset {dataset.datasetUri}|{dataset.environmentUri}|{dataset.AwsAccountId}'
             )
-            share_items: [models.ShareObjectItem] = (
-                session.query(models.ShareObjectItem)
-                .filter(models.ShareObjectItem.itemUri == location.locationUri)
-                .all()
-            )
+            share_items = batch['share_items'].get(location.locationUri, [])
             log.info(f'Found shared items for location {share_items}')
 
             return SubscriptionService.publish_sns_message(
-                session, message, dataset, share_items, location.S3Prefix
+                engine, message, dataset, share_items, location.S3Prefix, batch=batch
             )
 
     @staticmethod
@@ -203,23 +291,37 @@ class SubscriptionService:
 
     @staticmethod
     def publish_sns_message(
-        engine, message, dataset, share_items, prefix, table: models.DatasetTable = None
+        engine,
+        message,
+        dataset,
+        share_items,
+        prefix,
+        table: models.DatasetTable = None,
+        batch: dict = None,
     ):
         with engine.scoped_session() as session:
             for item in share_items:
 
-                share_object = SubscriptionService.get_approved_share_object(
-                    session, item
-                )
+                if batch is not None:
+                    share_object = batch['shares'].get(item.shareUri)
+                else:
+                    share_object = SubscriptionService.get_approved_share_object(
+                        session, item
+                    )
 
                 if not share_object or not share_object.principalId:
                     log.error(
                         f'Share Item with no share object or no principalId ? {item.shareItemUri}'
                     )
                 else:
-                    environment = session.query(models.Environment).get(
-                        share_object.principalId
-                    )
+                    if batch is not None:
+                        environment = batch['environments'].get(
+                            share_object.principalId
+                        )
+                    else:
+                        environment = session.query(models.Environment).get(
+                            share_object.principalId
+                        )
                     if not environment:
                         log.error(
                             f'Environment of share owner was deleted ? {share_object.principalId}'
@@ -236,15 +338,15 @@ class SubscriptionService:
                             if table:
                                 message['table'] = table.GlueTableName
 
-                            log.info(
-                                f'Producer message before notifications: {message}'
-                            )
+                                log.info(
+                                    f'Producer message before notifications: {message}'
+                                )
 
-                            SubscriptionService.redshift_copy(
-                                engine, message, dataset, environment, table
-                            )
+                                SubscriptionService.redshift_copy(
+                                    engine, message, dataset, environment, table
+                                )
 
-                            message = {
+                            notification = {
                                 'location': prefix,
                                 'owner': dataset.owner,
                                 'message': f'Dataset owner {dataset.owner} '
@@ -252,7 +354,7 @@ class SubscriptionService:
                             }
 
                             response = SubscriptionService.sns_call(
-                                message, environment
+                                notification, environment
                             )
 
                             log.info(f'SNS update publish response {response}')
@@ -331,6 +433,7 @@ if __name__ == '__main__':
     log.info('Polling datasets updates...')
     service = SubscriptionService()
     queues = service.get_queues(service.get_environments(ENGINE))
-    messages = poll_queues(queues)
+    messages, metrics = poll(queues)
+    service.report_poll_metrics(metrics)
     service.notify_consumers(ENGINE, messages)
     log.info('Datasets updates shared successfully')
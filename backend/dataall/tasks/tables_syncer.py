@@ -1,6 +1,11 @@
 import logging
 import os
+import random
 import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from operator import and_
 
 from .. import db
@@ -20,83 +25,201 @@ if not root.hasHandlers():
     root.addHandler(logging.StreamHandler(sys.stdout))
 log = logging.getLogger(__name__)
 
+# every worker holds a database connection, the workers are capped by the
+# capacity of the engine pool
+MAX_WORKERS = int(os.getenv('TABLES_SYNC_MAX_WORKERS', 8))
+MAX_WORKERS_PER_ACCOUNT = int(os.getenv('TABLES_SYNC_MAX_WORKERS_PER_ACCOUNT', 4))
+# AWS calls per second and per account, shared by all the account's workers
+RATE_PER_ACCOUNT = float(os.getenv('TABLES_SYNC_RATE_PER_ACCOUNT', 10))
+# the task is scheduled every 15 minutes, datasets not started in time are
+# skipped and picked up by the next run
+TIME_BUDGET = float(os.getenv('TABLES_SYNC_TIME_BUDGET_SECONDS', 13 * 60))
+
+SUCCEEDED = 'Succeeded'
+FAILED = 'Failed'
+SKIPPED = 'Skipped'
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second with bursts of `rate`"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.rate, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
 
-def sync_tables(engine, es=None):
+def sync_dataset_tables(engine, datasetUri, es=None, limiter: RateLimiter = None):
+    """Synchronizes the tables of one dataset and returns its processed tables"""
+    limiter = limiter or RateLimiter(RATE_PER_ACCOUNT)
     with engine.scoped_session() as session:
-        processed_tables = []
-        all_datasets: [models.Dataset] = db.api.Dataset.list_all_active_datasets(
-            session
-        )
-        log.info(f'Found {len(all_datasets)} datasets for tables sync')
-        dataset: models.Dataset
-        for dataset in all_datasets:
-            log.info(
-                f'Synchronizing dataset {dataset.name}|{dataset.datasetUri} tables'
-            )
-            env: models.Environment = (
-                session.query(models.Environment)
-                .filter(
-                    and_(
-                        models.Environment.environmentUri == dataset.environmentUri,
-                        models.Environment.deleted.is_(None),
-                    )
+        dataset: models.Dataset = session.query(models.Dataset).get(datasetUri)
+        log.info(f'Synchronizing dataset {dataset.name}|{dataset.datasetUri} tables')
+        env: models.Environment = (
+            session.query(models.Environment)
+            .filter(
+                and_(
+                    models.Environment.environmentUri == dataset.environmentUri,
+                    models.Environment.deleted.is_(None),
                 )
-                .first()
             )
-            env_group: models.EnvironmentGroup = (
-                db.api.Environment.get_environment_group(
-                    session, dataset.SamlAdminGroupName, env.environmentUri
-                )
+            .first()
+        )
+        if not env or not is_assumable_pivot_role(env):
+            log.info(f'Dataset {dataset.GlueDatabaseName} has an invalid environment')
+            return None
+        env_group: models.EnvironmentGroup = db.api.Environment.get_environment_group(
+            session, dataset.SamlAdminGroupName, env.environmentUri
+        )
+
+        # database_exists + get_tables pages
+        limiter.acquire(2)
+        tables = Glue.list_glue_database_tables(
+            dataset.AwsAccountId, dataset.GlueDatabaseName, dataset.region
+        )
+        log.info(
+            f'Found {len(tables)} tables on Glue database {dataset.GlueDatabaseName}'
+        )
+
+        db.api.DatasetTable.sync(session, dataset.datasetUri, glue_tables=tables)
+
+        tables = (
+            session.query(models.DatasetTable)
+            .filter(models.DatasetTable.datasetUri == dataset.datasetUri)
+            .all()
+        )
+
+        log.info('Updating tables permissions on Lake Formation...')
+        principals = [
+            SessionHelper.get_delegation_role_arn(env.AwsAccountId),
+            env.EnvironmentDefaultIAMRoleArn,
+            env_group.environmentIAMRoleArn,
+        ]
+        batch = max(1, 20 // len(principals))
+        for i in range(0, len(tables), batch):
+            limiter.acquire()
+            Glue.batch_grant_principals_all_table_permissions(
+                tables[i : i + batch], principals=principals
+            )
+
+        if es:
+            indexers.upsert_dataset_tables(session, es, dataset.datasetUri)
+        return tables
+
+
+def sync_datasets(
+    engine,
+    es=None,
+    max_workers=MAX_WORKERS,
+    max_workers_per_account=MAX_WORKERS_PER_ACCOUNT,
+    rate_per_account=RATE_PER_ACCOUNT,
+    time_budget=TIME_BUDGET,
+):
+    """Synchronizes the tables of all active datasets concurrently.
+
+    Datasets run on a thread pool bounded by `max_workers` and the engine
+    pool capacity, each thread using its own session, with at most
+    `max_workers_per_account` datasets and `rate_per_account` AWS calls per
+    second on one account.
+    Datasets not started within `time_budget` seconds are skipped.
+    Returns one result per dataset with its status, tables and duration.
+    """
+    deadline = time.monotonic() + time_budget
+    with engine.scoped_session() as session:
+        all_datasets = [
+            (d.datasetUri, d.AwsAccountId, d.GlueDatabaseName)
+            for d in db.api.Dataset.list_all_active_datasets(session)
+        ]
+    log.info(f'Found {len(all_datasets)} datasets for tables sync')
+    # datasets skipped when the budget runs out are not always the same ones
+    random.shuffle(all_datasets)
+
+    # each account queue is split between its concurrent slots, so pool
+    # workers never block waiting for an account
+    queues = defaultdict(list)
+    for dataset in all_datasets:
+        queues[dataset[1]].append(dataset)
+    limiters = {account: RateLimiter(rate_per_account) for account in queues}
+    slots = max(1, max_workers_per_account)
+
+    def run(datasetUri, account, database):
+        started = time.monotonic()
+        result = {
+            'datasetUri': datasetUri,
+            'account': account,
+            'database': database,
+            'status': SKIPPED,
+            'tables': [],
+            'duration': 0,
+        }
+        if started > deadline:
+            result['error'] = 'Time budget exceeded'
+            return result
+        try:
+            tables = sync_dataset_tables(engine, datasetUri, es, limiters[account])
+            if tables is not None:
+                result.update(status=SUCCEEDED, tables=tables)
+        except Exception as e:
+            log.error(
+                f'Failed to sync tables for dataset '
+                f'{account}/{database} due to: {e}'
             )
-            try:
-                if not env or not is_assumable_pivot_role(env):
-                    log.info(
-                        f'Dataset {dataset.GlueDatabaseName} has an invalid environment'
-                    )
-                else:
-
-                    tables = Glue.list_glue_database_tables(
-                        dataset.AwsAccountId, dataset.GlueDatabaseName, dataset.region
-                    )
-
-                    log.info(
-                        f'Found {len(tables)} tables on Glue database {dataset.GlueDatabaseName}'
-                    )
-
-                    db.api.DatasetTable.sync(
-                        session, dataset.datasetUri, glue_tables=tables
-                    )
-
-                    tables = (
-                        session.query(models.DatasetTable)
-                        .filter(models.DatasetTable.datasetUri == dataset.datasetUri)
-                        .all()
-                    )
-
-                    log.info('Updating tables permissions on Lake Formation...')
-
-                    for table in tables:
-                        Glue.grant_principals_all_table_permissions(
-                            table,
-                            principals=[
-                                SessionHelper.get_delegation_role_arn(env.AwsAccountId),
-                                env.EnvironmentDefaultIAMRoleArn,
-                                env_group.environmentIAMRoleArn,
-                            ],
-                        )
-
-                    processed_tables.extend(tables)
-
-                    if es:
-                        indexers.upsert_dataset_tables(session, es, dataset.datasetUri)
-            except Exception as e:
-                log.error(
-                    f'Failed to sync tables for dataset '
-                    f'{dataset.AwsAccountId}/{dataset.GlueDatabaseName} '
-                    f'due to: {e}'
+            result.update(status=FAILED, error=str(e))
+            with engine.scoped_session() as session:
+                AlarmService().trigger_dataset_sync_failure_alarm(
+                    session.query(models.Dataset).get(datasetUri), str(e)
                 )
-                AlarmService().trigger_dataset_sync_failure_alarm(dataset, str(e))
-        return processed_tables
+        result['duration'] = round(time.monotonic() - started, 3)
+        return result
+
+    def drain(queue):
+        try:
+            return [run(*dataset) for dataset in queue]
+        finally:
+            # pool threads are reused, their session is not kept
+            engine.remove_session()
+
+    capacity = engine.pool_capacity()
+    if capacity:
+        max_workers = min(max_workers, capacity)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [
+            executor.submit(drain, queue[i::slots])
+            for queue in queues.values()
+            for i in range(min(slots, len(queue)))
+        ]
+        report = [result for future in futures for result in future.result()]
+
+    summary = defaultdict(int)
+    for result in report:
+        summary[result['status']] += 1
+        log.info(
+            f'Dataset {result["account"]}/{result["database"]}: {result["status"]} '
+            f'with {len(result["tables"])} tables in {result["duration"]}s'
+            + (f', error: {result["error"]}' if result.get('error') else '')
+        )
+    log.info(f'Synchronized tables of {len(report)} datasets: {dict(summary)}')
+    return report
+
+
+def sync_tables(engine, es=None, **kwargs):
+    report = sync_datasets(engine, es, **kwargs)
+    return [table for result in report for table in result['tables']]
 
 
 def is_assumable_pivot_role(env: models.Environment):
@@ -1,2 +1,3 @@
 from .parameter import Parameter
 from .secrets_manager import Secrets
+from .cache import TTLCache, cached_client
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+
+import boto3
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire after `ttl` seconds.
+
+    When `maxsize` is set the least recently used entries are evicted first.
+    Hits and misses are counted so callers can report cache efficiency.
+    """
+
+    def __init__(self, ttl: float = 300, maxsize: int = None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            if self.maxsize:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return value
+
+    def get_or_set(self, key, factory, ttl: float = None, cache_none: bool = True):
+        """Returns the cached value of `key`, computing it with `factory()` on a miss.
+
+        With `cache_none=False` a None result, e.g. a failed lookup, is returned
+        without being cached so the next call tries again.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            if value is not None or cache_none:
+                self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key=None):
+        """Drops `key` from the cache, or every entry if no key is given"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def invalidate_if(self, predicate):
+        """Drops every entry whose key matches `predicate(key)`"""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self._data)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def cached_client(service: str, region: str = None):
+    """Returns a process-wide boto3 client for the default credentials.
+
+    Creating a client costs several milliseconds (endpoint and model loading),
+    and clients are thread-safe once created, so one per (service, region) is kept.
+    """
+    key = (service, region)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = boto3.client(service, region_name=region)
+        return client
@@ -5,16 +5,18 @@ import os
 import boto3
 from botocore.exceptions import ClientError
 
+from .cache import TTLCache, cached_client
+
 log = logging.getLogger('utils:Parameter')
 
 
 class Parameter:
     prefix = 'dataall'
+    cache = TTLCache(ttl=int(os.getenv('PARAMETER_CACHE_TTL', 300)))
 
     @classmethod
     def ssm(cls):
-        client = boto3.client('ssm', region_name=os.getenv('AWS_REGION', 'eu-west-1'))
-        return client
+        return cached_client('ssm', os.getenv('AWS_REGION', 'eu-west-1'))
 
     @classmethod
     def get_parameter_name(cls, env, path=''):
@@ -34,10 +36,26 @@ class Parameter:
             Type='String',
             Overwrite=True,
         )
+        cls.invalidate(env, path)
         return Parameter.get_parameter(env, path)
 
     @classmethod
-    def get_parameter(cls, env, path=''):
+    def invalidate(cls, env=None, path=''):
+        """Drops a cached parameter, or all cached parameters if env is None"""
+        cls.cache.invalidate(cls.get_parameter_name(env, path) if env else None)
+
+    @classmethod
+    def get_parameter(cls, env, path='', use_cache=True):
+        pname = cls.get_parameter_name(env, path)
+        if not use_cache:
+            cls.cache.invalidate(pname)
+        # a missing parameter is not cached, it is looked up again next time
+        return cls.cache.get_or_set(
+            pname, lambda: cls._fetch_parameter(env, path), cache_none=False
+        )
+
+    @classmethod
+    def _fetch_parameter(cls, env, path=''):
         pname = cls.get_parameter_name(env, path)
         ssm = cls.ssm()
         try:
@@ -61,6 +79,7 @@ class Parameter:
         for p in params[env]:
             pname = Parameter.get_parameter_name(env=env, path=p['Name'])
             cls.ssm().delete_parameter(Name=pname)
+        cls.invalidate()
 
     @classmethod
     def get_parameters(cls, env, prefix=None):
@@ -1,25 +1,40 @@
 import logging
 import os
 
-import boto3
+from .cache import TTLCache, cached_client
 
 log = logging.getLogger('utils:Secrets')
 
 
 class Secrets:
     prefix = 'dataall'
+    cache = TTLCache(ttl=int(os.getenv('SECRET_CACHE_TTL', 300)))
 
     @classmethod
-    def get_secret(cls, env, secret_name):
+    def get_secret_name(cls, env, secret_name):
+        secret_name = f'/{cls.prefix}/{env}/{secret_name}'
+        return secret_name.replace('//', '/')
+
+    @classmethod
+    def get_secret(cls, env, secret_name, use_cache=True):
         print('will get secret', env, secret_name)
         if not secret_name:
             raise Exception('Secret name is None')
-        secret_name = f'/{cls.prefix}/{env}/{secret_name}'
-        secret_name = secret_name.replace('//', '/')
-        print(secret_name)
-        client = boto3.client(
-            'secretsmanager', region_name=os.getenv('AWS_REGION', 'eu-west-1')
+        secret_name = cls.get_secret_name(env, secret_name)
+        if not use_cache:
+            cls.cache.invalidate(secret_name)
+        return cls.cache.get_or_set(
+            secret_name, lambda: cls._fetch_secret(secret_name), cache_none=False
         )
+
+    @classmethod
+    def invalidate(cls, env=None, secret_name=None):
+        """Drops a cached secret, or all cached secrets if env is None"""
+        cls.cache.invalidate(cls.get_secret_name(env, secret_name) if env else None)
+
+    @classmethod
+    def _fetch_secret(cls, secret_name):
+        print(secret_name)
+        client = cached_client('secretsmanager', os.getenv('AWS_REGION', 'eu-west-1'))
         secret = client.get_secret_value(SecretId=secret_name).get('SecretString')
-        print('secret = ', secret)
         return secret
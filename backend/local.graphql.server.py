@@ -11,6 +11,7 @@ from dataall import db
 
 sts = boto3.client('sts', region_name='eu-west-1')
 from dataall.api import get_executable_schema
+from dataall.api.dataloader import DataLoaders
 from dataall.aws.handlers.service_handlers import Worker
 from dataall.db import get_engine, Base, create_schema_and_tables, init_permissions, api
 from dataall.searchproxy import connect, run_query
@@ -87,6 +88,7 @@ def request_context(headers, mock=False):
         username=username,
         groups=groups,
         cdkproxyurl=CDKPROXY_URL,
+        loaders=DataLoaders(engine),
     )
     return context.__dict__
 
@@ -132,7 +132,7 @@ class ContainerStack(pyNestedClass):
             log_group=self.create_log_group(
                 envname, resource_prefix, log_group_name='catalog-indexer'
             ),
-            schedule_expression=Schedule.expression('rate(6 hours)'),
+            schedule_expression=Schedule.expression('rate(15 minutes)'),
             scheduled_task_id=f'{resource_prefix}-{envname}-catalog-indexer-schedule',
             task_id=f'{resource_prefix}-{envname}-catalog-indexer',
             task_role=task_role,
@@ -166,6 +166,30 @@ class ContainerStack(pyNestedClass):
         )
         self.ecs_security_groups.extend(stacks_updater.task.security_groups)
 
+        statistics_reconciler = self.set_scheduled_task(
+            cluster=cluster,
+            command=['python3.8', '-m', 'dataall.tasks.dataset_statistics_reconciler'],
+            container_id=f'container',
+            ecr_repository=ecr_repository,
+            environment={
+                'AWS_REGION': self.region,
+                'envname': envname,
+                'LOGLEVEL': 'INFO',
+            },
+            image_tag=cdkproxy_image_tag,
+            log_group=self.create_log_group(
+                envname, resource_prefix, log_group_name='statistics-reconciler'
+            ),
+            schedule_expression=Schedule.expression('cron(30 1 * * ? *)'),
+            scheduled_task_id=f'{resource_prefix}-{envname}-statistics-reconciler-schedule',
+            task_id=f'{resource_prefix}-{envname}-statistics-reconciler',
+            task_role=task_role,
+            vpc=vpc,
+            security_group=scheduled_tasks_sg,
+            prod_sizing=prod_sizing,
+        )
+        self.ecs_security_groups.extend(statistics_reconciler.task.security_groups)
+
         update_bucket_policies_task = self.set_scheduled_task(
             cluster=cluster,
             command=['python3.8', '-m', 'dataall.tasks.bucket_policy_updater'],
@@ -0,0 +1,24 @@
+import { gql } from 'apollo-boost';
+
+const getDatasetTablesSyncTask = ({ datasetUri, taskUri }) => ({
+  variables: {
+    datasetUri,
+    taskUri
+  },
+  query: gql`
+    query GetDatasetTablesSyncTask($datasetUri: String!, $taskUri: String!) {
+      getDatasetTablesSyncTask(datasetUri: $datasetUri, taskUri: $taskUri) {
+        taskUri
+        datasetUri
+        status
+        error
+        tablesDiscovered
+        tablesAdded
+        tablesUpdated
+        tablesDeleted
+      }
+    }
+  `
+});
+
+export default getDatasetTablesSyncTask;
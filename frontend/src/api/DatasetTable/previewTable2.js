@@ -7,8 +7,12 @@ const previewTable2 = (tableUri) => ({
   query: gql`
     query PreviewTable2($tableUri: String!) {
       previewTable2(tableUri: $tableUri) {
-        rows
-        fields
+        columns {
+          columnName
+          typeName
+        }
+        records
+        cached
       }
     }
   `
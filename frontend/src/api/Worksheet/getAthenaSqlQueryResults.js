@@ -0,0 +1,48 @@
+import { gql } from 'apollo-boost';
+
+const getAthenaSqlQueryResults = ({
+  environmentUri,
+  worksheetUri,
+  athenaQueryId,
+  nextToken
+}) => ({
+  variables: {
+    environmentUri,
+    worksheetUri,
+    athenaQueryId,
+    nextToken
+  },
+  query: gql`
+    query getAthenaSqlQueryResults(
+      $environmentUri: String!
+      $worksheetUri: String!
+      $athenaQueryId: String!
+      $nextToken: String
+    ) {
+      getAthenaSqlQueryResults(
+        environmentUri: $environmentUri
+        worksheetUri: $worksheetUri
+        athenaQueryId: $athenaQueryId
+        nextToken: $nextToken
+      ) {
+        AthenaQueryId
+        Status
+        Error
+        nextToken
+        rows {
+          cells {
+            columnName
+            typeName
+            value
+          }
+        }
+        columns {
+          columnName
+          typeName
+        }
+      }
+    }
+  `
+});
+
+export default getAthenaSqlQueryResults;
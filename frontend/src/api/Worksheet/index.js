@@ -8,11 +8,13 @@ import removeWorksheetShare from './removeWorksheetShare';
 import updateWorksheetShare from './updateWorksheetShare';
 import deleteWorksheet from './deleteWorksheet';
 import runAthenaSqlQuery from './runAthenaSqlQuery';
+import getAthenaSqlQueryResults from './getAthenaSqlQueryResults';
 
 export {
   listWorksheets,
   createWorksheet,
   runAthenaSqlQuery,
+  getAthenaSqlQueryResults,
   updateWorksheet,
   getWorksheet,
   listWorksheetShares,
@@ -9,6 +9,10 @@ const runAthenaSqlQuery = ({ sqlQuery, environmentUri, worksheetUri }) => ({
   query: gql`
     query runAthenaSqlQuery($environmentUri: String!, $worksheetUri: String!, $sqlQuery: String!) {
       runAthenaSqlQuery(environmentUri: $environmentUri, worksheetUri: $worksheetUri, sqlQuery: $sqlQuery) {
+        AthenaQueryId
+        Status
+        Error
+        nextToken
         rows {
           cells {
             columnName
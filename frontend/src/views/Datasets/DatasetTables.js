@@ -32,6 +32,7 @@ import Scrollbar from '../../components/Scrollbar';
 import ArrowRightIcon from '../../icons/ArrowRight';
 import RefreshTableMenu from '../../components/RefreshTableMenu';
 import syncTables from '../../api/Dataset/syncTables';
+import getDatasetTablesSyncTask from '../../api/Dataset/getDatasetTablesSyncTask';
 import { SET_ERROR } from '../../store/errorReducer';
 import { useDispatch } from '../../store';
 import listDatasetTables from '../../api/Dataset/listDatasetTables';
@@ -40,6 +41,10 @@ import DeleteObjectModal from '../../components/DeleteObjectModal';
 import deleteDatasetTable from '../../api/DatasetTable/deleteDatasetTable';
 import DatasetStartCrawlerModal from './DatasetStartCrawlerModal';
 
+const SYNC_POLL_INTERVAL = 3000;
+// polls of the synchronization task before giving up, 10 minutes
+const SYNC_MAX_POLLS = 200;
+
 const DatasetTables = ({ dataset, isAdmin }) => {
   const client = useClient();
   const navigate = useNavigate();
@@ -85,20 +90,60 @@ const DatasetTables = ({ dataset, isAdmin }) => {
     setLoading(false);
   }, [dispatch, client, dataset, filter]);
 
+  const waitForSyncTask = async (task) => {
+    let syncTask = task;
+    let polls = 0;
+    while (!['completed', 'failed'].includes(syncTask.status)) {
+      if (polls >= SYNC_MAX_POLLS) {
+        throw new Error(
+          'Tables synchronization is still running, refresh the tables later'
+        );
+      }
+      polls += 1;
+      await new Promise((resolve) => {
+        setTimeout(resolve, SYNC_POLL_INTERVAL);
+      });
+      const response = await client.query(
+        getDatasetTablesSyncTask({
+          datasetUri: dataset.datasetUri,
+          taskUri: syncTask.taskUri
+        })
+      );
+      if (response.errors) {
+        throw new Error(response.errors[0].message);
+      }
+      syncTask = response.data.getDatasetTablesSyncTask;
+    }
+    return syncTask;
+  };
+
   const synchronizeTables = async () => {
     setSyncingTables(true);
     const response = await client.mutate(syncTables(dataset.datasetUri));
     if (!response.errors) {
-      fetchItems().catch((e) =>
-        dispatch({ type: SET_ERROR, error: e.message })
+      const syncTask = await waitForSyncTask(response.data.syncTables).catch(
+        (e) => dispatch({ type: SET_ERROR, error: e.message })
       );
-      enqueueSnackbar(`Retrieved ${response.data.syncTables.count} tables`, {
-        anchorOrigin: {
-          horizontal: 'right',
-          vertical: 'top'
-        },
-        variant: 'success'
-      });
+      if (syncTask && syncTask.status === 'completed') {
+        fetchItems().catch((e) =>
+          dispatch({ type: SET_ERROR, error: e.message })
+        );
+        enqueueSnackbar(
+          `Retrieved ${syncTask.tablesDiscovered} tables: ${syncTask.tablesAdded} added, ${syncTask.tablesUpdated} updated, ${syncTask.tablesDeleted} deleted`,
+          {
+            anchorOrigin: {
+              horizontal: 'right',
+              vertical: 'top'
+            },
+            variant: 'success'
+          }
+        );
+      } else if (syncTask) {
+        dispatch({
+          type: SET_ERROR,
+          error: syncTask.error || 'Tables synchronization failed'
+        });
+      }
     } else {
       dispatch({ type: SET_ERROR, error: response.errors[0].message });
     }
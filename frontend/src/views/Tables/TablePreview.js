@@ -22,7 +22,7 @@ const TablePreview = (props) => {
   const dispatch = useDispatch();
   const client = useClient();
   const [running, setRunning] = useState(false);
-  const [result, setResult] = useState({ rows: [], fields: [] });
+  const [result, setResult] = useState({ columns: [], records: [] });
   const fetchData = useCallback(async () => {
     setRunning(true);
     const response = await client.query(previewTable2(table.tableUri));
@@ -34,30 +34,20 @@ const TablePreview = (props) => {
     setRunning(false);
   }, [client, dispatch, table.tableUri]);
 
-  const buildRows = (rows, fields) => {
-    const header = fields.map((field) => JSON.parse(field).name);
-    const newRows = rows.map((row) => JSON.parse(row));
-    const builtRows = newRows.map((row) =>
-      header.map((h, index) => ({ [h]: row[index] }))
-    );
-    const objects = [];
-    builtRows.forEach((row) => {
-      const obj = {};
-      row.forEach((r) => {
-        Object.entries(r).forEach(([key, value]) => {
-          obj[key] = value;
-        });
-        obj.id = Math.random();
+  const buildRows = (columns, records) =>
+    records.map((record, index) => {
+      const obj = { id: index };
+      columns.forEach((column, position) => {
+        obj[column.columnName] = record[position];
       });
-      objects.push(obj);
+      return obj;
     });
-    return objects;
-  };
 
-  const buildHeader = (fields) =>
-    fields.map((field) => ({
-      field: JSON.parse(field).name,
-      headerName: JSON.parse(field).name,
+  const buildHeader = (columns) =>
+    columns.map((column) => ({
+      field: column.columnName,
+      headerName: column.columnName,
+      description: column.typeName,
       editable: false
     }));
 
@@ -77,8 +67,8 @@ const TablePreview = (props) => {
           <StyledDataGrid
             disableColumnResize={false}
             disableColumnReorder={false}
-            rows={buildRows(result.rows, result.fields)}
-            columns={buildHeader(result.fields)}
+            rows={buildRows(result.columns, result.records)}
+            columns={buildHeader(result.columns)}
           />
         </Card>
       </ReactIf.Else>
@@ -12,12 +12,13 @@ import {
   TableHead,
   TableRow
 } from '@mui/material';
+import { LoadingButton } from '@mui/lab';
 import { FaBars } from 'react-icons/fa';
 import React from 'react';
 import PropTypes from 'prop-types';
 import Scrollbar from '../../components/Scrollbar';
 
-const WorksheetResult = ({ results, loading }) => {
+const WorksheetResult = ({ results, loading, loadingMore, onLoadMore }) => {
   if (loading) {
     return <CircularProgress />;
   }
@@ -63,6 +64,18 @@ const WorksheetResult = ({ results, loading }) => {
               </Table>
             </Box>
           </Scrollbar>
+          {results.nextToken && onLoadMore && (
+            <Box sx={{ p: 2 }}>
+              <LoadingButton
+                loading={loadingMore}
+                color="primary"
+                onClick={onLoadMore}
+                variant="outlined"
+              >
+                Load more rows
+              </LoadingButton>
+            </Box>
+          )}
         </Card>
       </ReactIf.Then>
     </ReactIf.If>
@@ -70,6 +83,8 @@ const WorksheetResult = ({ results, loading }) => {
 };
 WorksheetResult.propTypes = {
   results: PropTypes.object.isRequired,
-  loading: PropTypes.bool.isRequired
+  loading: PropTypes.bool.isRequired,
+  loadingMore: PropTypes.bool,
+  onLoadMore: PropTypes.func
 };
 export default WorksheetResult;
@@ -25,6 +25,7 @@ import { useDispatch } from '../../store';
 import getWorksheet from '../../api/Worksheet/getWorksheet';
 import updateWorksheet from '../../api/Worksheet/updateWorksheet';
 import runAthenaSqlQuery from '../../api/Worksheet/runAthenaSqlQuery';
+import getAthenaSqlQueryResults from '../../api/Worksheet/getAthenaSqlQueryResults';
 import deleteWorksheet from '../../api/Worksheet/deleteWorksheet';
 import useClient from '../../hooks/useClient';
 import listEnvironments from '../../api/Environment/listEnvironments';
@@ -42,6 +43,10 @@ import WorksheetEditFormModal from './WorksheetEditFormModal';
 import DeleteObjectWithFrictionModal from '../../components/DeleteObjectWithFrictionModal';
 import * as Defaults from '../../components/defaults';
 
+const QUERY_POLL_INTERVAL = 2000;
+// polls of a long running query before giving up, 10 minutes
+const QUERY_MAX_POLLS = 300;
+
 
 
 const WorksheetView = () => {
@@ -70,6 +75,7 @@ const WorksheetView = () => {
   const [tableOptions, setTableOptions] = useState([]);
   const [loadingTables, setLoadingTables] = useState(false);
   const [runningQuery, setRunningQuery] = useState(false);
+  const [loadingMoreResults, setLoadingMoreResults] = useState(false);
   const [isEditWorksheetOpen, setIsEditWorksheetOpen] = useState(null);
   const [isDeleteWorksheetOpen, setIsDeleteWorksheetOpen] = useState(null);
   const handleEditWorksheetModalOpen = () => {
@@ -256,10 +262,39 @@ const WorksheetView = () => {
         })
       );
       if (!response.errors) {
-        const athenaResults = response.data.runAthenaSqlQuery;
+        let athenaResults = response.data.runAthenaSqlQuery;
+        // queries running past the API time limit are polled until done
+        let polls = 0;
+        while (athenaResults.Status !== 'SUCCEEDED') {
+          if (polls >= QUERY_MAX_POLLS) {
+            throw new Error(
+              `Query ${athenaResults.AthenaQueryId} is still running, run it again later to get its results`
+            );
+          }
+          polls += 1;
+          await new Promise((resolve) => {
+            setTimeout(resolve, QUERY_POLL_INTERVAL);
+          });
+          const poll = await client.query(
+            getAthenaSqlQueryResults({
+              environmentUri: currentEnv.environmentUri,
+              worksheetUri: worksheet.worksheetUri,
+              athenaQueryId: athenaResults.AthenaQueryId
+            })
+          );
+          if (poll.errors) {
+            throw new Error(poll.errors[0].message);
+          }
+          athenaResults = poll.data.getAthenaSqlQueryResults;
+        }
         setResults({
-          rows: athenaResults.rows.map((c, index) => ({ ...c, id: index })),
-          columns: athenaResults.columns.map((c, index) => ({
+          AthenaQueryId: athenaResults.AthenaQueryId,
+          nextToken: athenaResults.nextToken,
+          rows: (athenaResults.rows || []).map((c, index) => ({
+            ...c,
+            id: index
+          })),
+          columns: (athenaResults.columns || []).map((c, index) => ({
             ...c,
             id: index
           }))
@@ -272,7 +307,40 @@ const WorksheetView = () => {
     } finally {
       setRunningQuery(false);
     }
-  }, [client, dispatch, currentEnv, sqlBody]);
+  }, [client, dispatch, currentEnv, worksheet, sqlBody]);
+
+  const loadMoreResults = useCallback(async () => {
+    try {
+      setLoadingMoreResults(true);
+      const response = await client.query(
+        getAthenaSqlQueryResults({
+          environmentUri: currentEnv.environmentUri,
+          worksheetUri: worksheet.worksheetUri,
+          athenaQueryId: results.AthenaQueryId,
+          nextToken: results.nextToken
+        })
+      );
+      if (!response.errors) {
+        const page = response.data.getAthenaSqlQueryResults;
+        setResults({
+          ...results,
+          nextToken: page.nextToken,
+          rows: results.rows.concat(
+            (page.rows || []).map((c, index) => ({
+              ...c,
+              id: results.rows.length + index
+            }))
+          )
+        });
+      } else {
+        dispatch({ type: SET_ERROR, error: response.errors[0].message });
+      }
+    } catch (e) {
+      dispatch({ type: SET_ERROR, error: e.message });
+    } finally {
+      setLoadingMoreResults(false);
+    }
+  }, [client, dispatch, currentEnv, worksheet, results]);
 
   const deleteWorksheetfunction = useCallback(async () => {
     const response = await client.mutate(
@@ -635,7 +703,12 @@ const WorksheetView = () => {
           </Box>
           <Divider />
           <Box sx={{ p: 2 }}>
-            <WorksheetResult results={results} loading={runningQuery} />
+            <WorksheetResult
+              results={results}
+              loading={runningQuery}
+              loadingMore={loadingMoreResults}
+              onLoadMore={loadMoreResults}
+            />
           </Box>
         </Box>
       </Box>
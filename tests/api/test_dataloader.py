@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import event
+
+import dataall
+from dataall.api.dataloader import DataLoaders
+
+
+@pytest.fixture(scope='module', autouse=True)
+def org1(org, user, group, tenant):
+    org1 = org('testorg', user.userName, group.name)
+    yield org1
+
+
+@pytest.fixture(scope='module', autouse=True)
+def env1(env, org1, user, group, tenant, module_mocker):
+    module_mocker.patch('requests.post', return_value=True)
+    module_mocker.patch(
+        'dataall.api.Objects.Environment.resolvers.check_environment', return_value=True
+    )
+    env1 = env(org1, 'dev', 'alice', 'testadmins', '111111111111', 'eu-west-1')
+    yield env1
+
+
+@pytest.fixture(scope='module')
+def datasets(env1, org1, dataset, group):
+    yield [
+        dataset(org=org1, env=env1, name=f'loaded{i}', owner=env1.owner, group=group.name)
+        for i in range(3)
+    ]
+
+
+@pytest.fixture(scope='function')
+def statements(db):
+    executed = []
+
+    def count(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def test_loader_batches_collected_keys(db, datasets, env1, org1, statements):
+    loaders = DataLoaders(db)
+    with db.scoped_session() as session:
+        nodes = session.query(dataall.db.models.Dataset).all()
+    loaders.collect({'nodes': nodes})
+    statements.clear()
+    for node in nodes:
+        assert loaders.environment.load(node.environmentUri).environmentUri == env1.environmentUri
+        assert loaders.organization.load(node.organizationUri).organizationUri == org1.organizationUri
+        assert loaders.dataset.load(node.datasetUri) is node
+    assert len(statements) == 2
+
+
+def test_loader_many_and_missing_keys(db, datasets):
+    loaders = DataLoaders(db)
+    assert loaders.dataset_shares.load(datasets[0].datasetUri) == []
+    assert loaders.environment.load('unknown') is None
+    assert loaders.environment.load(None) is None
+    assert loaders.dataset.load_many([datasets[0].datasetUri, 'unknown'])[1] is None
+
+
+def test_list_datasets_with_related_objects(client, datasets, env1, org1, group):
+    response = client.query(
+        """
+        query ListDatasets($filter:DatasetFilter){
+            listDatasets(filter:$filter){
+                count
+                nodes{
+                    datasetUri
+                    userRoleForDataset
+                    environment{ environmentUri }
+                    organization{ organizationUri }
+                    stack{ targetUri }
+                }
+            }
+        }
+        """,
+        filter={'pageSize': 10},
+        username='alice',
+        groups=[group.name],
+    )
+    assert response.data.listDatasets.count == 3
+    for node in response.data.listDatasets.nodes:
+        assert node.environment.environmentUri == env1.environmentUri
+        assert node.organization.organizationUri == org1.organizationUri
+        assert node.stack.targetUri == node.datasetUri
@@ -3,6 +3,7 @@ import typing
 import pytest
 
 import dataall
+from dataall.api.Objects.DatasetTable import preview
 
 
 @pytest.fixture(scope='module', autouse=True)
@@ -334,6 +335,275 @@ def test_sync_tables_and_columns(client, table, dataset1, db):
         assert deleted_table.LastGlueTableStatus == 'Deleted'
 
 
+def test_sync_columns_diff(client, table, dataset1, db):
+    glue_table = {
+        'Name': 'diff_table',
+        'DatabaseName': dataset1.GlueDatabaseName,
+        'StorageDescriptor': {
+            'Columns': [
+                {'Name': 'col1', 'Type': 'string'},
+                {'Name': 'col2', 'Type': 'int'},
+            ],
+            'Location': f's3://{dataset1.S3BucketName}/diff_table',
+        },
+        'PartitionKeys': [{'Name': 'day', 'Type': 'string'}],
+    }
+    with db.scoped_session() as session:
+        dataall.db.api.DatasetTable.sync(session, dataset1.datasetUri, [glue_table])
+        diff_table = (
+            session.query(dataall.db.models.DatasetTable)
+            .filter(dataall.db.models.DatasetTable.name == 'diff_table')
+            .first()
+        )
+        columns = {
+            c.name: c
+            for c in session.query(dataall.db.models.DatasetTableColumn).filter(
+                dataall.db.models.DatasetTableColumn.tableUri == diff_table.tableUri
+            )
+        }
+        assert set(columns) == {'col1', 'col2', 'day'}
+        columns['col1'].description = 'curated description'
+        col1_uri = columns['col1'].columnUri
+        session.commit()
+
+        glue_table['StorageDescriptor']['Columns'] = [
+            {'Name': 'col1', 'Type': 'bigint'},
+            {'Name': 'col3', 'Type': 'string'},
+        ]
+        dataall.db.api.DatasetTable.sync(session, dataset1.datasetUri, [glue_table])
+        session.expire_all()
+        columns = {
+            c.name: c
+            for c in session.query(dataall.db.models.DatasetTableColumn).filter(
+                dataall.db.models.DatasetTableColumn.tableUri == diff_table.tableUri
+            )
+        }
+        assert set(columns) == {'col1', 'col3', 'day'}
+        assert columns['col1'].columnUri == col1_uri
+        assert columns['col1'].description == 'curated description'
+        assert columns['col1'].typeName == 'bigint'
+        assert columns['day'].columnType == 'partition_0'
+
+
+def test_sync_tables_task(client, dataset1, db, group, mocker):
+    queue = mocker.patch('dataall.aws.handlers.service_handlers.Worker.queue')
+    mocker.patch(
+        'dataall.aws.handlers.glue.Glue.list_glue_database_tables',
+        return_value=[
+            {
+                'Name': 'table1',
+                'StorageDescriptor': {
+                    'Columns': [{'Name': 'id', 'Type': 'int'}],
+                    'Location': 's3://bucket/table1',
+                },
+            },
+            {
+                'Name': 'synced_table',
+                'StorageDescriptor': {
+                    'Columns': [{'Name': 'id', 'Type': 'int'}],
+                    'Location': 's3://bucket/synced_table',
+                },
+            },
+        ],
+    )
+    reindex = mocker.patch(
+        'dataall.searchproxy.indexers.reindex_synced_tables',
+        return_value={'indexed': 2, 'deleted': 1, 'errors': []},
+    )
+    query = """
+        query getDatasetTablesSyncTask($datasetUri:String!, $taskUri:String!){
+            getDatasetTablesSyncTask(datasetUri:$datasetUri, taskUri:$taskUri){
+                taskUri
+                status
+                error
+                tablesDiscovered
+                tablesAdded
+                tablesUpdated
+                tablesDeleted
+            }
+        }
+    """
+    response = client.query(
+        """
+        mutation SyncTables($datasetUri:String!){
+            syncTables(datasetUri:$datasetUri){
+                taskUri
+                datasetUri
+                status
+            }
+        }
+        """,
+        username='alice',
+        groups=[group.name],
+        datasetUri=dataset1.datasetUri,
+    )
+    task = response.data.syncTables
+    assert task.status == 'pending'
+    assert task.datasetUri == dataset1.datasetUri
+    queue.assert_called_once_with(engine=mocker.ANY, task_ids=[task.taskUri])
+
+    response = client.query(
+        query,
+        username='alice',
+        groups=[group.name],
+        datasetUri=dataset1.datasetUri,
+        taskUri=task.taskUri,
+    )
+    assert response.data.getDatasetTablesSyncTask.status == 'pending'
+    assert response.data.getDatasetTablesSyncTask.tablesDiscovered is None
+
+    dataall.aws.handlers.service_handlers.Worker.process(
+        engine=db, task_ids=[task.taskUri]
+    )
+
+    response = client.query(
+        query,
+        username='alice',
+        groups=[group.name],
+        datasetUri=dataset1.datasetUri,
+        taskUri=task.taskUri,
+    )
+    assert response.data.getDatasetTablesSyncTask == {
+        'taskUri': task.taskUri,
+        'status': 'completed',
+        'error': None,
+        'tablesDiscovered': 2,
+        'tablesAdded': 1,
+        'tablesUpdated': 1,
+        'tablesDeleted': 1,
+    }
+    with db.scoped_session() as session:
+        tables = {
+            t.name: t
+            for t in session.query(dataall.db.models.DatasetTable).filter(
+                dataall.db.models.DatasetTable.datasetUri == dataset1.datasetUri
+            )
+        }
+    assert tables['table1'].LastGlueTableStatus == 'InSync'
+    assert tables['diff_table'].LastGlueTableStatus == 'Deleted'
+    kwargs = reindex.call_args.kwargs
+    assert sorted(kwargs['tableUris']) == sorted(
+        [tables['table1'].tableUri, tables['synced_table'].tableUri]
+    )
+    assert kwargs['deletedTableUris'] == [tables['diff_table'].tableUri]
+
+    # a task coalesced with an identical one reports the task that ran
+    with db.scoped_session() as session:
+        coalesced = dataall.db.models.Task(
+            action='glue.dataset.database.tables',
+            targetUri=dataset1.datasetUri,
+            status='completed',
+            response={'coalescedWith': task.taskUri},
+        )
+        session.add(coalesced)
+        session.commit()
+        coalesced_uri = coalesced.taskUri
+    response = client.query(
+        query,
+        username='alice',
+        groups=[group.name],
+        datasetUri=dataset1.datasetUri,
+        taskUri=coalesced_uri,
+    )
+    assert response.data.getDatasetTablesSyncTask.taskUri == task.taskUri
+    assert response.data.getDatasetTablesSyncTask.tablesDiscovered == 2
+
+    response = client.query(
+        query,
+        username='bob',
+        groups=['Nobody'],
+        datasetUri=dataset1.datasetUri,
+        taskUri=task.taskUri,
+    )
+    assert 'UnauthorizedOperation' in response.errors[0].message
+
+
+def test_preview_table(client, table, dataset1, db, group, mocker):
+    preview_table = table(dataset=dataset1, name='preview_table', username='alice')
+    client_mock = mocker.patch.object(preview.athena_helpers, 'athena_client')
+    client_mock.return_value.get_work_group.return_value = {
+        'WorkGroup': {'Name': 'workgroup'}
+    }
+    execute = mocker.patch.object(
+        preview.athena_helpers,
+        'execute',
+        return_value={
+            'AthenaQueryId': 'queryid',
+            'Status': 'SUCCEEDED',
+            'columns': [
+                {'columnName': 'id', 'typeName': 'integer'},
+                {'columnName': 'name', 'typeName': 'varchar'},
+            ],
+            'records': [['1', 'a'], ['2', None]],
+        },
+    )
+    query = """
+        query PreviewTable2($tableUri:String!){
+            previewTable2(tableUri:$tableUri){
+                columns { columnName typeName }
+                records
+                source
+                cached
+                fields
+                rows
+            }
+        }
+    """
+
+    def run_preview():
+        return client.query(
+            query,
+            username='alice',
+            groups=[group.name],
+            tableUri=preview_table.tableUri,
+        ).data.previewTable2
+
+    result = run_preview()
+    assert result.records == [['1', 'a'], ['2', None]]
+    assert result.source == 'athena'
+    assert result.cached is False
+    assert result.fields == ['{"name": "id"}', '{"name": "name"}']
+    assert result.rows == ['["1", "a"]', '["2", null]']
+    assert execute.call_args.kwargs['work_group'] == 'workgroup'
+
+    assert run_preview().cached is True
+    assert execute.call_count == 1
+
+    with db.scoped_session() as session:
+        updated = session.query(dataall.db.models.DatasetTable).get(
+            preview_table.tableUri
+        )
+        updated.GlueTableProperties = {'classification': 'parquet'}
+    mocker.patch.object(preview, 'SAMPLE_FROM_S3', True)
+    s3 = mocker.patch.object(
+        preview.SessionHelper, 'remote_session'
+    ).return_value.client.return_value
+    s3.list_objects_v2.return_value = {
+        'Contents': [
+            {'Key': 'preview_table/_SUCCESS', 'Size': 0},
+            {'Key': 'preview_table/day=2022-01-01/part-0.parquet', 'Size': 10},
+        ]
+    }
+    s3.select_object_content.return_value = {
+        'Payload': [
+            {'Records': {'Payload': b'{"id":1,"name":"a"}\n{"id":2,"name":null}\n'}},
+            {'End': {}},
+        ]
+    }
+
+    result = run_preview()
+    assert result.source == 's3'
+    assert result.cached is False
+    assert [c.columnName for c in result.columns] == ['id', 'name', 'day']
+    assert result.records == [['1', 'a', '2022-01-01'], ['2', None, '2022-01-01']]
+    assert (
+        s3.select_object_content.call_args.kwargs['Key']
+        == 'preview_table/day=2022-01-01/part-0.parquet'
+    )
+    assert execute.call_count == 1
+    assert run_preview().cached is True
+
+
 def test_delete_table(client, table, dataset1, db, group):
     table_to_delete = table(
         dataset=dataset1, name=f'table_to_update', username=dataset1.owner
@@ -349,3 +619,44 @@ def test_delete_table(client, table, dataset1, db, group):
         tableUri=table_to_delete.tableUri,
     )
     assert response.data.deleteDatasetTable
+
+
+def test_preview_reuses_running_query(mocker):
+    table = dataall.db.models.DatasetTable(
+        tableUri='previewrunning',
+        datasetUri='dataset',
+        GlueDatabaseName='db',
+        GlueTableName='running',
+        S3Prefix='s3://bucket/running',
+    )
+    environment = dataall.db.models.Environment(
+        environmentUri='env', EnvironmentDefaultBucketName='bucket'
+    )
+    mocker.patch.object(preview.athena_helpers, 'athena_client')
+    mocker.patch.object(preview, 'work_group', return_value='primary')
+    execute = mocker.patch.object(
+        preview.athena_helpers,
+        'execute',
+        return_value={'AthenaQueryId': 'queryid', 'Status': 'RUNNING'},
+    )
+    wait = mocker.patch.object(
+        preview.athena_helpers,
+        'wait_for_query',
+        return_value={'AthenaQueryId': 'queryid', 'Status': 'SUCCEEDED'},
+    )
+    mocker.patch.object(
+        preview.athena_helpers,
+        'fetch_results',
+        return_value={'columns': [], 'records': [['1']], 'nextToken': None},
+    )
+    preview.running_queries.invalidate()
+
+    with pytest.raises(dataall.db.exceptions.AWSResourceNotAvailable):
+        preview.athena_preview(table, environment)
+    assert execute.call_args.kwargs['wait'] == preview.WAIT
+
+    result = preview.athena_preview(table, environment)
+    assert result['records'] == [['1']]
+    assert execute.call_count == 1
+    assert wait.call_args.args[1] == 'queryid'
+    assert preview.running_queries.get(table.tableUri) is None
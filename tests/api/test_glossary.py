@@ -249,6 +249,59 @@ def test_hierarchical_search(client):
     assert response.data.searchGlossary.count == 4
 
 
+def test_search_glossary_hierarchy(db, client, g1, c1, subcategory, t1):
+    query = """
+        query SearchGlossaryHierarchy($filter:TermFilter){
+            searchGlossaryHierarchy(filter:$filter){
+                count
+                nextCursor
+                nodes{
+                    ...on Glossary{ nodeUri isMatch }
+                    ...on Category{ nodeUri isMatch }
+                    ...on Term{ nodeUri isMatch }
+                }
+            }
+        }
+    """
+    response = client.query(query, filter={'term': 'identifiers'})
+    result = response.data.searchGlossaryHierarchy
+    assert result.count == 4
+    assert {node.nodeUri: node.isMatch for node in result.nodes} == {
+        g1.nodeUri: False,
+        c1.nodeUri: True,
+        subcategory.nodeUri: True,
+        t1.nodeUri: False,
+    }
+
+    response = client.query(query, filter={'term': 'optional'})
+    assert [n.nodeUri for n in response.data.searchGlossaryHierarchy.nodes] == [
+        g1.nodeUri,
+        c1.nodeUri,
+        subcategory.nodeUri,
+    ]
+
+    first = client.query(
+        query, filter={'term': 'identifiers', 'pageSize': 2, 'cursor': None}
+    ).data.searchGlossaryHierarchy
+    second = client.query(
+        query,
+        filter={'term': 'identifiers', 'pageSize': 2, 'cursor': first.nextCursor},
+    ).data.searchGlossaryHierarchy
+    assert second.nextCursor is None
+    assert [n.nodeUri for n in first.nodes + second.nodes] == [
+        n.nodeUri for n in result.nodes
+    ]
+
+    with db.scoped_session() as session:
+        ancestors = {
+            a.ancestorUri: a.depth
+            for a in session.query(models.GlossaryNodeAncestor).filter(
+                models.GlossaryNodeAncestor.nodeUri == t1.nodeUri
+            )
+        }
+    assert ancestors == {t1.nodeUri: 0, c1.nodeUri: 1, g1.nodeUri: 2}
+
+
 def test_get_glossary(client, g1):
     r = client.query(
         """
@@ -0,0 +1,64 @@
+import boto3
+from ariadne import graphql_sync
+from botocore.stub import Stubber
+
+import dataall
+from dataall.api import instrumentation
+
+
+def test_request_instrumentation(db, es, mocker, capsys):
+    mocker.patch.object(instrumentation, 'RETURN_EXTENSIONS', True)
+    mocker.patch.object(instrumentation, 'SLOW_QUERY_MS', 0)
+    instrumentation.install()
+    schema = dataall.api.get_executable_schema()
+
+    success, response = graphql_sync(
+        schema,
+        {
+            'query': """query ListOrgs {
+                up { message }
+                listOrganizations(filter: {}) { count nodes { organizationUri } }
+            }"""
+        },
+        context_value={
+            'schema': None,
+            'engine': db,
+            'username': 'alice',
+            'groups': ['Nobody'],
+            'es': es,
+            'cdkproxyurl': None,
+        },
+        extensions=[instrumentation.RequestInstrumentation],
+    )
+
+    assert success
+    metrics = response['extensions']['instrumentation']
+    assert metrics['operation'] == 'ListOrgs'
+    assert set(metrics['resolvers']) == {'Query.up', 'Query.listOrganizations'}
+    assert metrics['resolvers']['Query.up']['sql'] == 0
+    organizations = metrics['resolvers']['Query.listOrganizations']
+    assert organizations['calls'] == 1
+    assert organizations['sql'] == metrics['sql']['count'] > 0
+    assert metrics['slowQueries'][0]['resolver'] == 'Query.listOrganizations'
+    assert metrics['pool']['checkedOut'] == 0
+    record = capsys.readouterr().out.strip().splitlines()[-1]
+    assert '"Operation": "ListOrgs"' in record
+    assert '"CloudWatchMetrics"' in record
+
+
+def test_aws_call_instrumentation():
+    instrumentation.install()
+    extension = instrumentation.RequestInstrumentation()
+    client = boto3.client('sts', region_name='eu-west-1')
+    with Stubber(client) as stubber:
+        stubber.add_response('get_caller_identity', {'Account': '111111111111'})
+        extension.request_started(None)
+        try:
+            client.get_caller_identity()
+        finally:
+            extension.request_finished(None)
+        # calls outside of a request are not recorded
+        stubber.add_response('get_caller_identity', {'Account': '111111111111'})
+        client.get_caller_identity()
+
+    assert extension.metrics.summary()['aws']['sts.GetCallerIdentity']['calls'] == 1
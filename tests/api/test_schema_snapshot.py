@@ -0,0 +1,41 @@
+from ariadne import graphql_sync
+from graphql import print_schema
+
+from dataall.api import gql
+from dataall.api.Objects import (
+    _import_resolver,
+    get_executable_schema,
+    load_executable_schema,
+    save_snapshot,
+)
+
+
+def test_snapshot_schema(db, es, tmp_path):
+    path = str(tmp_path / 'schema.snapshot.json')
+    snapshot = save_snapshot(path)
+
+    schema = load_executable_schema(path)
+
+    assert print_schema(schema) == print_schema(get_executable_schema())
+    assert (
+        snapshot['resolvers']['Query']['listDatasetTables']
+        == 'dataall.api.Objects.DatasetTable.queries:@Query.listDatasetTables'
+    )
+    assert (
+        _import_resolver(snapshot['resolvers']['Query']['listDatasetTables'])
+        is gql.QueryField.get_instance('listDatasetTables').resolver
+    )
+    success, response = graphql_sync(
+        schema,
+        {'query': 'query Up { up { message username } }'},
+        context_value={
+            'schema': None,
+            'engine': db,
+            'username': 'snapshot',
+            'groups': [],
+            'es': es,
+            'cdkproxyurl': None,
+        },
+    )
+    assert success
+    assert response['data']['up'] == {'message': 'server is up', 'username': 'snapshot'}
@@ -469,6 +469,17 @@ def test_add_item(
     )
     assert response.data.searchEnvironmentDataItems.nodes[0].principalId == group2.name
 
+    response = client.query(
+        q.replace('count', 'count nextCursor'),
+        username=user2.userName,
+        groups=[env2.SamlGroupName],
+        environmentUri=env2.environmentUri,
+        filter={'itemTypes': 'DatasetTable', 'cursor': None, 'countMode': 'NoCount'},
+    )
+    assert response.data.searchEnvironmentDataItems.count is None
+    assert response.data.searchEnvironmentDataItems.nextCursor is None
+    assert response.data.searchEnvironmentDataItems.nodes[0].principalId == group2.name
+
     query = """
                 mutation rejectShareObject($shareUri:String!){
                     rejectShareObject(shareUri:$shareUri){
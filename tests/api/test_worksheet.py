@@ -1,5 +1,7 @@
 import pytest
 from dataall.api.constants import WorksheetRole
+from dataall.api.Objects.AthenaQueryResult import cache
+from dataall.db import models
 
 
 @pytest.fixture(scope='module', autouse=True)
@@ -146,6 +148,303 @@ def test_update_worksheet(client, worksheet, group):
     assert response.data.updateWorksheet.label == 'change label'
 
 
+def test_run_athena_sql_query(client, worksheet, env_fixture, group, mocker):
+    athena = mocker.MagicMock()
+    athena.start_query_execution.return_value = {'QueryExecutionId': 'q1'}
+    athena.get_query_execution.return_value = {
+        'QueryExecution': {
+            'Status': {'State': 'SUCCEEDED'},
+            'Statistics': {
+                'TotalExecutionTimeInMillis': 120,
+                'DataScannedInBytes': 3_000_000_000,
+            },
+            'ResultConfiguration': {'OutputLocation': 's3://bucket/q1.csv'},
+        }
+    }
+    metadata = {
+        'ColumnInfo': [
+            {'Name': 'id', 'Type': 'integer'},
+            {'Name': 'name', 'Type': 'varchar'},
+        ]
+    }
+    athena.get_query_results.side_effect = [
+        {
+            'ResultSet': {
+                'ResultSetMetadata': metadata,
+                'Rows': [
+                    {'Data': [{'VarCharValue': 'id'}, {'VarCharValue': 'name'}]},
+                    {'Data': [{'VarCharValue': '1'}, {'VarCharValue': 'a'}]},
+                ],
+            },
+            'NextToken': 'page2',
+        },
+        {
+            'ResultSet': {
+                'ResultSetMetadata': metadata,
+                'Rows': [{'Data': [{'VarCharValue': '2'}, {}]}],
+            },
+        },
+    ]
+    mocker.patch(
+        'dataall.api.Objects.AthenaQueryResult.helpers.athena_client',
+        return_value=athena,
+    )
+    response = client.query(
+        """
+        query runAthenaSqlQuery($environmentUri:String!, $worksheetUri:String!, $sqlQuery:String!){
+            runAthenaSqlQuery(environmentUri:$environmentUri, worksheetUri:$worksheetUri, sqlQuery:$sqlQuery, pageSize:1){
+                AthenaQueryId
+                Status
+                ElapsedTimeInMs
+                DataScannedInBytes
+                columns { columnName typeName }
+                records
+                nextToken
+                rows { cells { columnName typeName value } }
+            }
+        }
+        """,
+        environmentUri=env_fixture.environmentUri,
+        worksheetUri=worksheet.worksheetUri,
+        sqlQuery='select id, name from t',
+        username='alice',
+        groups=[group.name],
+    )
+    result = response.data.runAthenaSqlQuery
+    assert result.Status == 'SUCCEEDED'
+    # larger than a 32-bit GraphQL Int
+    assert result.DataScannedInBytes == '3000000000'
+    assert [c.typeName for c in result.columns] == ['integer', 'varchar']
+    assert result.records == [['1', 'a']]
+    assert result.nextToken == 'page2'
+    assert result.rows[0].cells[1].value == 'a'
+    assert athena.get_query_results.call_args.kwargs['MaxResults'] == 2
+
+    response = client.query(
+        """
+        query getAthenaSqlQueryResults($environmentUri:String!, $worksheetUri:String!, $athenaQueryId:String!, $nextToken:String){
+            getAthenaSqlQueryResults(environmentUri:$environmentUri, worksheetUri:$worksheetUri, athenaQueryId:$athenaQueryId, nextToken:$nextToken){
+                records
+                nextToken
+            }
+        }
+        """,
+        environmentUri=env_fixture.environmentUri,
+        worksheetUri=worksheet.worksheetUri,
+        athenaQueryId='q1',
+        nextToken='page2',
+        username='alice',
+        groups=[group.name],
+    )
+    assert response.data.getAthenaSqlQueryResults.records == [['2', None]]
+    assert response.data.getAthenaSqlQueryResults.nextToken is None
+
+
+def test_failed_athena_sql_query(client, worksheet, env_fixture, group, mocker):
+    athena = mocker.MagicMock()
+    athena.start_query_execution.return_value = {'QueryExecutionId': 'failed1'}
+    athena.get_query_execution.return_value = {
+        'QueryExecution': {
+            'Status': {
+                'State': 'FAILED',
+                'StateChangeReason': "line 1:8: mismatched input 'form'",
+            }
+        }
+    }
+    mocker.patch(
+        'dataall.api.Objects.AthenaQueryResult.helpers.athena_client',
+        return_value=athena,
+    )
+    response = client.query(
+        """
+        query runAthenaSqlQuery($environmentUri:String!, $worksheetUri:String!, $sqlQuery:String!){
+            runAthenaSqlQuery(environmentUri:$environmentUri, worksheetUri:$worksheetUri, sqlQuery:$sqlQuery, useCache:false){
+                AthenaQueryId
+                columns { columnName }
+            }
+        }
+        """,
+        environmentUri=env_fixture.environmentUri,
+        worksheetUri=worksheet.worksheetUri,
+        sqlQuery='select * form t',
+        username='alice',
+        groups=[group.name],
+    )
+    assert "mismatched input 'form'" in response.errors[0].message
+    athena.get_query_results.assert_not_called()
+
+
+def test_athena_result_cache(client, worksheet, env_fixture, group, db, mocker):
+    assert (
+        cache.normalize_sql("SELECT *  -- all\n FROM \"Db\".T WHERE x = 'A  b';")
+        == "select * from \"db\".t where x = 'A  b'"
+    )
+    assert cache.referenced_tables('select * from db.a join "db"."b" on 1=1') == {
+        ('db', 'a'),
+        ('db', 'b'),
+    }
+    with db.scoped_session() as session:
+        table = models.DatasetTable(
+            datasetUri='ds',
+            label='cached',
+            name='cached',
+            owner='alice',
+            AWSAccountId=env_fixture.AwsAccountId,
+            region=env_fixture.region,
+            S3BucketName='bucket',
+            S3Prefix='s3://bucket/cached/',
+            GlueDatabaseName='cachedb',
+            GlueTableName='cached',
+        )
+        session.add(table)
+    cache.results.invalidate()
+
+    athena = mocker.MagicMock()
+    athena.start_query_execution.side_effect = [
+        {'QueryExecutionId': f'q{i}'} for i in range(3)
+    ]
+    athena.get_query_execution.return_value = {
+        'QueryExecution': {'Status': {'State': 'SUCCEEDED'}}
+    }
+    athena.get_query_results.return_value = {'ResultSet': {'Rows': []}}
+    mocker.patch(
+        'dataall.api.Objects.AthenaQueryResult.helpers.athena_client',
+        return_value=athena,
+    )
+
+    def run(sql, use_cache=True):
+        return client.query(
+            """
+            query runAthenaSqlQuery($environmentUri:String!, $worksheetUri:String!, $sqlQuery:String!, $useCache:Boolean){
+                runAthenaSqlQuery(environmentUri:$environmentUri, worksheetUri:$worksheetUri, sqlQuery:$sqlQuery, useCache:$useCache){
+                    AthenaQueryId
+                    cached
+                }
+            }
+            """,
+            environmentUri=env_fixture.environmentUri,
+            worksheetUri=worksheet.worksheetUri,
+            sqlQuery=sql,
+            useCache=use_cache,
+            username='alice',
+            groups=[group.name],
+        ).data.runAthenaSqlQuery
+
+    assert run('select * from cachedb.cached').AthenaQueryId == 'q0'
+    result = run('SELECT *\nFROM cachedb.cached;')
+    assert (result.AthenaQueryId, result.cached) == ('q0', True)
+    assert run('select * from cachedb.cached', use_cache=False).AthenaQueryId == 'q1'
+
+    # a synchronized change of the table invalidates the cached result
+    with db.scoped_session() as session:
+        session.query(models.DatasetTable).get(
+            table.tableUri
+        ).GlueTableSchemaHash = 'changed'
+    assert run('select * from cachedb.cached').AthenaQueryId == 'q2'
+    assert athena.start_query_execution.call_count == 3
+    cache.results.invalidate()
+
+
+def test_async_athena_sql_query(client, worksheet, env_fixture, group, mocker):
+    athena = mocker.MagicMock()
+    athena.start_query_execution.return_value = {'QueryExecutionId': 'async1'}
+    athena.get_query_execution.side_effect = [
+        {
+            'QueryExecution': {
+                'Status': {'State': state},
+                'Statistics': {'DataScannedInBytes': scanned},
+            }
+        }
+        for state, scanned in [('QUEUED', 0), ('RUNNING', 512), ('SUCCEEDED', 1024)]
+    ]
+    athena.get_query_results.return_value = {
+        'ResultSet': {
+            'ResultSetMetadata': {'ColumnInfo': [{'Name': 'n', 'Type': 'bigint'}]},
+            'Rows': [
+                {'Data': [{'VarCharValue': 'n'}]},
+                {'Data': [{'VarCharValue': '3'}]},
+            ],
+        }
+    }
+    mocker.patch(
+        'dataall.api.Objects.AthenaQueryResult.helpers.athena_client',
+        return_value=athena,
+    )
+    cache.results.invalidate()
+    sql = 'select count(*) as n from cachedb.cached'
+    response = client.query(
+        """
+        mutation startAthenaSqlQuery($environmentUri:String!, $worksheetUri:String!, $sqlQuery:String!){
+            startAthenaSqlQuery(environmentUri:$environmentUri, worksheetUri:$worksheetUri, sqlQuery:$sqlQuery){
+                AthenaQueryId
+                Status
+            }
+        }
+        """,
+        environmentUri=env_fixture.environmentUri,
+        worksheetUri=worksheet.worksheetUri,
+        sqlQuery=sql,
+        username='alice',
+        groups=[group.name],
+    )
+    started = response.data.startAthenaSqlQuery
+    assert (started.AthenaQueryId, started.Status) == ('async1', 'QUEUED')
+    athena.get_query_results.assert_not_called()
+
+    def poll():
+        return client.query(
+            """
+            query getAthenaSqlQueryResults($environmentUri:String!, $worksheetUri:String!, $athenaQueryId:String!){
+                getAthenaSqlQueryResults(environmentUri:$environmentUri, worksheetUri:$worksheetUri, athenaQueryId:$athenaQueryId){
+                    Status
+                    DataScannedInBytes
+                    records
+                }
+            }
+            """,
+            environmentUri=env_fixture.environmentUri,
+            worksheetUri=worksheet.worksheetUri,
+            athenaQueryId=started.AthenaQueryId,
+            username='alice',
+            groups=[group.name],
+        ).data.getAthenaSqlQueryResults
+
+    running = poll()
+    assert (running.Status, running.DataScannedInBytes, running.records) == (
+        'RUNNING',
+        '512',
+        None,
+    )
+    done = poll()
+    assert (done.Status, done.records) == ('SUCCEEDED', [['3']])
+    # the completed query is reused by the next identical query
+    athena.get_query_execution.side_effect = None
+    athena.get_query_execution.return_value = {
+        'QueryExecution': {'Status': {'State': 'SUCCEEDED'}}
+    }
+    response = client.query(
+        """
+        query runAthenaSqlQuery($environmentUri:String!, $worksheetUri:String!, $sqlQuery:String!){
+            runAthenaSqlQuery(environmentUri:$environmentUri, worksheetUri:$worksheetUri, sqlQuery:$sqlQuery){
+                AthenaQueryId
+                cached
+                records
+            }
+        }
+        """,
+        environmentUri=env_fixture.environmentUri,
+        worksheetUri=worksheet.worksheetUri,
+        sqlQuery=sql,
+        username='alice',
+        groups=[group.name],
+    )
+    result = response.data.runAthenaSqlQuery
+    assert (result.AthenaQueryId, result.cached) == ('async1', True)
+    assert result.records == [['3']]
+    assert athena.start_query_execution.call_count == 1
+    cache.results.invalidate()
+
+
 def test_share_with_individual(client, worksheet, group2, group):
     response = client.query(
         """
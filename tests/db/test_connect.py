@@ -1,5 +1,10 @@
 import os
+import threading
+
+from sqlalchemy.pool import NullPool
+
 import dataall
+from dataall.db.connection import pool_settings
 
 
 def test(db: dataall.db.Engine):
@@ -18,3 +23,41 @@ def test(db: dataall.db.Engine):
                 assert nb == 0
     else:
         assert True
+
+
+def test_sessions_per_thread(db: dataall.db.Engine):
+    sessions = {}
+
+    def open_session(name):
+        with db.scoped_session() as session:
+            session.execute('select 1')
+            sessions[name] = (session, db.session())
+
+    threads = [
+        threading.Thread(target=open_session, args=(name,)) for name in ['a', 'b']
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sessions['a'][0] is sessions['a'][1]
+    assert sessions['a'][0] is not sessions['b'][0]
+    assert db.session() not in [sessions['a'][0], sessions['b'][0]]
+    stats = db.pool_stats()
+    assert stats['checkedOut'] == 0
+    assert stats['capacity'] == db.pool_capacity() == 15
+
+
+def test_pool_settings(mocker):
+    mocker.patch.dict(os.environ, {'AWS_LAMBDA_FUNCTION_NAME': 'graphql'})
+    settings = pool_settings()
+    assert settings['pool_size'] == 1
+    assert settings['pool_pre_ping']
+
+    mocker.patch.dict(os.environ, {'DB_RDS_PROXY': 'true', 'DB_POOL_SIZE': '0'})
+    settings = pool_settings()
+    assert settings['poolclass'] is NullPool
+    assert not settings['pool_pre_ping']
+    assert settings['pool_recycle'] == 600
+    assert settings['connect_args'] == {'sslmode': 'require'}
@@ -0,0 +1,111 @@
+import pytest
+
+from dataall.db import models
+from dataall.db.api import DatasetStatistics, Vote
+from dataall.tasks.dataset_statistics_reconciler import reconcile_statistics
+
+
+def _dataset(session, name):
+    dataset = models.Dataset(
+        organizationUri='org',
+        environmentUri='env',
+        label=name,
+        owner='foo',
+        SamlAdminGroupName='foo',
+        businessOwnerDelegationEmails=['foo@amazon.com'],
+        businessOwnerEmail=['bar@amazon.com'],
+        name=name,
+        S3BucketName='S3BucketName',
+        GlueDatabaseName=name,
+        KmsAlias='kmsalias',
+        AwsAccountId='123456789012',
+        region='eu-west-1',
+        IAMDatasetAdminUserArn=f'arn:aws:iam::123456789012:user/dataset',
+        IAMDatasetAdminRoleArn=f'arn:aws:iam::123456789012:role/dataset',
+    )
+    session.add(dataset)
+    session.commit()
+    return dataset
+
+
+def _table(session, dataset, name):
+    table = models.DatasetTable(
+        datasetUri=dataset.datasetUri,
+        AWSAccountId='123456789012',
+        S3Prefix=f'S3prefix/{name}',
+        label=name,
+        owner='foo',
+        name=name,
+        GlueTableName=name,
+        S3BucketName='S3BucketName',
+        GlueDatabaseName=dataset.GlueDatabaseName,
+        region='eu-west-1',
+    )
+    session.add(table)
+    return table
+
+
+@pytest.fixture(scope='module')
+def datasets(db):
+    with db.scoped_session() as session:
+        first = _dataset(session, 'stats1')
+        second = _dataset(session, 'stats2')
+        yield first, second
+
+
+def test_dataset_statistics(db, datasets):
+    first, second = datasets
+    with db.scoped_session() as session:
+        _table(session, first, 'orders')
+        dropped = _table(session, first, 'customers')
+        session.add(
+            models.DatasetStorageLocation(
+                datasetUri=first.datasetUri,
+                label='folder',
+                owner='foo',
+                S3Prefix='prefix',
+                S3BucketName='S3BucketName',
+                AWSAccountId='123456789012',
+                region='eu-west-1',
+            )
+        )
+        session.commit()
+        session.delete(dropped)
+        Vote.upvote(session, 'alice', [], first.datasetUri, {'targetType': 'dataset', 'upvote': True})
+        Vote.upvote(session, 'alice', [], second.datasetUri, {'targetType': 'dataset', 'upvote': True})
+        Vote.upvote(session, 'alice', [], second.datasetUri, {'targetType': 'dataset', 'upvote': False})
+
+    with db.scoped_session() as session:
+        statistics = DatasetStatistics.get_statistics(
+            session, [first.datasetUri, second.datasetUri, 'unknown']
+        )
+    assert statistics == {
+        first.datasetUri: {'tables': 1, 'locations': 1, 'upvotes': 1},
+        second.datasetUri: {'tables': 0, 'locations': 0, 'upvotes': 0},
+        'unknown': {'tables': 0, 'locations': 0, 'upvotes': 0},
+    }
+    with db.scoped_session() as session:
+        assert DatasetStatistics.get_statistics(
+            session
+        ) == DatasetStatistics.count_all(session)
+
+
+def test_reconcile_statistics(db, datasets):
+    first, second = datasets
+    with db.scoped_session() as session:
+        # bulk statements bypass the counters
+        session.query(models.DatasetStorageLocation).filter(
+            models.DatasetStorageLocation.datasetUri == first.datasetUri
+        ).delete(synchronize_session=False)
+        session.add(models.DatasetStatistics(datasetUri='deleted', tables=3))
+
+    assert reconcile_statistics(db) == 2
+    assert reconcile_statistics(db) == 0
+    with db.scoped_session() as session:
+        assert DatasetStatistics.get_statistics(session, [first.datasetUri]) == {
+            first.datasetUri: {'tables': 1, 'locations': 0, 'upvotes': 1}
+        }
+        assert not session.query(models.DatasetStatistics).get('deleted')
+        session.delete(session.query(models.Dataset).get(second.datasetUri))
+    with db.scoped_session() as session:
+        assert not session.query(models.DatasetStatistics).get(second.datasetUri)
@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+
+from dataall.db import models, paginator
+
+
+@pytest.fixture(scope='module')
+def messages(db):
+    with db.scoped_session() as session:
+        created = datetime.datetime(2022, 1, 1)
+        for i in range(25):
+            session.add(
+                models.FeedMessage(
+                    feedMessageUri=f'msg{i:02d}',
+                    creator='alice',
+                    content=f'message {i}',
+                    targetUri='target',
+                    targetType='Dataset',
+                    # pairs of messages share a timestamp to exercise the tie breaker
+                    created=created + datetime.timedelta(minutes=i // 2),
+                )
+            )
+    yield
+
+
+def _query(session):
+    return session.query(models.FeedMessage).filter(
+        models.FeedMessage.targetUri == 'target'
+    )
+
+
+SORT_KEYS = [
+    (models.FeedMessage.created, 'created'),
+    (models.FeedMessage.feedMessageUri, 'feedMessageUri'),
+]
+
+
+def test_keyset_pagination_walks_all_rows(db, messages):
+    with db.scoped_session() as session:
+        seen = []
+        cursor = None
+        while True:
+            page = paginator.paginate_keyset(
+                _query(session), page_size=10, sort_keys=SORT_KEYS, cursor=cursor
+            ).to_dict()
+            assert page['count'] == 25
+            seen += [m.feedMessageUri for m in page['nodes']]
+            cursor = page['nextCursor']
+            if not page['hasNext']:
+                break
+        assert seen == [f'msg{i:02d}' for i in range(25)]
+
+
+def test_keyset_pagination_descending_without_count(db, messages):
+    with db.scoped_session() as session:
+        page = paginator.paginate_keyset(
+            _query(session),
+            page_size=3,
+            sort_keys=SORT_KEYS,
+            count=paginator.COUNT_NONE,
+            descending=True,
+        )
+        assert page.total is None
+        assert [m.feedMessageUri for m in page.items] == ['msg24', 'msg23', 'msg22']
+        page = paginator.paginate_keyset(
+            _query(session),
+            page_size=3,
+            sort_keys=SORT_KEYS,
+            cursor=page.next_cursor,
+            descending=True,
+        )
+        assert [m.feedMessageUri for m in page.items] == ['msg21', 'msg20', 'msg19']
+
+
+def test_count_modes(db, messages):
+    with db.scoped_session() as session:
+        assert paginator.count_query(_query(session), paginator.COUNT_CACHED) == 25
+        assert paginator.count_query(_query(session), paginator.COUNT_CACHED) == 25
+        assert paginator.count_query(_query(session), paginator.COUNT_ESTIMATE) >= 1
+
+
+def test_paginate_filter_modes(db, messages):
+    with db.scoped_session() as session:
+        page = paginator.paginate_filter(
+            _query(session), {'page': 3, 'pageSize': 10}, SORT_KEYS
+        ).to_dict()
+        assert [m.feedMessageUri for m in page['nodes']] == ['msg20', 'msg21', 'msg22', 'msg23', 'msg24']
+        page = paginator.paginate_filter(
+            _query(session), {'cursor': None, 'pageSize': 20}, SORT_KEYS
+        ).to_dict()
+        assert page['nextCursor'] and len(page['nodes']) == 20
+
+
+def test_invalid_cursor(db, messages):
+    with db.scoped_session() as session:
+        with pytest.raises(AttributeError):
+            paginator.paginate_keyset(
+                _query(session), page_size=10, sort_keys=SORT_KEYS, cursor='notacursor'
+            )
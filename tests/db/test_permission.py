@@ -265,3 +265,103 @@ def test_create_dataset(db, env, user, group, group_user, dataset, permissions,
             check_perm=True,
         )
         assert dataset
+
+
+def test_permission_decisions_are_cached(
+    db, user, group, group_user, dataset, permissions, mocker
+):
+    mocker.patch.object(dataall.db.api.PermissionCache, 'ttl', 60)
+    dataall.db.api.PermissionCache.shared.invalidate()
+    dataall.db.api.PermissionCache.reset_stats()
+    check = dict(
+        username=user.userName,
+        groups=[group.name],
+        permission_name=dataall.db.permissions.UPDATE_DATASET,
+        resource_uri=dataset.datasetUri,
+    )
+    with db.scoped_session() as session:
+        dataall.db.api.ResourcePolicy.attach_resource_policy(
+            session=session,
+            group=group.name,
+            permissions=dataall.db.permissions.DATASET_WRITE,
+            resource_uri=dataset.datasetUri,
+            resource_type=dataall.db.models.Dataset.__name__,
+        )
+        with dataall.db.api.PermissionCache.request_scope():
+            for _ in range(3):
+                assert dataall.db.api.ResourcePolicy.has_user_resource_permission(
+                    session, **check
+                )
+        assert dataall.db.api.ResourcePolicy.has_user_resource_permission(
+            session, **check
+        )
+        assert dataall.db.api.PermissionCache.stats() == {
+            'request_hits': 2,
+            'shared_hits': 1,
+            'misses': 1,
+            'shared_size': 1,
+        }
+
+        dataall.db.api.ResourcePolicy.delete_resource_policy(
+            session=session, group=group.name, resource_uri=dataset.datasetUri
+        )
+        assert not dataall.db.api.ResourcePolicy.has_user_resource_permission(
+            session, **check
+        )
+    dataall.db.api.PermissionCache.shared.invalidate()
+
+
+def test_authorized_resources_are_resolved_per_page(
+    db, user, group, group_user, dataset, permissions
+):
+    dataall.db.api.PermissionCache.reset_stats()
+    with db.scoped_session() as session:
+        dataall.db.api.ResourcePolicy.attach_resource_policy(
+            session=session,
+            group=group.name,
+            permissions=dataall.db.permissions.DATASET_WRITE,
+            resource_uri=dataset.datasetUri,
+            resource_type=dataall.db.models.Dataset.__name__,
+        )
+        authorized = dataall.db.api.ResourcePolicy.query_authorized_resource_uris(
+            session,
+            [group.name],
+            resource_type=dataall.db.models.Dataset.__name__,
+            permission_name=dataall.db.permissions.UPDATE_DATASET,
+        )
+        assert dataset.datasetUri in [uri for (uri,) in authorized]
+        assert not dataall.db.api.ResourcePolicy.query_authorized_resource_uris(
+            session, ['unknown'], resource_type=dataall.db.models.Dataset.__name__
+        ).all()
+        assert (
+            session.query(dataall.db.models.Dataset)
+            .filter(dataall.db.models.Dataset.datasetUri.in_(authorized.subquery()))
+            .count()
+            == authorized.count()
+        )
+
+        with dataall.db.api.PermissionCache.request_scope():
+            prefetched = dataall.db.api.ResourcePolicy.prefetch_user_permissions(
+                session, [group.name], [dataset.datasetUri, 'unknown']
+            )
+            assert dataall.db.permissions.UPDATE_DATASET in prefetched[dataset.datasetUri]
+            assert prefetched['unknown'] == set()
+            assert dataall.db.api.ResourcePolicy.has_user_resource_permission(
+                session,
+                username=user.userName,
+                groups=[group.name],
+                permission_name=dataall.db.permissions.UPDATE_DATASET,
+                resource_uri=dataset.datasetUri,
+            )
+            assert not dataall.db.api.ResourcePolicy.has_user_resource_permission(
+                session,
+                username=user.userName,
+                groups=[group.name],
+                permission_name=dataall.db.permissions.UPDATE_DATASET,
+                resource_uri='unknown',
+            )
+        assert dataall.db.api.PermissionCache.stats()['misses'] == 0
+
+        dataall.db.api.ResourcePolicy.delete_resource_policy(
+            session=session, group=group.name, resource_uri=dataset.datasetUri
+        )
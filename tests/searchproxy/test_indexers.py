@@ -1,3 +1,4 @@
+import itertools
 import typing
 
 import pytest
@@ -152,3 +153,31 @@ def test_upsert_tables(db, dataset, env, mocker, folder):
             session, es={}, datasetUri=dataset.datasetUri
         )
         assert len(tables) == 1
+
+
+def test_bulk_documents(db, dataset, table, folder, mocker):
+    actions = []
+
+    def streaming_bulk(es, stream, **kwargs):
+        for action in stream:
+            actions.append(action)
+            yield True, {'index': {'_id': action['_id']}}
+
+    mocker.patch(
+        'dataall.searchproxy.upsert.helpers.streaming_bulk', side_effect=streaming_bulk
+    )
+    with db.scoped_session() as session:
+        report = dataall.searchproxy.bulk_upsert(
+            True,
+            itertools.chain(
+                indexers.dataset_documents(session),
+                indexers.table_documents(session),
+                indexers.folder_documents(session),
+            ),
+        )
+    assert report == {'indexed': 3, 'deleted': 0, 'errors': []}
+    docs = {action['_id']: action['_source'] for action in actions}
+    assert docs[dataset.datasetUri]['tables'] == 1
+    assert docs[dataset.datasetUri]['folders'] == 1
+    assert docs[table.tableUri]['resourceKind'] == 'table'
+    assert docs[folder.locationUri]['datasetUri'] == dataset.datasetUri
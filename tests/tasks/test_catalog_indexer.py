@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 import pytest
 import dataall
 
@@ -82,13 +84,101 @@ def table(org, env, db, sync_dataset):
 
 
 def test_catalog_indexer(db, org, env, sync_dataset, table, mocker):
-    mocker.patch(
-        'dataall.searchproxy.indexers.upsert_dataset_tables', return_value=[table]
-    )
-    mocker.patch(
-        'dataall.searchproxy.indexers.upsert_dataset', return_value=sync_dataset
+    bulk = mocker.patch(
+        'dataall.searchproxy.upsert.helpers.streaming_bulk',
+        side_effect=lambda es, actions, **kwargs: (
+            (True, {'index': {'_id': action['_id']}}) for action in actions
+        ),
     )
     indexed_objects_counter = dataall.tasks.catalog_indexer.index_objects(
         engine=db, es=True
     )
     assert indexed_objects_counter == 2
+    assert bulk.call_count == 1
+
+
+def test_catalog_indexer_reports_errors(db, org, env, sync_dataset, table, mocker):
+    mocker.patch(
+        'dataall.searchproxy.upsert.helpers.streaming_bulk',
+        side_effect=lambda es, actions, **kwargs: (
+            (False, {'index': {'_id': action['_id'], 'error': 'mapper_parsing_exception'}})
+            for action in actions
+        ),
+    )
+    alarm = mocker.patch(
+        'dataall.utils.alarm_service.AlarmService.trigger_catalog_indexing_failure_alarm'
+    )
+    assert dataall.tasks.catalog_indexer.index_objects(engine=db, es=True) == 0
+    alarm.assert_called_once()
+
+
+def test_catalog_incremental_indexer(db, org, env, sync_dataset, table, mocker):
+    actions = []
+
+    def streaming_bulk(es, stream, **kwargs):
+        for action in stream:
+            actions.append(action)
+            yield True, {action['_op_type']: {'_id': action['_id']}}
+
+    mocker.patch(
+        'dataall.searchproxy.upsert.helpers.streaming_bulk', side_effect=streaming_bulk
+    )
+    mocker.patch.object(dataall.searchproxy.incremental, 'OVERLAP', timedelta(0))
+    dataall.tasks.catalog_indexer.index_objects(engine=db, es=True)
+    with db.scoped_session() as session:
+        folder = dataall.db.models.DatasetStorageLocation(
+            datasetUri=sync_dataset.datasetUri,
+            label='folder',
+            owner='foo',
+            S3Prefix='prefix',
+            S3BucketName='S3BucketName',
+            AWSAccountId='123456789012',
+            region='eu-west-1',
+        )
+        session.add(folder)
+        checkpoint = dataall.searchproxy.incremental.get_checkpoint(session)
+        checkpoint.highWaterMark = datetime.now()
+        session.query(dataall.db.models.DatasetTable).get(
+            table.tableUri
+        ).description = 'updated'
+        session.delete(folder)
+
+    actions.clear()
+    assert dataall.tasks.catalog_indexer.index_changes(engine=db, es=True) == 3
+    operations = {(a['_op_type'], a['_id']) for a in actions}
+    assert operations == {
+        ('index', sync_dataset.datasetUri),
+        ('index', table.tableUri),
+        ('delete', folder.locationUri),
+    }
+
+
+def test_deleted_term_link_reindexes_target(db, sync_dataset, table, mocker):
+    actions = []
+
+    def streaming_bulk(es, stream, **kwargs):
+        for action in stream:
+            actions.append(action)
+            yield True, {action['_op_type']: {'_id': action['_id']}}
+
+    mocker.patch(
+        'dataall.searchproxy.upsert.helpers.streaming_bulk', side_effect=streaming_bulk
+    )
+    mocker.patch.object(dataall.searchproxy.incremental, 'OVERLAP', timedelta(0))
+    with db.scoped_session() as session:
+        link = dataall.db.models.TermLink(
+            nodeUri='term',
+            targetUri=table.tableUri,
+            targetType='DatasetTable',
+            owner='alice',
+        )
+        session.add(link)
+    dataall.tasks.catalog_indexer.index_objects(engine=db, es=True)
+    with db.scoped_session() as session:
+        checkpoint = dataall.searchproxy.incremental.get_checkpoint(session)
+        checkpoint.highWaterMark = datetime.now()
+        session.delete(session.query(dataall.db.models.TermLink).get(link.linkUri))
+
+    actions.clear()
+    dataall.tasks.catalog_indexer.index_changes(engine=db, es=True)
+    assert ('index', table.tableUri) in {(a['_op_type'], a['_id']) for a in actions}
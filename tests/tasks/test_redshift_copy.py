@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from dataall.aws.handlers import redshift
+from dataall.aws.handlers.redshift import Redshift
+
+
+class FakeDataApi:
+    def __init__(self, failing_cluster=None):
+        self.batches = {}
+        self.polls = {}
+        self.failing_cluster = failing_cluster
+        self.barrier = threading.Barrier(2, timeout=10)
+
+    def batch_execute_statement(self, ClusterIdentifier, Sqls, **kwargs):
+        # only returns when both clusters are loaded at the same time
+        self.barrier.wait()
+        self.batches[ClusterIdentifier] = Sqls
+        return {'Id': ClusterIdentifier}
+
+    def describe_statement(self, Id):
+        self.polls[Id] = self.polls.get(Id, 0) + 1
+        if self.polls[Id] < 2:
+            return {'Id': Id, 'Status': 'STARTED', 'Duration': -1}
+        if Id == self.failing_cluster:
+            return {'Id': Id, 'Status': 'FAILED', 'Error': 'S3 access denied'}
+        return {'Id': Id, 'Status': 'FINISHED', 'Duration': 1500000000}
+
+
+@pytest.fixture
+def data_api(mocker):
+    mocker.patch.object(redshift, 'POLL_INTERVAL', 0.01)
+    api = FakeDataApi(failing_cluster='cluster2')
+    mocker.patch.object(Redshift, 'data_client', return_value=api)
+    return api
+
+
+def _load(name):
+    return {
+        'clusterUri': f'{name}-uri',
+        'accountid': '111111111111',
+        'region': 'eu-west-1',
+        'cluster_id': name,
+        'database': 'dev',
+        'dbuser': 'dataall',
+        'statements': Redshift.get_copy_statements(
+            'sales', 'orders', 's3://bucket/orders', 'arn:aws:iam::1:role/r', 'id int', 'dataall'
+        ),
+    }
+
+
+def test_copy_statements_swap_in_one_batch():
+    statements = Redshift.get_copy_statements(
+        'sales', 'orders', 's3://bucket/orders', 'arn:aws:iam::1:role/r', 'id int', 'dataall'
+    )
+    assert not any('transaction' in s.lower() for s in statements)
+    copy = next(i for i, s in enumerate(statements) if s.startswith('COPY'))
+    swap = next(i for i, s in enumerate(statements) if 'RENAME TO' in s)
+    grant = statements.index('GRANT ALL ON TABLE sales.orders TO dataall')
+    assert copy < swap < grant
+
+
+def test_load_clusters(data_api):
+    outcomes = Redshift.load_clusters([_load('cluster1'), _load('cluster2')])
+
+    assert set(data_api.batches) == {'cluster1', 'cluster2'}
+    assert data_api.polls == {'cluster1': 2, 'cluster2': 2}
+    assert outcomes[0] == {
+        'clusterUri': 'cluster1-uri',
+        'Id': 'cluster1',
+        'Status': 'FINISHED',
+        'Error': None,
+        'DurationInMs': 1500,
+    }
+    assert outcomes[1]['clusterUri'] == 'cluster2-uri'
+    assert outcomes[1]['Status'] == 'FAILED'
+    assert 'S3 access denied' in outcomes[1]['Error']
@@ -1,7 +1,13 @@
+import json
+from unittest.mock import MagicMock
+
 import pytest
+from botocore.exceptions import ClientError
 
 import dataall
 from dataall.api.constants import OrganisationUserRole
+from dataall.tasks.subscriptions import SubscriptionService
+from dataall.tasks.subscriptions.prefix_index import S3PrefixIndex
 
 
 @pytest.fixture(scope='module')
@@ -150,3 +156,80 @@ def test_subscriptions(org, env, otherenv, db, dataset, share, mocker):
     queues = subscriber.get_queues(envs)
     assert queues
     assert subscriber.notify_consumers(db, messages)
+
+
+def test_poll_queues(mocker):
+    def body(i):
+        return json.dumps({'Message': json.dumps({'prefix': f's3://bucket/{i}/'})})
+
+    backlog = {
+        'busy': [{'Body': body(i), 'ReceiptHandle': f'h{i}'} for i in range(15)],
+        'idle': [],
+    }
+
+    def receive_message(QueueUrl, **kwargs):
+        if QueueUrl == 'broken':
+            raise ClientError({'Error': {'Code': 'AccessDenied'}}, 'ReceiveMessage')
+        assert kwargs['WaitTimeSeconds'] == 1
+        batch, backlog[QueueUrl] = backlog[QueueUrl][:10], backlog[QueueUrl][10:]
+        return {'Messages': batch}
+
+    sqs = MagicMock()
+    sqs.receive_message.side_effect = receive_message
+    sqs.delete_message_batch.side_effect = lambda QueueUrl, Entries: {
+        'Successful': [{'Id': e['Id']} for e in Entries]
+    }
+    mocker.patch('dataall.tasks.subscriptions.sqs_poller.cached_client', return_value=sqs)
+
+    queues = [{'url': url, 'region': 'eu-west-1'} for url in ['busy', 'idle', 'broken']]
+    messages, metrics = dataall.tasks.subscriptions.poll(queues, wait_time=1)
+
+    assert sorted(m['prefix'] for m in messages) == sorted(
+        f's3://bucket/{i}/' for i in range(15)
+    )
+    assert sqs.delete_message_batch.call_count == 2
+    assert [(m['queue'], m['received'], m['deleted'], m['polls']) for m in metrics] == [
+        ('busy', 15, 15, 3),
+        ('idle', 0, 0, 1),
+        ('broken', 0, 0, 0),
+    ]
+    summary = dataall.tasks.subscriptions.SubscriptionService.report_poll_metrics(metrics)
+    assert summary == {
+        'queues': 3,
+        'received': 15,
+        'deleted': 15,
+        'failed': 0,
+        'errors': 1,
+    }
+
+
+def test_s3_prefix_index():
+    index = S3PrefixIndex()
+    index.add('s3://bucket/table1/', '111', 'eu-west-1', 'table1')
+    index.add('s3://bucket/table10/', '111', 'eu-west-1', 'table10')
+    index.add('s3://bucket/other/', '222', 'eu-west-1', 'other')
+    assert index.find('s3://bucket/table1/', '111', 'eu-west-1') == 'table1'
+    assert index.find('s3://bucket/table10', '111', 'eu-west-1') == 'table10'
+    assert index.find('s3://bucket/tab', '111', 'eu-west-1') == 'table1'
+    assert index.find('s3://bucket/table1/part', '111', 'eu-west-1') is None
+    assert index.find('s3://bucket/other/', '111', 'eu-west-1') is None
+    assert index.find('s3://bucket/other/', '222', 'eu-west-1') == 'other'
+
+
+def test_resolve_messages(db, dataset, share):
+    messages = [
+        {
+            'prefix': f's3://dataset/{path}/',
+            'accountid': '123456789012',
+            'region': 'eu-west-1',
+        }
+        for path in ['testtable', 'unknown']
+    ]
+    with db.scoped_session() as session:
+        batch = SubscriptionService.resolve_messages(session, messages)
+    table, location = SubscriptionService._find_targets(batch, messages[0])
+    assert table.tableUri == 'foo' and location is None
+    assert SubscriptionService._find_targets(batch, messages[1]) == (None, None)
+    assert list(batch['datasets']) == [dataset.datasetUri]
+    assert [item.itemUri for item in batch['share_items']['foo']] == ['foo']
+    assert [s.principalId for s in batch['shares'].values()] == ['group2']
@@ -92,7 +92,7 @@ def table(org, env, db, sync_dataset):
     yield table
 
 
-def _test_tables_sync(db, org, env, sync_dataset, table, mocker):
+def test_tables_sync(db, org, env, sync_dataset, table, mocker):
     mocker.patch(
         'dataall.aws.handlers.glue.Glue.list_glue_database_tables',
         return_value=[
@@ -150,8 +150,12 @@ def _test_tables_sync(db, org, env, sync_dataset, table, mocker):
         'dataall.tasks.tables_syncer.is_assumable_pivot_role', return_value=True
     )
     mocker.patch(
-        'dataall.aws.handlers.glue.Glue.grant_principals_all_table_permissions',
-        return_value=True,
+        'dataall.aws.handlers.glue.Glue.batch_grant_principals_all_table_permissions',
+        return_value=[],
+    )
+    mocker.patch(
+        'dataall.aws.handlers.sts.SessionHelper.get_delegation_role_arn',
+        return_value='arn:aws:iam::123456789012:role/dataallPivotRole',
     )
 
     processed_tables = dataall.tasks.tables_syncer.sync_tables(engine=db)
@@ -164,3 +168,28 @@ def _test_tables_sync(db, org, env, sync_dataset, table, mocker):
         )
         assert saved_table
         assert saved_table.GlueTableName == 'table1'
+
+
+def test_tables_sync_report(db, sync_dataset, mocker):
+    mocker.patch(
+        'dataall.tasks.tables_syncer.is_assumable_pivot_role', return_value=True
+    )
+    mocker.patch(
+        'dataall.aws.handlers.glue.Glue.list_glue_database_tables',
+        side_effect=Exception('AccessDenied'),
+    )
+    alarm = mocker.patch(
+        'dataall.utils.alarm_service.AlarmService.trigger_dataset_sync_failure_alarm'
+    )
+    executor = mocker.spy(dataall.tasks.tables_syncer, 'ThreadPoolExecutor')
+    mocker.patch.object(db, 'pool_capacity', return_value=2)
+    remove_session = mocker.spy(db, 'remove_session')
+    report = dataall.tasks.tables_syncer.sync_datasets(engine=db, max_workers=4)
+    assert executor.call_args.kwargs['max_workers'] == 2
+    remove_session.assert_called_once()
+    assert [r['status'] for r in report] == ['Failed']
+    assert report[0]['error'] == 'AccessDenied'
+    alarm.assert_called_once()
+
+    report = dataall.tasks.tables_syncer.sync_datasets(engine=db, time_budget=0)
+    assert [r['status'] for r in report] == ['Skipped']
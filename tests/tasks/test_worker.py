@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+from dataall.aws.handlers.service_handlers import WorkerHandler
+from dataall.db import models
+
+
+@pytest.fixture(scope='module')
+def worker():
+    worker = WorkerHandler()
+    barrier = threading.Barrier(2, timeout=10)
+
+    @worker.handler(path='test.concurrent')
+    def concurrent(engine, task: models.Task):
+        # only returns when both tasks of the batch run at the same time
+        barrier.wait()
+        with engine.scoped_session() as session:
+            return {'target': session.query(models.Task).get(task.taskUri).targetUri}
+
+    @worker.handler(path='test.ordered')
+    def ordered(engine, task: models.Task):
+        worker.calls.append((task.taskUri, threading.get_ident()))
+        return {}
+
+    @worker.handler(path='test.bytes')
+    def raw(engine, task: models.Task):
+        return {'raw': b'not json'}
+
+    @worker.handler(path='test.fail')
+    def fail(engine, task: models.Task):
+        raise Exception('boom')
+
+    worker.calls = []
+    yield worker
+
+
+def _task(session, action, status='pending', target=None):
+    task = models.Task(
+        action=action, targetUri=target or f'{action}-target', status=status
+    )
+    session.add(task)
+    session.commit()
+    return task.taskUri
+
+
+def test_process_batch(db, worker, mocker):
+    remove_session = mocker.spy(db, 'remove_session')
+    with db.scoped_session() as session:
+        first = _task(session, 'test.concurrent', target='first')
+        second = _task(session, 'test.concurrent', target='second')
+        failing = _task(session, 'test.fail')
+        started = _task(session, 'test.fail', status='started')
+        unknown = _task(session, 'test.unknown')
+
+    responses = worker.process(
+        db, [first, second, first, failing, started, unknown, 'missing']
+    )
+
+    assert [r['taskUri'] for r in responses] == [first, second, failing]
+    assert [r['status'] for r in responses] == ['completed', 'completed', 'failed']
+    # each pooled task releases the session of its thread
+    assert remove_session.call_count == 3
+    assert responses[0]['response'] == {'target': 'first'}
+    with db.scoped_session() as session:
+        statuses = {
+            t.taskUri: (t.status, t.error)
+            for t in session.query(models.Task).filter(
+                models.Task.taskUri.in_([first, failing, started, unknown])
+            )
+        }
+    assert statuses[first] == ('completed', {})
+    assert statuses[failing] == ('failed', {'message': 'boom'})
+    assert statuses[started][0] == 'started'
+    assert statuses[unknown][0] == 'pending'
+
+    # tasks are claimed once, a redelivered batch does nothing
+    assert worker.process(db, [first, failing]) == []
+
+
+def test_process_runs_target_tasks_in_order(db, worker):
+    with db.scoped_session() as session:
+        tasks = [_task(session, 'test.ordered', target='same') for _ in range(4)]
+        other = _task(session, 'test.ordered', target='other')
+
+    responses = worker.process(db, tasks + [other])
+
+    assert [r['taskUri'] for r in responses] == tasks + [other]
+    same_target = [call for call in worker.calls if call[0] in tasks]
+    assert [uri for uri, _ in same_target] == tasks
+    assert len({thread for _, thread in same_target}) == 1
+
+
+def test_process_saves_each_task_status(db, worker, mocker):
+    with db.scoped_session() as session:
+        raw = _task(session, 'test.bytes', target='raw')
+        ordered = _task(session, 'test.ordered', target='ordered')
+    mocker.patch.object(
+        WorkerHandler, 'update_tasks', side_effect=Exception('bulk write failed')
+    )
+
+    responses = worker.process(db, [raw, ordered])
+
+    assert [r['status'] for r in responses] == ['failed', 'completed']
+    with db.scoped_session() as session:
+        raw_task = session.query(models.Task).get(raw)
+        assert raw_task.status == 'failed'
+        assert 'Invalid task response' in raw_task.error['message']
+        assert session.query(models.Task).get(ordered).status == 'completed'
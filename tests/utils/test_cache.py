@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from dataall.aws.handlers.sts import SessionHelper
+from dataall.utils import Parameter, TTLCache
+
+
+def test_ttl_cache_expiry(mocker):
+    clock = mocker.patch('dataall.utils.cache.time.monotonic', return_value=100)
+    cache = TTLCache(ttl=10)
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+    clock.return_value = 111
+    assert cache.get('key') is None
+    assert cache.stats() == {'size': 0, 'hits': 1, 'misses': 1}
+
+
+def test_ttl_cache_eviction_and_invalidation():
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get_or_set('a', lambda: 0) == 1
+    cache.invalidate('a')
+    assert cache.get_or_set('a', lambda: 0) == 0
+    cache.invalidate_if(lambda key: key in ['a', 'c'])
+    assert len(cache) == 0
+
+
+def test_ttl_cache_none_and_zero_ttl(mocker):
+    mocker.patch('dataall.utils.cache.time.monotonic', return_value=100)
+    cache = TTLCache(ttl=60)
+    assert cache.get_or_set('missing', lambda: None, cache_none=False) is None
+    assert 'missing' not in cache._data
+    cache.get_or_set('none', lambda: None)
+    assert 'none' in cache._data
+    cache.set('expired', 1, ttl=0)
+    assert cache.get('expired') is None
+
+
+def test_parameter_is_cached(mocker):
+    ssm = MagicMock()
+    ssm.get_parameter.return_value = {'Parameter': {'Value': 'queue'}}
+    mocker.patch.object(Parameter, 'ssm', return_value=ssm)
+    Parameter.invalidate()
+    assert Parameter.get_parameter(env='test', path='sqs/queue_url') == 'queue'
+    assert Parameter.get_parameter(env='test', path='sqs/queue_url') == 'queue'
+    assert ssm.get_parameter.call_count == 1
+    Parameter.invalidate(env='test', path='sqs/queue_url')
+    Parameter.get_parameter(env='test', path='sqs/queue_url')
+    assert ssm.get_parameter.call_count == 2
+    Parameter.invalidate()
+
+
+def test_session_helper_secret_is_cached(mocker):
+    fetch = mocker.patch.object(SessionHelper, '_fetch_secret', return_value='extid')
+    SessionHelper.secrets.invalidate()
+    assert SessionHelper.get_external_id_secret() == 'extid'
+    assert SessionHelper.get_external_id_secret() == 'extid'
+    assert fetch.call_count == 1
+    SessionHelper.get_secret('dataall-externalId-local', use_cache=False)
+    assert fetch.call_count == 2
+    SessionHelper.secrets.invalidate()
+
+
+def test_failed_lookups_are_not_cached(mocker):
+    fetch = mocker.patch.object(SessionHelper, '_fetch_secret', return_value=None)
+    SessionHelper.secrets.invalidate()
+    assert SessionHelper.get_secret('missing') is None
+    fetch.return_value = 'found'
+    assert SessionHelper.get_secret('missing') == 'found'
+    assert SessionHelper.get_secret('missing') == 'found'
+    assert fetch.call_count == 2
+    SessionHelper.secrets.invalidate()
+
+    fetch = mocker.patch.object(Parameter, '_fetch_parameter', return_value=None)
+    Parameter.invalidate()
+    assert Parameter.get_parameter(env='test', path='missing') is None
+    assert Parameter.get_parameter(env='test', path='missing') is None
+    assert fetch.call_count == 2
+    Parameter.invalidate()
+
+
+def test_assumed_role_sessions_are_cached(mocker):
+    mocker.patch.object(SessionHelper, 'get_external_id_secret', return_value='extid')
+    base_session = MagicMock()
+    sts = base_session.client.return_value
+    sts.assume_role.return_value = {
+        'Credentials': {
+            'AccessKeyId': 'AKIA',
+            'SecretAccessKey': 'secret',
+            'SessionToken': 'token',
+            'Expiration': datetime.now(timezone.utc) + timedelta(hours=1),
+        }
+    }
+    SessionHelper.clear_sessions()
+    role_arn = 'arn:aws:iam::111111111111:role/dataallPivotRole'
+    session = SessionHelper.get_session(base_session=base_session, role_arn=role_arn)
+    assert SessionHelper.get_session(base_session=base_session, role_arn=role_arn) is session
+    assert sts.assume_role.call_count == 1
+    assert session.get_credentials().access_key == 'AKIA'
+    assert session.client('s3', region_name='eu-west-1') is session.client(
+        's3', region_name='eu-west-1'
+    )
+    SessionHelper.get_session(base_session=base_session, role_arn=role_arn, use_cache=False)
+    assert sts.assume_role.call_count == 2
+    SessionHelper.clear_sessions()
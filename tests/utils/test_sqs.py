@@ -0,0 +1,108 @@
+import pytest
+
+from dataall.aws.handlers.sqs import LocalQueue, SqsQueue, SqsSendError
+from dataall.db import models
+
+
+@pytest.fixture
+def queue():
+    queue = LocalQueue()
+    SqsQueue.use_backend(queue)
+    SqsQueue.recent.invalidate()
+    yield queue
+    SqsQueue.use_backend(None)
+    SqsQueue.recent.invalidate()
+
+
+def _task(session, action, target):
+    task = models.Task(action=action, targetUri=target, payload={})
+    session.add(task)
+    session.commit()
+    return task.taskUri
+
+
+def test_buffered_tasks_are_batched_and_coalesced(db, queue):
+    with db.scoped_session() as session:
+        describe = _task(session, 'cloudformation.stack.describe_resources', 'stack1')
+        duplicate = _task(session, 'cloudformation.stack.describe_resources', 'stack1')
+        update = _task(session, 'cloudformation.stack.update', 'stack1')
+        status = _task(session, 'glue.job.profiling_run_status', 'run1')
+
+    with SqsQueue.buffered():
+        for task_id in [describe, duplicate, update, status]:
+            assert SqsQueue.send(db, [task_id]) is None
+        assert queue.messages == []
+
+    assert [m['MessageGroupId'] for m in queue.messages] == ['stack1', 'run1']
+    assert queue.receive() == [[describe, update], [status]]
+    with db.scoped_session() as session:
+        coalesced = session.query(models.Task).get(duplicate)
+        assert coalesced.status == 'completed'
+        assert coalesced.response == {'coalescedWith': describe}
+
+    # a read within the window while the first task is pending is dropped
+    with db.scoped_session() as session:
+        again = _task(session, 'glue.job.profiling_run_status', 'run1')
+    assert SqsQueue.send(db, [again]) == []
+    assert queue.receive() == []
+
+    # once the first task started, a new one is sent
+    with db.scoped_session() as session:
+        session.query(models.Task).get(status).status = 'started'
+        later = _task(session, 'glue.job.profiling_run_status', 'run1')
+    SqsQueue.send(db, [later])
+    assert queue.receive() == [[later]]
+
+
+class FailingQueue(LocalQueue):
+    """Rejects the messages of the `rejected` group"""
+
+    def __init__(self, rejected):
+        super().__init__()
+        self.rejected = rejected
+
+    def send_message_batch(self, QueueUrl, Entries):
+        accepted = [e for e in Entries if e['MessageGroupId'] != self.rejected]
+        response = super().send_message_batch(QueueUrl, accepted)
+        response['Failed'] = [
+            {'Id': e['Id'], 'Code': 'InternalError', 'Message': 'rejected'}
+            for e in Entries
+            if e['MessageGroupId'] == self.rejected
+        ]
+        return response
+
+
+def test_unsent_tasks_are_failed(db, queue):
+    failing = FailingQueue(rejected='stack2')
+    SqsQueue.use_backend(failing)
+    with db.scoped_session() as session:
+        sent = _task(session, 'cloudformation.stack.update', 'stack1')
+        rejected = _task(session, 'cloudformation.stack.update', 'stack2')
+        duplicate = _task(session, 'cloudformation.stack.update', 'stack2')
+
+    with pytest.raises(SqsSendError) as error:
+        with SqsQueue.buffered():
+            SqsQueue.send(db, [sent, rejected, duplicate])
+    assert set(error.value.failed) == {rejected, duplicate}
+    with db.scoped_session() as session:
+        other = _task(session, 'cloudformation.stack.update', 'stack2')
+    with SqsQueue.buffered(raise_errors=False) as errors:
+        SqsQueue.send(db, [other])
+    assert list(errors[0].failed) == [other]
+    assert failing.receive() == [[sent]]
+    with db.scoped_session() as session:
+        assert session.query(models.Task).get(sent).status == 'pending'
+        for uri in [rejected, duplicate]:
+            task = session.query(models.Task).get(uri)
+            assert task.status == 'failed'
+            assert 'rejected' in task.error['message']
+
+    # the rejected task was not recorded as sent, a new one is not dropped
+    SqsQueue.use_backend(queue)
+    with db.scoped_session() as session:
+        retry = _task(session, 'cloudformation.stack.update', 'stack2')
+        again = _task(session, 'cloudformation.stack.update', 'stack1')
+        assert SqsQueue.send(db, [retry, again])
+        # the caller's session stays usable
+        assert session.query(models.Task).get(retry).status == 'pending'
+    assert queue.receive() == [[retry]]